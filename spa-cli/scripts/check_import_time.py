@@ -0,0 +1,101 @@
+"""Regresión de tiempo de arranque del CLI usando `python -X importtime`.
+
+Ejecuta los comandos más comunes en un proceso nuevo, suma el tiempo de import
+reportado por el intérprete y verifica que los módulos pesados de otros grupos
+no se importen. Uso (desde la raíz de `spa-cli/`):
+
+    python scripts/check_import_time.py
+    python scripts/check_import_time.py --max-ms 400 -v
+
+Sale con código 1 si algún comando importa un módulo prohibido o excede el
+presupuesto de milisegundos.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Dependencias pesadas que ningún comando "ligero" debería pagar
+HEAVY_MODULES = ('cookiecutter', 'yaml', 'tqdm', 'dateutil', 'fastapi', 'uvicorn', 'mangum')
+
+# (argv, módulos que NO deben importarse)
+CHECKS: List[Tuple[List[str], Tuple[str, ...]]] = [
+    (['--help'], HEAVY_MODULES + ('toml', 'spa_cli.globals', 'spa_cli.src.project')),
+    (['--version'], HEAVY_MODULES + ('toml', 'spa_cli.globals', 'spa_cli.src')),
+    (['endpoint', '--help'], HEAVY_MODULES + ('spa_cli.src.project', 'spa_cli.src.utils.build')),
+    (['endpoint', 'add', '--help'], HEAVY_MODULES + ('spa_cli.src.project', 'spa_cli.src.utils.build')),
+    (['lambda', '--help'], HEAVY_MODULES + ('spa_cli.src.project', 'spa_cli.src.utils.build')),
+    (['authorizer', '--help'], HEAVY_MODULES + ('spa_cli.src.project', 'spa_cli.src.utils.build')),
+    (['cache', '--help'], HEAVY_MODULES + ('spa_cli.src.project', 'spa_cli.globals')),
+]
+
+RUNNER = "import sys; from spa_cli.cli import app; sys.argv[0] = 'spa'; app(prog_name='spa')"
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """`[(módulo, µs acumulados, nivel)]` de la salida de `-X importtime`."""
+    entries: List[Tuple[str, int, int]] = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, raw_name = line[len('import time:'):].split('|')
+        name = raw_name.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(cumulative), depth))
+    return entries
+
+
+def run_check(argv: List[str]) -> Tuple[Dict[str, int], int]:
+    """Corre `spa <argv>` y regresa `({módulo: µs acumulados}, µs totales)`."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PROJECT_ROOT), os.getenv('PYTHONPATH')])))
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', RUNNER, *argv],
+        capture_output=True, text=True, env=env,
+    )
+    entries = parse_importtime(proc.stderr)
+    modules = {name: cumulative for name, cumulative, _ in entries}
+    # Los imports de primer nivel ya incluyen a sus hijos: sumarlos da el total sin duplicar
+    total = sum(cumulative for _, cumulative, depth in entries if depth <= 1)
+    return modules, total
+
+
+def leaked_modules(modules: Dict[str, int], forbidden: Tuple[str, ...]) -> List[str]:
+    """Módulos importados que están en `forbidden` (o son submódulos de alguno)."""
+    return sorted(
+        name for name in modules
+        if any(name == prefix or name.startswith(prefix + '.') for prefix in forbidden)
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-ms', type=float, default=float(os.getenv('SPA_MAX_IMPORT_MS', '0')),
+                        help='Presupuesto de import por comando en ms (0 = no se valida).')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Muestra los 10 imports más lentos.')
+    args = parser.parse_args()
+
+    failed = False
+    for argv, forbidden in CHECKS:
+        modules, total_us = run_check(argv)
+        label = 'spa ' + ' '.join(argv)
+        leaked = leaked_modules(modules, forbidden)
+        over_budget = args.max_ms and total_us / 1000 > args.max_ms
+        status = 'FAIL' if leaked or over_budget else 'ok'
+        print(f'[{status}] {label:<24} {total_us / 1000:8.1f} ms')
+        if leaked:
+            print(f'       importó módulos prohibidos: {", ".join(leaked[:10])}')
+        if over_budget:
+            print(f'       excede el presupuesto de {args.max_ms:.0f} ms')
+        if args.verbose:
+            for name, cumulative in sorted(modules.items(), key=lambda item: -item[1])[:10]:
+                print(f'       {cumulative / 1000:8.1f} ms  {name}')
+        failed = failed or bool(leaked) or bool(over_budget)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,7 +14,6 @@ package_data = \
 install_requires = \
 ['cookiecutter>=2.1.1,<3.0.0',
  'python-dotenv>=0.20.0,<0.21.0',
- 'toml>=0.10.2,<0.11.0',
  'typer[all]>=0.5.0,<0.6.0',
  'typing-extensions>=4.9.0',
  'setuptools==72.1.0',
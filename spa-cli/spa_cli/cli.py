@@ -1,22 +1,57 @@
+from importlib import import_module
 from importlib.metadata import version as v
+from typing import List, Optional
 
+import click
 import typer
-from dotenv import load_dotenv
+from typer.core import TyperGroup
 
-from .src.project import project
-from .src.model import model
-from .src.endpoint import endpoint
-from .src.lambda_function import lambda_function
-from .src.authorizer import authorizer
+# Grupos de subcomandos: nombre -> (módulo con `app = typer.Typer(...)`, ayuda corta).
+# El módulo (y sus dependencias: cookiecutter, yaml, el pipeline de build, ...) solo
+# se importa cuando se invoca ese grupo.
+LAZY_COMMANDS = {
+    'project': ('spa_cli.src.project.project', 'Crea, instala, construye y ejecuta el proyecto.'),
+    # 'model': ('spa_cli.src.model.model', 'Genera modelos, servicios y controladores.'),
+    'endpoint': ('spa_cli.src.endpoint.endpoint', 'Agrega endpoints al proyecto.'),
+    'lambda': ('spa_cli.src.lambda_function.lambda_function', 'Agrega y perfila las lambdas del proyecto.'),
+    'authorizer': ('spa_cli.src.authorizer.authorizer', 'Gestiona lambda authorizers para deploy en container.'),
+    'cache': ('spa_cli.src.cache.cache', 'Administra el cache local de dependencias de layers.'),
+}
 
-load_dotenv()
 
-app = typer.Typer()
-app.add_typer(project.app, name='project')
-# app.add_typer(model.app, name='model')
-app.add_typer(endpoint.app, name='endpoint')
-app.add_typer(lambda_function.app, name='lambda')
-app.add_typer(authorizer.app, name='authorizer')
+class LazyGroup(TyperGroup):
+    """Grupo raíz que resuelve los subcomandos de `LAZY_COMMANDS` bajo demanda.
+
+    Mientras se formatea `spa --help` los grupos se representan con un placeholder
+    que solo lleva la ayuda corta, para que listar comandos no importe ninguno.
+    """
+    _formatting_help = False
+
+    def format_help(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        self._formatting_help = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._formatting_help = False
+
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(LAZY_COMMANDS))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        command = super().get_command(ctx, cmd_name)
+        if command is not None or cmd_name not in LAZY_COMMANDS:
+            return command
+        module_path, short_help = LAZY_COMMANDS[cmd_name]
+        if self._formatting_help:
+            return TyperGroup(name=cmd_name, help=short_help, short_help=short_help)
+        group = typer.main.get_group(import_module(module_path).app)
+        group.name = cmd_name
+        group.short_help = group.short_help or short_help
+        self.add_command(group, cmd_name)
+        return group
+
+
+app = typer.Typer(cls=LazyGroup)
 
 
 @app.callback(invoke_without_command=True)
@@ -24,5 +59,8 @@ def callback_version(version: bool = False):
     """
     Imprime la versión del CLI.
     """
+    from dotenv import load_dotenv
+
+    load_dotenv()
     if version:
         typer.echo(f'version: {v("spa-cli")}')
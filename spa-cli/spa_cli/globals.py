@@ -1,11 +1,13 @@
 from enum import Enum
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional, TypeVar, Type, cast, Callable, List
+from typing import Any, Dict, Optional, TypeVar, Type, cast, Callable, List, Tuple
 import typer
-import toml
+import tomllib
 import datetime
+import hashlib
+import json
 from dotenv import load_dotenv
 
 class Constants(Enum):
@@ -72,6 +74,32 @@ def to_class(c: Type[T], x: Any) -> dict:
     assert isinstance(x, c)
     return cast(Any, x).to_dict()
 
+
+class ConfigError(Exception):
+    """`spa_project.toml` inválido; el mensaje indica la clave (`spa.<sección>.<clave>`) y el problema."""
+
+
+def _require(condition: Any, message: str):
+    if not condition:
+        raise ConfigError(message)
+
+
+def _table(obj: Any, section: str, allowed: Optional[Tuple[str, ...]] = None) -> dict:
+    """Valida que `obj` sea la tabla `[section]` y, con `allowed`, avisa de las claves desconocidas.
+
+    Una clave desconocida no es un error (puede venir de una versión más nueva de spa-cli
+    o ser un dato del usuario): se ignora con un aviso en stderr.
+    """
+    _require(obj is not None, f"falta la sección [{section}]")
+    _require(isinstance(obj, dict), f"{section} debe ser una tabla")
+    if allowed is not None:
+        unknown = sorted(set(obj) - set(allowed))
+        if unknown:
+            typer.echo(f"[!] {section}: se ignoran las claves desconocidas {', '.join(unknown)} "
+                       f"(válidas: {', '.join(allowed)})", err=True, color=typer.colors.YELLOW)
+    return obj
+
+
 class BaseConf:
     @property
     def attrs(self) -> List[str]:
@@ -83,12 +111,15 @@ class BaseConf:
     
     @classmethod
     def from_dict(cls_, obj: Any) -> 'Folders':
-        assert isinstance(obj, dict)
-        
-        obj_dict = {}
+        section = getattr(cls_, 'SECTION', cls_.__name__.lower())
         attributes = list(filter(lambda prop: not str(prop).startswith('_'), (cls_).__dataclass_fields__.keys()))
+        _table(obj, section, tuple(attributes))
+
+        obj_dict = {}
         for attr in attributes:
-            obj_dict.update({attr: from_str(obj.get(attr))})
+            _require(attr in obj, f"falta {section}.{attr}")
+            _require(isinstance(obj[attr], str), f"{section}.{attr} debe ser un string")
+            obj_dict.update({attr: obj[attr]})
         return cls_(**obj_dict)
     
     def to_dict(self):
@@ -108,6 +139,8 @@ class BaseConf:
 
 @dataclass
 class Files(BaseConf):
+    SECTION = 'spa.template.files'
+
     model: str
     service: str
     controller: str
@@ -119,6 +152,8 @@ class Files(BaseConf):
 
 @dataclass
 class Folders(BaseConf):
+    SECTION = 'spa.project.folders'
+
     models: str
     services: str
     controllers: str
@@ -129,6 +164,8 @@ class Folders(BaseConf):
 
 @dataclass
 class Definition(BaseConf):
+    SECTION = 'spa.project.definition'
+
     name: str
     description: str
     author: str
@@ -143,10 +180,14 @@ class LambdaAuthorizer(BaseConf):
     handler: Optional[str] = None
 
     @staticmethod
-    def from_dict(obj: Any) -> 'LambdaAuthorizer':
-        assert isinstance(obj, dict)
-        role_name = from_str(obj.get("role_name"))
-        lambda_name = from_str(obj.get("lambda_name"))
+    def from_dict(obj: Any, section: str = 'spa.api.lambda-authorizers.<name>') -> 'LambdaAuthorizer':
+        _table(obj, section, ('role_name', 'lambda_name', 'module', 'handler'))
+        for attr in ('role_name', 'lambda_name'):
+            _require(isinstance(obj.get(attr), str), f"{section}.{attr} es requerido (string)")
+        for attr in ('module', 'handler'):
+            _require(obj.get(attr) is None or isinstance(obj[attr], str), f"{section}.{attr} debe ser un string")
+        role_name = obj["role_name"]
+        lambda_name = obj["lambda_name"]
         module = obj.get("module")
         handler = obj.get("handler")
         return LambdaAuthorizer(role_name, lambda_name, module, handler)
@@ -157,15 +198,158 @@ class Api(BaseConf):
 
     @staticmethod
     def from_dict(obj: Any) -> 'Api':
-        assert isinstance(obj, dict)
+        _table(obj, 'spa.api', ('lambda-authorizers', 'lambda_authorizers'))
         # Support both 'lambda-authorizers' (from TOML) and 'lambda_authorizers' (legacy)
-        lambda_authorizers_raw = obj.get("lambda-authorizers", obj.get("lambda_authorizers", {}))
+        lambda_authorizers_raw = _table(obj.get("lambda-authorizers", obj.get("lambda_authorizers", {})),
+                                        'spa.api.lambda-authorizers')
         lambda_authorizers = {
-            key: LambdaAuthorizer.from_dict(value)
+            key: LambdaAuthorizer.from_dict(value, f'spa.api.lambda-authorizers.{key}')
             for key, value in lambda_authorizers_raw.items()
         }
         return Api(lambda_authorizers)
 
+@dataclass
+class Server(BaseConf):
+    """`[spa.container.server]`: parámetros de gunicorn para el container de producción."""
+    workers: Optional[int] = None
+    port: int = 8000
+    keepalive: int = 5
+    backlog: int = 2048
+    timeout: int = 30
+    graceful_timeout: int = 30
+    preload: bool = True
+    max_requests: int = 0
+    handler_threads: Optional[int] = None
+    max_body_bytes: Optional[int] = None
+    router: str = "fastapi"
+    metrics_path: str = "/metrics"
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Server':
+        _table(obj, 'spa.container.server', tuple(Server.__dataclass_fields__))
+        defaults = Server()
+        values = {}
+        for attr in ('workers', 'port', 'keepalive', 'backlog', 'timeout', 'graceful_timeout',
+                     'max_requests', 'handler_threads', 'max_body_bytes'):
+            value = obj.get(attr, getattr(defaults, attr))
+            _require(value is None or (isinstance(value, int) and not isinstance(value, bool)),
+                     f"spa.container.server.{attr} debe ser un entero")
+            values[attr] = value
+        preload = obj.get('preload', defaults.preload)
+        _require(isinstance(preload, bool), "spa.container.server.preload debe ser true o false")
+        router = obj.get('router', defaults.router)
+        _require(router in ('fastapi', 'asgi'), "spa.container.server.router debe ser 'fastapi' o 'asgi'")
+        metrics_path = obj.get('metrics_path', defaults.metrics_path)
+        _require(isinstance(metrics_path, str) and (not metrics_path or metrics_path.startswith('/')),
+                 "spa.container.server.metrics_path debe ser una ruta que empiece con '/' (o \"\" para desactivarla)")
+        return Server(preload=preload, router=router, metrics_path=metrics_path, **values)
+
+@dataclass
+class Container(BaseConf):
+    server: Server
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Container':
+        _table(obj, 'spa.container', ('server',))
+        server = Server.from_dict(obj.get("server", {}))
+        return Container(server)
+
+@dataclass
+class Slim(BaseConf):
+    """`[spa.build.slim]`: qué se elimina de los artefactos de layers/lambdas y presupuestos de tamaño."""
+    enabled: bool = True
+    pycache: bool = True
+    tests: bool = True
+    docs: bool = True
+    dist_info: bool = True
+    type_stubs: bool = True
+    # Opt-in: quitar boto3/botocore reemplaza en silencio la versión fijada en una layer
+    runtime_packages: List[str] = field(default_factory=list)
+    exclude: List[str] = field(default_factory=list)
+    keep: List[str] = field(default_factory=list)
+    max_layer_mb: Optional[float] = None
+    max_lambda_mb: Optional[float] = None
+    max_function_mb: Optional[float] = 250
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Slim':
+        _table(obj, 'spa.build.slim', tuple(Slim.__dataclass_fields__))
+        defaults = Slim()
+        values = {}
+        for attr in ('enabled', 'pycache', 'tests', 'docs', 'dist_info', 'type_stubs'):
+            value = obj.get(attr, getattr(defaults, attr))
+            _require(isinstance(value, bool), f"spa.build.slim.{attr} debe ser true o false")
+            values[attr] = value
+        for attr in ('runtime_packages', 'exclude', 'keep'):
+            value = obj.get(attr, getattr(defaults, attr))
+            _require(isinstance(value, list) and all(isinstance(v, str) for v in value),
+                     f"spa.build.slim.{attr} debe ser una lista de strings")
+            values[attr] = value
+        for attr in ('max_layer_mb', 'max_lambda_mb', 'max_function_mb'):
+            value = obj.get(attr, getattr(defaults, attr))
+            _require(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0),
+                     f"spa.build.slim.{attr} debe ser un número positivo")
+            values[attr] = value
+        return Slim(**values)
+
+@dataclass
+class Bytecode(BaseConf):
+    """`[spa.build.bytecode]`: precompilación de lambdas y layers a `.pyc`."""
+    enabled: bool = True
+    optimize: int = 0
+    drop_sources: bool = False
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Bytecode':
+        _table(obj, 'spa.build.bytecode', tuple(Bytecode.__dataclass_fields__))
+        defaults = Bytecode()
+        enabled = obj.get('enabled', defaults.enabled)
+        _require(isinstance(enabled, bool), "spa.build.bytecode.enabled debe ser true o false")
+        optimize = obj.get('optimize', defaults.optimize)
+        _require(optimize in (0, 1, 2) and not isinstance(optimize, bool),
+                 "spa.build.bytecode.optimize debe ser 0, 1 o 2")
+        drop_sources = obj.get('drop_sources', defaults.drop_sources)
+        _require(isinstance(drop_sources, bool), "spa.build.bytecode.drop_sources debe ser true o false")
+        return Bytecode(enabled, optimize, drop_sources)
+
+DEDUPE_POLICIES = ('warn', 'fail', 'hoist')
+
+@dataclass
+class Dedupe(BaseConf):
+    """`[spa.build.dedupe]`: qué hacer con paquetes instalados en más de una layer."""
+    policy: str = 'warn'
+    shared_layer: str = 'shared'
+    ignore: List[str] = field(default_factory=list)
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Dedupe':
+        _table(obj, 'spa.build.dedupe', tuple(Dedupe.__dataclass_fields__))
+        defaults = Dedupe()
+        policy = obj.get('policy', defaults.policy)
+        _require(policy in DEDUPE_POLICIES,
+                 f"spa.build.dedupe.policy debe ser uno de {', '.join(DEDUPE_POLICIES)}")
+        shared_layer = obj.get('shared_layer', defaults.shared_layer)
+        _require(isinstance(shared_layer, str) and shared_layer and '/' not in shared_layer
+                 and not shared_layer.startswith(('.', '__')), "spa.build.dedupe.shared_layer debe ser un nombre de carpeta")
+        ignore = obj.get('ignore', defaults.ignore)
+        _require(isinstance(ignore, list) and all(isinstance(v, str) for v in ignore),
+                 "spa.build.dedupe.ignore debe ser una lista de strings")
+        return Dedupe(policy, shared_layer, ignore)
+
+@dataclass
+class Build(BaseConf):
+    slim: Slim
+    bytecode: Bytecode = field(default_factory=Bytecode)
+    dedupe: Dedupe = field(default_factory=Dedupe)
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Build':
+        _table(obj, 'spa.build', tuple(Build.__dataclass_fields__))
+        slim = Slim.from_dict(obj.get("slim", {}))
+        bytecode = Bytecode.from_dict(obj.get("bytecode", {}))
+        dedupe = Dedupe.from_dict(obj.get("dedupe", {}))
+        return Build(slim, bytecode, dedupe)
+
 @dataclass
 class Project(BaseConf):
     definition: Definition
@@ -173,7 +357,7 @@ class Project(BaseConf):
 
     @staticmethod
     def from_dict(obj: Any) -> 'Project':
-        assert isinstance(obj, dict)
+        _table(obj, 'spa.project', ('definition', 'folders'))
         definition = Definition.from_dict(obj.get("definition"))
         folders = Folders.from_dict(obj.get("folders"))
         return Project(definition, folders)
@@ -184,26 +368,126 @@ class Template(BaseConf):
 
     @staticmethod
     def from_dict(obj: Any) -> 'Template':
-        assert isinstance(obj, dict)
+        _table(obj, 'spa.template', ('files',))
         files = Files.from_dict(obj.get("files"))
         return Template(files)
 
+# Variables de entorno que sobreescriben `[spa.deploy]` (atributo -> variable)
+DEPLOY_ENV_VARS = {
+    'app_name': 'APP_NAME',
+    'aws_account': 'AWS_ACCOUNT_ID',
+    'aws_region': 'AWS_REGION',
+}
+
+@dataclass
+class Deploy(BaseConf):
+    """`[spa.deploy]`: destino del despliegue. `app_name` vacío usa `spa.project.definition.name`."""
+    app_name: Optional[str] = None
+    aws_account: str = '123456789012'
+    aws_region: str = 'us-east-1'
+
+    @staticmethod
+    def from_dict(obj: Any) -> 'Deploy':
+        _table(obj, 'spa.deploy', tuple(Deploy.__dataclass_fields__))
+        defaults = Deploy()
+        values = {}
+        for attr in Deploy.__dataclass_fields__:
+            value = obj.get(attr, getattr(defaults, attr))
+            _require(value is None or isinstance(value, str), f"spa.deploy.{attr} debe ser un string")
+            values[attr] = value
+        return Deploy(**values)
+
+# Argumentos del stack de una lambda que también usa el runtime local (ver lambda_lifecycle.py)
+LAMBDA_RUNTIME_KEYS = ('timeout', 'memory_size', 'reserved_concurrent_executions', 'provisioned_concurrent_executions')
+
+CONFIG_SECTIONS = ('project', 'template', 'api', 'container', 'build', 'lambdas', 'deploy')
+
 @dataclass
 class Config(BaseConf):
     project: Project
     template: Template
     api: Api = None
+    container: Container = None
+    build: Build = None
+    lambdas: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    deploy: Deploy = field(default_factory=Deploy)
+    environment: str = 'dev'
+    fingerprint: str = ''  # sha256 de la configuración resuelta; cambia si cambia cualquier valor
 
     @staticmethod
     def from_dict(obj: Any) -> 'Config':
-        assert isinstance(obj, dict)
+        _table(obj, 'spa', CONFIG_SECTIONS)
         project = Project.from_dict(obj.get("project"))
         template = Template.from_dict(obj.get("template"))
         api = Api.from_dict(obj.get("api", {})) if obj.get("api") else None
-        return Config(project, template, api)
-
-
-def load_config(path="spa_project.toml") -> Config:
+        container = Container.from_dict(obj.get("container", {}))
+        build = Build.from_dict(obj.get("build", {}))
+        lambdas = obj.get("lambdas", {})
+        _require(isinstance(lambdas, dict) and all(isinstance(v, dict) for v in lambdas.values()),
+                 "spa.lambdas.<lambda> debe ser una tabla de argumentos del stack")
+        for name, values in lambdas.items():
+            for key in LAMBDA_RUNTIME_KEYS:
+                value = values.get(key)
+                _require(value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)
+                                           and value >= (1 if key == 'timeout' else 0)),
+                         f"spa.lambdas.{name}.{key} debe ser un número {'positivo' if key == 'timeout' else '>= 0'}")
+        deploy = Deploy.from_dict(obj.get("deploy", {}))
+        return Config(project, template, api, container, build, lambdas, deploy)
+
+
+def _merge(base: dict, overlay: dict) -> dict:
+    """Copia de `base` con `overlay` encima: las tablas se combinan, el resto se reemplaza."""
+    merged = dict(base)
+    for key, value in overlay.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def resolve_config(raw: Any, environment: Optional[str] = None) -> Config:
+    """Valida `raw` (el toml parseado) y aplica `[spa.environments.<environment>]` y las
+    variables de entorno de `DEPLOY_ENV_VARS`.
+
+    El ambiente es `environment`, o `ENVIRONMENT`, o `dev`. Un ambiente sin tabla en
+    `[spa.environments]` usa la configuración base.
+    """
+    spa = dict(_table(_table(raw, 'spa_project.toml').get('spa'), 'spa'))
+    environments = _table(spa.pop('environments', {}), 'spa.environments')
+    environment = environment or os.getenv('ENVIRONMENT') or 'dev'
+    if environment in environments:
+        base = spa
+        spa = _merge(base, _table(environments[environment], f'spa.environments.{environment}'))
+        try:
+            config = Config.from_dict(spa)
+        except ConfigError as e:
+            Config.from_dict(base)  # si la base ya es inválida, ese es el error a reportar
+            raise ConfigError(f"{e} (con el overlay [spa.environments.{environment}])") from None
+    else:
+        config = Config.from_dict(spa)
+    config.environment = environment
+    for attr, variable in DEPLOY_ENV_VARS.items():
+        setattr(config.deploy, attr, os.getenv(variable) or getattr(config.deploy, attr))
+    config.deploy.app_name = config.deploy.app_name or config.project.definition.name
+    config.fingerprint = hashlib.sha256(json.dumps(
+        {'spa': spa, 'environment': environment, 'deploy': config.deploy.to_dict()},
+        sort_keys=True, default=str,
+    ).encode()).hexdigest()
+    return config
+
+
+# (ruta, mtime, tamaño, ambiente, variables de entorno) -> Config resuelta
+_config_cache: Dict[tuple, Config] = {}
+
+
+def load_config(path="spa_project.toml", environment: Optional[str] = None) -> Config:
+    """Configuración del proyecto, parseada y validada una vez por proceso.
+
+    El resultado se reutiliza mientras el archivo (mtime y tamaño), el ambiente y las
+    variables de entorno que lo afectan no cambien. Lanza `ConfigError` si el archivo
+    no es toml válido o no cumple el esquema.
+    """
     config_path = Path(Path.cwd() / path)
     if not config_path.exists():
         typer.echo("config file not found in the project.", color=typer.colors.YELLOW)
@@ -241,13 +525,76 @@ layers = "src/layers"
 # [spa.api.lambda-authorizers.custom1]
 # role_name = "custom1-authorizer-role"
 # lambda_name = "custom1-authorizer"
+
+# Servidor del container (--build-mode container). Todos los valores son opcionales.
+# [spa.container.server]
+# workers = 4            # default: CPUs disponibles según la cuota de cgroup
+# keepalive = 5
+# backlog = 2048
+# timeout = 30
+# graceful_timeout = 30
+# preload = true
+# handler_threads = 8
+# max_body_bytes = 10485760
+# router = "fastapi"     # o "asgi": router ASGI mínimo, sin overhead de FastAPI por request
+# metrics_path = "/metrics"  # métricas Prometheus por ruta; "" las desactiva
+
+# Limpieza de artefactos de layers/lambdas en `spa project build`. Valores por defecto:
+# [spa.build.slim]
+# enabled = true
+# pycache = true          # __pycache__, *.pyc
+# tests = true            # tests/, test_*.py, conftest.py
+# docs = true             # docs/, examples/, *.md, *.rst
+# dist_info = true        # RECORD, WHEEL, INSTALLER, ... (se conservan METADATA, licencias y entry points)
+# type_stubs = true       # *.pyi, py.typed, paquetes *-stubs
+# runtime_packages = []  # p. ej. ["boto3", "botocore"]: ya incluidos en el runtime de Lambda
+# exclude = []            # globs adicionales a eliminar
+# keep = []               # globs que nunca se eliminan
+# max_layer_mb = 100      # presupuestos (MB descomprimidos); el build falla si se exceden
+# max_lambda_mb = 20
+# max_function_mb = 250   # lambda + layers (límite de AWS)
+
+# Precompilación a bytecode (hash sin verificar) de lambdas, layers y el runtime del container.
+# [spa.build.bytecode]
+# enabled = true
+# optimize = 0            # 1 o 2 equivalen a -O / -OO
+# drop_sources = false    # deja solo los .pyc (requiere la misma versión de Python en runtime)
+
+# Paquetes instalados en más de una layer (misma distribución en varios requirements.txt).
+# [spa.build.dedupe]
+# policy = "warn"         # "fail": aborta el build; "hoist": los mueve a una layer compartida
+# shared_layer = "shared" # nombre de la layer generada con policy = "hoist"
+# ignore = []             # distribuciones que se permiten duplicadas
+
+# Argumentos extra para el stack Pulumi de una lambda (se pasan tal cual a Lambda<Nombre>Stack).
+# timeout, memory_size, reserved_concurrent_executions y provisioned_concurrent_executions
+# también los usa run-api/container para el contexto y el pool de instancias de la lambda.
+# [spa.lambdas.mi_lambda]
+# memory_size = 512
+# timeout = 30
+
+# Destino del despliegue. APP_NAME, AWS_ACCOUNT_ID y AWS_REGION tienen prioridad.
+# [spa.deploy]
+# app_name = ""           # default: spa.project.definition.name
+# aws_account = "123456789012"
+# aws_region = "us-east-1"
+
+# Valores por ambiente (ENVIRONMENT o --env, default "dev"): se combinan sobre el resto del archivo.
+# [spa.environments.prod.build.slim]
+# max_function_mb = 200
+# [spa.environments.prod.lambdas.mi_lambda]
+# memory_size = 1024
         """)
         typer.echo(
             f"Created config file at {config_path} in this path you can find all configuration for the project here.")
         typer.echo(f"Please add the file {config_path} to git tracking and commit it")
-    try:
-        toml_config = toml.loads(config_path.read_text())
-    except Exception as e:
-        typer.echo("Error reading the config file, please check the file format.", color=typer.colors.RED)
-        raise 
-    return Config.from_dict(toml_config["spa"])
\ No newline at end of file
+    stat = config_path.stat()
+    variables = tuple(os.getenv(variable) for variable in ('ENVIRONMENT', *DEPLOY_ENV_VARS.values()))
+    key = (str(config_path.resolve()), stat.st_mtime_ns, stat.st_size, environment, variables)
+    if key not in _config_cache:
+        try:
+            raw = tomllib.loads(config_path.read_text(encoding="utf-8"))
+        except tomllib.TOMLDecodeError as e:
+            raise ConfigError(f"{path} no es un toml válido: {e}") from None
+        _config_cache[key] = resolve_config(raw, environment)
+    return _config_cache[key]
\ No newline at end of file
@@ -5,7 +5,7 @@ from typing import cast
 import os
 import typer
 
-from ...globals import load_config
+from ...globals import ConfigError, load_config
 
 app = typer.Typer(help="Gestiona lambda authorizers para deploy en container.")
 
@@ -53,8 +53,8 @@ def add_authorizer(
 
     try:
         config = load_config()
-    except Exception:
-        typer.echo('No se pudo leer la configuración del proyecto.', color=typer.colors.RED)
+    except ConfigError as e:
+        typer.echo(f'No se pudo leer la configuración del proyecto: {e}', color=typer.colors.RED)
         raise typer.Abort()
 
     app_name = cast(str, config.project.definition.name) or 'spa-app'
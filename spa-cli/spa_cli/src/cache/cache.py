@@ -0,0 +1,44 @@
+"""Comandos `spa cache ...` — administración del cache local de layers."""
+from datetime import datetime
+
+import typer
+
+from ..utils.layer_cache import LayerCache, format_size, parse_size
+
+app = typer.Typer(help="Administra el cache local de dependencias de layers.")
+
+
+def _open_cache(max_size: str = None) -> LayerCache:
+    try:
+        return LayerCache(max_size=parse_size(max_size) if max_size else None)
+    except ValueError as e:
+        typer.echo(str(e), color=typer.colors.RED)
+        raise typer.Abort()
+
+
+@app.command('info')
+def cache_info():
+    """Muestra la ubicación, el tamaño y las entradas del cache."""
+    cache = _open_cache()
+    entries = cache.entries()
+    total = sum(e['size'] for e in entries)
+    typer.echo(f"Cache: {cache.root}")
+    typer.echo(f"Entradas: {len(entries)} · Tamaño: {format_size(total)} / {format_size(cache.max_size)}")
+    for entry in entries:
+        last_used = datetime.fromtimestamp(entry['last_used']).strftime('%Y-%m-%d %H:%M')
+        packages = [line.strip() for line in entry['requirements'].splitlines() if line.strip() and not line.startswith('#')]
+        summary = ', '.join(packages[:3]) + (f' (+{len(packages) - 3})' if len(packages) > 3 else '')
+        typer.echo(f"  {entry['key'][:12]}  {format_size(entry['size']):>8}  {last_used}  {entry['python']}  {summary}")
+
+
+@app.command('prune')
+def cache_prune(
+    max_size: str = typer.Option(None, '--max-size', help="Tamaño objetivo (p. ej. 2G). Default: SPA_CACHE_MAX_SIZE o 5G."),
+    all_entries: bool = typer.Option(False, '--all', help="Elimina todas las entradas del cache."),
+):
+    """Desaloja las entradas menos usadas hasta quedar debajo del tamaño máximo."""
+    cache = _open_cache(max_size)
+    evicted = cache.clear() if all_entries else cache.prune()
+    freed = sum(e['size'] for e in evicted)
+    typer.echo(f"Eliminadas {len(evicted)} entradas ({format_size(freed)} liberados). "
+               f"Tamaño actual: {format_size(cache.total_size())}")
@@ -1,11 +1,13 @@
-from ...globals import load_config
+from ...globals import ConfigError, load_config
 from ..utils.folders import validate_path_not_exist
 from ..utils.strings import camel_case
 from ..utils.template_gen import copy_template_file
 
 import os
+import json
 import typer
 from pathlib import Path
+from typing import List
 
 app = typer.Typer()
 
@@ -13,7 +15,11 @@ app = typer.Typer()
 def new_lambda(
         lambda_name: str = typer.Option(help='Nombre de la funcion lambda.')
     ):
-    config = load_config()
+    try:
+        config = load_config()
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
+        raise typer.Abort()
     
     if "-" in lambda_name or " " in lambda_name:
         typer.echo('El nombre de la lambda no debe contener espacios o guiones. Se modificará por guiones bajos.', color=typer.colors.YELLOW)
@@ -60,3 +66,66 @@ def new_lambda(
 
     typer.echo(f'La lambda {lambda_name} se agrego correctamente!', color=typer.colors.GREEN)
 
+
+
+@app.command('profile')
+def profile_lambdas_command(
+        names: List[str] = typer.Argument(None, help='Lambdas a perfilar (default: todas).'),
+        as_json: bool = typer.Option(False, '--json', help='Imprime el reporte en JSON (para CI).'),
+        max_import_ms: float = typer.Option(None, '--max-import-ms', help='Falla si algún lambda tarda más en importar.'),
+        top: int = typer.Option(5, '--top', min=1, help='Módulos más costosos a mostrar por lambda.'),
+        event_path: Path = typer.Option(None, '--event', exists=True, dir_okay=False,
+                                        help='Evento JSON para la primera llamada (default: evento API Gateway de la primera ruta GET/HEAD).'),
+        jobs: int = typer.Option(None, '--jobs', '-j', min=1, help='Lambdas perfilados en paralelo (default: número de CPUs).'),
+    ):
+    """
+    Mide el cold start de cada lambda: import de lambda_function (-X importtime) y primera llamada al handler.
+    """
+    from ..utils.lambda_profile import profile_lambdas
+
+    try:
+        config = load_config()
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
+        raise typer.Abort()
+    lambdas_path = Path(os.getcwd()) / config.project.folders.lambdas
+    layers_path = Path(os.getcwd()) / config.project.folders.layers
+    for name in names or []:
+        if not (lambdas_path / name / 'lambda_function.py').exists():
+            typer.echo(f'No existe la lambda {name} en {lambdas_path}', color=typer.colors.RED)
+            raise typer.Exit(code=1)
+    event = json.loads(event_path.read_text()) if event_path else None
+
+    profiles = profile_lambdas(Path(os.getcwd()), lambdas_path, layers_path, names=names or None,
+                               event=event, top=top, jobs=jobs)
+    over_budget = [p.name for p in profiles
+                   if max_import_ms is not None and (p.import_ms is None or p.import_ms > max_import_ms)]
+    failed = [p.name for p in profiles if not p.ok]
+
+    if as_json:
+        typer.echo(json.dumps({
+            'max_import_ms': max_import_ms,
+            'over_budget': over_budget,
+            'failed': failed,
+            'lambdas': [p.to_dict() for p in profiles],
+        }, indent=2))
+    else:
+        typer.echo(f"{'lambda':<30} {'import ms':>10} {'1a llamada':>11} {'cold start':>11}  estado")
+        for p in profiles:
+            fmt = lambda ms: f'{ms:.1f}' if ms is not None else '-'
+            status = 'ok' if p.ok else f'error: {p.error or p.status_code}'
+            if p.skipped_call:
+                status += f' (solo import: {p.skipped_call} requiere --event)'
+            flag = '  [sobre presupuesto]' if p.name in over_budget else ''
+            typer.echo(f'{p.name:<30} {fmt(p.import_ms):>10} {fmt(p.first_call_ms):>11} {fmt(p.cold_start_ms):>11}  {status}{flag}')
+            for module in p.modules:
+                typer.echo(f'    {module.self_ms:>8.1f} ms  {module.module:<28} {module.origin}')
+
+    if failed:
+        typer.echo(f'Lambdas que fallaron al importar o en la primera llamada: {", ".join(failed)}',
+                   color=typer.colors.RED, err=as_json)
+    if over_budget:
+        typer.echo(f'Lambdas sobre el presupuesto de {max_import_ms:g} ms de import: {", ".join(over_budget)}',
+                   color=typer.colors.RED, err=as_json)
+    if failed or over_budget:
+        raise typer.Exit(code=1)
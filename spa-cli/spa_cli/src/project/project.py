@@ -1,24 +1,43 @@
-from ...globals import Constants, DRIVERS, load_config
+from ...globals import Bytecode, Config, ConfigError, Constants, DRIVERS, Dedupe, Slim, load_config
 from ..utils.template_gen import generate_project_template
 from ..utils.install_local_layers import install_layers, build_layers
-from ..utils.up_local_server import main as up_local_server
+from ..utils.up_local_server import main as up_local_server, prepare_local_api
 from ..utils.build import (
     build_lambdas,
     build_lambda_stack,
     build_api,
     bake_container_runtime,
     copy_container_artifacts,
+    dockerfile_python_version,
     generate_docker_files,
 )
+from ..utils.build_manifest import BuildManifest, sync_tree, sync_file
+from ..utils.layer_cache import LayerCache, format_size
+from ..utils.link_mode import LinkMode
+from ..utils.endpoint_index import EndpointIndex
+from ..utils.slim import (
+    check_budgets,
+    invalidate_on_config_change,
+    print_runtime_notice,
+    print_slim_report,
+    record_pruned,
+    refresh_sizes,
+    slim_artifacts,
+)
+from ..utils.bytecode import CONTAINER_RUNTIME_DIR, artifact_targets, compile_artifacts
+from ..utils.package import ARTIFACTS_MANIFEST, package_artifacts
+from ..utils.dedupe import dedupe_layers, invalidate_on_layers_change, print_dedupe_report
+from ..utils.build_profile import phase, profiling, record_io
 
 import os
 import re
+import sys
 import json
 import typer
-from typing import cast
+from typing import List, cast
 from click.types import Choice
 from pathlib import Path
-from shutil import copytree, rmtree, copy2
+from shutil import rmtree
 
 app = typer.Typer()
 
@@ -83,8 +102,8 @@ def init_project(
 def install_project():
     try:
         project_config = load_config()
-    except:
-        typer.echo('No se puedo leer la configuracion del proyecto', color=typer.colors.RED)
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
         raise typer.Abort()
     install_layers(project_config)
 
@@ -94,7 +113,10 @@ def run_app(
     host: str = typer.Option(None, "--host", help="Host para el servidor (default: 127.0.0.1)"),
     port: int = typer.Option(None, "--port", help="Puerto para el servidor (default: 8000)"),
     reload: bool = typer.Option(None, "--reload/--no-reload", help="Habilitar auto-reload en cambios de código"),
-    log_level: str = typer.Option(None, "--log-level", help="Nivel de log (critical, error, warning, info, debug, trace)")
+    log_level: str = typer.Option(None, "--log-level", help="Nivel de log (critical, error, warning, info, debug, trace)"),
+    hot_reload: bool = typer.Option(False, "--hot-reload", help="Recargar solo el lambda/layer modificado sin reiniciar el servidor"),
+    lambda_lifecycle: bool = typer.Option(False, "--lambda-lifecycle",
+                                          help="Emular instancias de Lambda: cold starts, concurrencia reservada y timeout")
 ):
     """
     Inicia el servidor de desarrollo local con FastAPI.
@@ -121,11 +143,15 @@ def run_app(
       spa project run-api --reload --log-level debug
 
       spa project run-api --host 0.0.0.0 --port 9000 --no-reload
+
+      spa project run-api --hot-reload
+
+      spa project run-api --lambda-lifecycle
     """
     try:
         project_config = load_config()
-    except:
-        typer.echo('No se puedo leer la configuracion del proyecto', color=typer.colors.RED)
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
         raise typer.Abort()
 
     typer.echo('Iniciando servidor local')
@@ -145,7 +171,8 @@ def run_app(
     extra_args.extend(ctx.args)
 
     # Pasar los argumentos adicionales a up_local_server
-    up_local_server(project_config, extra_args=extra_args if extra_args else None)
+    up_local_server(project_config, extra_args=extra_args if extra_args else None, hot_reload=hot_reload,
+                    lambda_lifecycle=lambda_lifecycle)
     
 
 @app.command('build')
@@ -155,7 +182,45 @@ def build_project(
         '--build-mode',
         help='Modo de build: serverless (default) o container.',
         case_sensitive=False,
-    )
+    ),
+    clean: bool = typer.Option(
+        False,
+        '--clean',
+        help='Borra build/ y reconstruye todo desde cero, ignorando el manifest incremental.',
+    ),
+    jobs: int = typer.Option(
+        None,
+        '--jobs', '-j',
+        min=1,
+        help='Procesos en paralelo para instalar layers, compilar bytecode y empaquetar (default: número de CPUs).',
+    ),
+    use_cache: bool = typer.Option(
+        True,
+        '--cache/--no-cache',
+        help='Reutiliza dependencias de layers desde el cache local (~/.cache/spa-cli/layers).',
+    ),
+    link_mode: LinkMode = typer.Option(
+        LinkMode.COPY.value,
+        '--link-mode',
+        help='Cómo poblar build/: copy (default), hardlink, reflink o symlink. '
+             'Si el filesystem no soporta el modo se usa copy.',
+        case_sensitive=False,
+    ),
+    package: bool = typer.Option(
+        True,
+        '--package/--no-package',
+        help='Genera zips reproducibles de cada lambda y layer en build/artifacts/ y build/artifacts.json.',
+    ),
+    environment: str = typer.Option(
+        None,
+        '--env',
+        help='Ambiente cuyo [spa.environments.<env>] se aplica (default: ENVIRONMENT o dev).',
+    ),
+    profile: bool = typer.Option(
+        False,
+        '--profile',
+        help='Mide tiempo, CPU, bytes y archivos de cada fase; imprime un resumen y escribe build/build-profile.json.',
+    ),
 ):
     build_mode = (build_mode or 'serverless').lower()
     if build_mode not in ('serverless', 'container'):
@@ -166,14 +231,31 @@ def build_project(
         raise typer.Abort()
 
     try:
-        project_config = load_config()
-    except:
-        typer.echo('No se puedo leer la configuracion del proyecto', color=typer.colors.RED)
+        project_config = load_config(environment=environment)
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
         raise typer.Abort()
 
-    typer.echo(f'Construyendo proyecto (mode={build_mode})')
+    with profiling(profile, Path(os.getcwd()).joinpath('build'), mode=build_mode,
+                   environment=project_config.environment):
+        _build(project_config, build_mode, clean, jobs, use_cache, link_mode, package)
+
+
+def _build(project_config: Config, build_mode: str, clean: bool, jobs: int, use_cache: bool,
+           link_mode: LinkMode, package: bool):
+    typer.echo(f'Construyendo proyecto (mode={build_mode}, env={project_config.environment})')
+    if build_mode == 'container' and link_mode is LinkMode.SYMLINK:
+        typer.echo(
+            "[!] --link-mode symlink deja enlaces a archivos fuera de build/; "
+            "docker build no los sigue. Usa hardlink o reflink para container.",
+            color=typer.colors.YELLOW,
+        )
     build_path = Path(os.getcwd()).joinpath('build')
-    if build_path.exists():
+    incremental = not clean and BuildManifest.exists(build_path)
+    if incremental and (BuildManifest.load(build_path).step('link_mode') or LinkMode.COPY.value) != link_mode.value:
+        typer.echo(f'Cambió --link-mode a {link_mode.value}, se reconstruye todo.')
+        incremental = False
+    if build_path.exists() and not incremental:
         for item in os.listdir(build_path):
             item_path = os.path.join(build_path, item)
             if os.path.isdir(item_path):
@@ -185,66 +267,180 @@ def build_project(
         
         rmtree(build_path)
         typer.echo(f"Deleted directory: {build_path}")
-    os.mkdir(build_path)
-
-    copytree(
-        Path(os.getcwd()).joinpath('infra'),
-        build_path.joinpath('infra'),
-        dirs_exist_ok=True
-    )
+    if incremental:
+        typer.echo(f'Build incremental sobre {build_path} (usa --clean para reconstruir todo)')
+        manifest = BuildManifest.load(build_path)
+    else:
+        os.mkdir(build_path)
+        manifest = BuildManifest(build_path)
+    manifest.set_step('link_mode', link_mode.value)
+
+    with phase('infra'):
+        sync_tree(
+            Path(os.getcwd()).joinpath('infra'),
+            build_path.joinpath('infra'),
+            manifest,
+            'infra',
+            link_mode=link_mode,
+        )
     
-    for filename in os.listdir(Path(os.getcwd())):
-        if re.compile(r'Pulumi.*').match(filename):
-            source_path = os.path.join(Path(os.getcwd()), filename)
-            destination_path = os.path.join(build_path, filename)
-            try:
-                copy2(source_path, destination_path)
-                typer.echo(f"Copied '{filename}' to '{build_path}'")
-            except Exception as e:
-                typer.echo(f"Error copying '{filename}': {e}", color=typer.colors.RED)
+    with phase('archivos Pulumi'):
+        for filename in os.listdir(Path(os.getcwd())):
+            if re.compile(r'Pulumi.*').match(filename):
+                source_path = os.path.join(Path(os.getcwd()), filename)
+                destination_path = os.path.join(build_path, filename)
+                try:
+                    if sync_file(Path(source_path), Path(destination_path), manifest, f'root/{filename}', link_mode):
+                        typer.echo(f"Copied '{filename}' to '{build_path}'")
+                except Exception as e:
+                    typer.echo(f"Error copying '{filename}': {e}", color=typer.colors.RED)
     
-    copy2(Path().cwd() / 'pyproject.toml', build_path / 'pyproject.toml')
+        sync_file(Path().cwd() / 'pyproject.toml', build_path / 'pyproject.toml', manifest, 'root/pyproject.toml', link_mode)
 
     layers_path = Path(os.getcwd()) / project_config.project.folders.layers
     lambdas_path = Path(os.getcwd()) / project_config.project.folders.lambdas
     output_layers_path = build_path / 'tmp_build_layer'
 
+    slim_config = project_config.build.slim if project_config.build else Slim()
+    bytecode_config = project_config.build.bytecode if project_config.build else Bytecode()
+    dedupe_config = project_config.build.dedupe if project_config.build else Dedupe()
+    if build_mode == 'container' and bytecode_config.enabled and bytecode_config.drop_sources:
+        image_python = dockerfile_python_version(Path(os.getcwd()) / 'Dockerfile')
+        if image_python != sys.version_info[:2]:
+            found = f'python {image_python[0]}.{image_python[1]}' if image_python else 'una imagen python:X.Y no reconocida'
+            typer.echo(f"[!] spa.build.bytecode.drop_sources requiere que la imagen del Dockerfile use la misma "
+                       f"versión de Python que el build ({sys.version_info[0]}.{sys.version_info[1]}), pero usa "
+                       f"{found}. Ajusta el FROM o usa drop_sources = false.", color=typer.colors.RED)
+            raise typer.Exit(code=1)
+    if dedupe_config.policy == 'hoist' and layers_path.joinpath(dedupe_config.shared_layer).exists():
+        typer.echo(f"[!] Ya existe una layer '{dedupe_config.shared_layer}' en {layers_path}; usa otro "
+                   f"spa.build.dedupe.shared_layer.", color=typer.colors.RED)
+        raise typer.Exit(code=1)
+    if invalidate_on_config_change(manifest, slim_config, bytecode_config):
+        typer.echo('Cambió [spa.build.slim]: se reinstalan las dependencias de las layers.')
+    if invalidate_on_layers_change(manifest, dedupe_config, layers_path, output_layers_path):
+        typer.echo('Cambiaron las layers o [spa.build.dedupe]: se reinstalan las layers para rearmar la layer compartida.')
+
     typer.echo(f'Building layers from {layers_path} into {output_layers_path}...')
-    build_layers(layers_path, output_layers_path)
+    with phase('layers'):
+        build_layers(layers_path, output_layers_path, manifest=manifest, jobs=jobs,
+                     cache=LayerCache() if use_cache else None, link_mode=link_mode)
+
+    with phase('dedupe'):
+        dedupe_report = dedupe_layers(output_layers_path, dedupe_config)
+    print_dedupe_report(dedupe_report)
+    if dedupe_report.duplicates and dedupe_config.policy != 'warn':
+        unresolved = [dup.name for dup in dedupe_report.duplicates if dup.name not in dedupe_report.hoisted]
+        if unresolved:
+            typer.echo(f'[!] Dependencias duplicadas entre layers ({dedupe_config.policy}): {", ".join(unresolved)}. '
+                       f'Usa policy = "hoist", alinea los requirements.txt o agrégalas a spa.build.dedupe.ignore.',
+                       color=typer.colors.RED)
+            manifest.save()
+            raise typer.Exit(code=1)
 
     typer.echo(f'Building lambdas from {lambdas_path}...')
-    build_lambdas(lambdas_path, build_path.joinpath('infra') / 'components' / 'lambdas')
+    with phase('lambdas'):
+        build_lambdas(lambdas_path, build_path.joinpath('infra') / 'components' / 'lambdas', manifest=manifest,
+                      link_mode=link_mode)
+
+    typer.echo('Limpiando artefactos de layers y lambdas...' if slim_config.enabled
+               else 'Midiendo artefactos de layers y lambdas ([spa.build.slim] enabled = false)...')
+    with phase('slim'):
+        slim_reports = slim_artifacts(output_layers_path, build_path.joinpath('infra') / 'components' / 'lambdas',
+                                      slim_config, bytecode_config)
+    if bytecode_config.enabled:
+        with phase('bytecode'):
+            compile_build_artifacts(
+                artifact_targets(output_layers_path, build_path.joinpath('infra') / 'components' / 'lambdas'),
+                bytecode_config, jobs,
+            )
+            refresh_sizes(slim_reports, 'bytecode')
+    record_pruned(slim_reports, manifest)
+    print_slim_report(slim_reports)
+    print_runtime_notice(slim_reports)
+    over_budget = check_budgets(slim_reports, slim_config)
+    if over_budget:
+        for violation in over_budget:
+            typer.echo(f'[!] Presupuesto de tamaño excedido: {violation}', color=typer.colors.RED)
+        manifest.save()
+        raise typer.Exit(code=1)
+
+    if package:
+        with phase('zips'):
+            package_build_artifacts(build_path, output_layers_path,
+                                    build_path.joinpath('infra') / 'components' / 'lambdas', jobs)
 
     typer.echo('Building lambda stack...')
-    build_lambda_stack(
-        build_lambdas_path=build_path.joinpath('infra') / "components" / "lambdas",
-        environment=os.getenv("ENVIRONMENT") or "dev",
-        app_name=os.getenv("APP_NAME") or cast(str, project_config.project.definition.name)
-    )
+    with phase('stack de lambdas'):
+        build_lambda_stack(
+            build_lambdas_path=build_path.joinpath('infra') / "components" / "lambdas",
+            environment=project_config.environment,
+            app_name=cast(str, project_config.deploy.app_name),
+            manifest=manifest,
+            source_init=Path(os.getcwd()).joinpath('infra') / "components" / "lambdas" / "__init__.py",
+            overrides=project_config.lambdas,
+        )
 
     typer.echo('Building API definition...')
-    build_api(
-        api_path=Path(project_config.project.definition.base_api),
-        lambdas_path=build_path.joinpath('infra') / "components" / "lambdas",
-        output_file=build_path.joinpath('infra') / "components" / "openapi.json",
-        build_mode=build_mode,
-    )
+    with phase('api'):
+        endpoint_index = EndpointIndex.build(lambdas_path)
+        build_api(
+            api_path=Path(project_config.project.definition.base_api),
+            lambdas_path=build_path.joinpath('infra') / "components" / "lambdas",
+            output_file=build_path.joinpath('infra') / "components" / "openapi.json",
+            build_mode=build_mode,
+            manifest=manifest,
+            index=endpoint_index,
+            config=project_config,
+        )
 
     if build_mode == 'container':
         typer.echo('Preparando runtime para container...')
-        bake_container_runtime(
-            project_root=Path(os.getcwd()),
-            build_path=build_path,
-            project_config=project_config,
-        )
-        copy_container_artifacts(
-            project_root=Path(os.getcwd()),
-            build_path=build_path,
-        )
-
+        with phase('container: runtime'):
+            bake_container_runtime(
+                project_root=Path(os.getcwd()),
+                build_path=build_path,
+                project_config=project_config,
+                manifest=manifest,
+                link_mode=link_mode,
+                index=endpoint_index,
+            )
+        with phase('container: Dockerfile y entrypoint'):
+            copy_container_artifacts(
+                project_root=Path(os.getcwd()),
+                build_path=build_path,
+                keep_bytecode=bytecode_config.enabled,
+            )
+        if bytecode_config.enabled:
+            with phase('container: bytecode'):
+                compile_build_artifacts([(build_path / 'src', CONTAINER_RUNTIME_DIR + '/src')], bytecode_config, jobs)
+
+    manifest.save()
     typer.echo(f'Build completed (mode={build_mode}).')
 
 
+def compile_build_artifacts(targets, bytecode_config: Bytecode, jobs: int = None):
+    mode = 'solo .pyc' if bytecode_config.drop_sources else 'fuentes + __pycache__'
+    typer.echo(f'Compilando bytecode (optimize={bytecode_config.optimize}, unchecked-hash, {mode})...')
+    report = compile_artifacts(targets, bytecode_config, jobs)
+    record_io(files=report.compiled + report.dropped)
+    typer.echo(f'{report.compiled} módulos compilados' + (f', {report.dropped} fuentes eliminadas' if report.dropped else '')
+               + (f', {report.up_to_date} sin cambios' if report.up_to_date else ''))
+    for source, error in report.failed:
+        typer.echo(f'[!] No se pudo compilar {source}: {error} (se conserva el .py)', color=typer.colors.YELLOW)
+
+
+def package_build_artifacts(build_path: Path, layers_path: Path, lambdas_path: Path, jobs: int = None):
+    typer.echo('Empaquetando lambdas y layers en build/artifacts/...')
+    artifacts = package_artifacts(build_path, layers_path, lambdas_path, jobs)
+    for artifact in artifacts:
+        if artifact.changed:
+            typer.echo(f'  {artifact.kind} {artifact.name}: {artifact.path} ({format_size(artifact.size)}, '
+                       f'sha256 {artifact.sha256[:12]})')
+    unchanged = sum(1 for artifact in artifacts if not artifact.changed)
+    typer.echo(f'{len(artifacts)} zips, {unchanged} sin cambios; manifest en build/{ARTIFACTS_MANIFEST}')
+
+
 @app.command('docker-init')
 def docker_init(
     force: bool = typer.Option(False, '--force', help='Sobreescribe los archivos si ya existen.')
@@ -252,8 +448,8 @@ def docker_init(
     """Genera Dockerfile, docker-compose.yml, entrypoint.sh y .dockerignore base en la raíz del proyecto."""
     try:
         project_config = load_config()
-    except:
-        typer.echo('No se puedo leer la configuracion del proyecto', color=typer.colors.RED)
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
         raise typer.Abort()
 
     generate_docker_files(
@@ -262,3 +458,134 @@ def docker_init(
         force=force,
     )
     typer.echo('Listo. Revisa los archivos generados antes de hacer build con --build-mode container.')
+
+
+@app.command('bench')
+def bench_project(
+    url: str = typer.Option(None, '--url', help='Servidor ya levantado (run-api, docker run, ...). Default: la app en proceso.'),
+    entrypoint: bool = typer.Option(False, '--entrypoint', help='Arranca build/entrypoint.sh (gunicorn del container) y lo mide.'),
+    port: int = typer.Option(8765, '--port', help='Puerto para --entrypoint.'),
+    router: str = typer.Option('fastapi', '--router', help='Router de la app en proceso: fastapi o asgi.', case_sensitive=False),
+    prefix: str = typer.Option(None, '--prefix', help='Prefijo de las rutas (default: /<ENVIRONMENT>).'),
+    requests: int = typer.Option(200, '--requests', '-n', min=1, help='Requests por ruta.'),
+    concurrency: int = typer.Option(10, '--concurrency', '-c', min=1, help='Requests en vuelo por ruta.'),
+    warmup: int = typer.Option(5, '--warmup', min=0, help='Requests de calentamiento por ruta (no se miden).'),
+    routes_filter: List[str] = typer.Option(None, '--route', help='Solo rutas que contengan el texto ("GET /items") o de ese lambda. Repetible.'),
+    payloads_path: Path = typer.Option(None, '--payloads', exists=True, dir_okay=False,
+                                       help='JSON {"METHOD /path": {body, headers, query, path_params}, "*": {...}}.'),
+    save: str = typer.Option('latest', '--save', help='Nombre del baseline a guardar en .spa/bench/<nombre>.json.'),
+    compare_to: str = typer.Option(None, '--compare', help='Baseline (nombre en .spa/bench o ruta .json) contra el cual comparar.'),
+    threshold: float = typer.Option(10.0, '--threshold', min=0, help='% de empeoramiento en p50/p95/p99/rps que cuenta como regresión.'),
+    as_json: bool = typer.Option(False, '--json', help='Imprime el reporte en JSON.'),
+    lambda_lifecycle: bool = typer.Option(False, '--lambda-lifecycle',
+                                          help='Emula instancias de Lambda y reporta cold/warm starts y espera por concurrencia.'),
+):
+    """
+    Genera carga sobre cada ruta de los endpoint.yaml y reporta throughput y latencias p50/p95/p99.
+    """
+    import asyncio
+    import sys
+    from contextlib import redirect_stdout
+    from ..utils.bench import (
+        bench_report, compare, discover_routes, load_baseline, load_local_app, run_bench,
+        save_baseline, start_entrypoint, stop_entrypoint,
+    )
+
+    try:
+        project_config = load_config()
+    except ConfigError as e:
+        typer.echo(f'No se puedo leer la configuracion del proyecto: {e}', color=typer.colors.RED)
+        raise typer.Abort()
+    if url and entrypoint:
+        typer.echo('Usa --url o --entrypoint, no ambos.', color=typer.colors.RED)
+        raise typer.Abort()
+    if lambda_lifecycle:
+        if url:
+            typer.echo('--lambda-lifecycle no aplica a --url: arranca ese servidor con SPA_LAMBDA_LIFECYCLE=1.',
+                       color=typer.colors.YELLOW)
+        # En proceso el resumen se imprime (o va en el JSON) al terminar; con --entrypoint cada worker lo imprime al salir
+        os.environ['SPA_LAMBDA_LIFECYCLE'] = '1'
+        if not entrypoint:
+            os.environ['SPA_LAMBDA_REPORT'] = '0'
+    router = router.lower()
+    if router not in ('fastapi', 'asgi'):
+        typer.echo(f"router invalido: '{router}'. Usa 'fastapi' o 'asgi'.", color=typer.colors.RED)
+        raise typer.Abort()
+
+    baseline = None
+    if compare_to:
+        try:
+            baseline = load_baseline(compare_to)
+        except (OSError, ValueError) as e:
+            typer.echo(f'No se pudo leer el baseline {compare_to}: {e}', color=typer.colors.RED)
+            raise typer.Exit(code=1)
+
+    lambdas_path = Path(os.getcwd()) / project_config.project.folders.lambdas
+    payloads = json.loads(payloads_path.read_text(encoding='utf-8')) if payloads_path else None
+    routes = discover_routes(EndpointIndex.build(lambdas_path), payloads, routes_filter or None)
+    if not routes:
+        typer.echo('No hay rutas que medir.', color=typer.colors.YELLOW)
+        raise typer.Exit()
+
+    app_instance, server = None, None
+    default_prefix = f"/{project_config.environment.lower()}"
+    if entrypoint:
+        build_path = Path(os.getcwd()) / 'build'
+        if not (build_path / 'entrypoint.sh').exists():
+            typer.echo('No existe build/entrypoint.sh: ejecuta `spa project build --build-mode container`.',
+                       color=typer.colors.RED)
+            raise typer.Exit(code=1)
+        try:
+            server = start_entrypoint(build_path, port)
+        except RuntimeError as e:
+            typer.echo(str(e), color=typer.colors.RED)
+            raise typer.Exit(code=1)
+        url, target = f'http://127.0.0.1:{port}', 'entrypoint'
+    elif url:
+        target = url
+    else:
+        # Con --json stdout queda reservado para el reporte
+        with redirect_stdout(sys.stderr if as_json else sys.stdout):
+            base_path = prepare_local_api(project_config, target=router)
+        app_instance, default_prefix = load_local_app(base_path, Path(os.getcwd()) / project_config.project.folders.layers)
+        target = f'asgi:{router}'
+
+    def on_route(route, result):
+        if not as_json:
+            typer.echo(f"{route.key:<40} {result['rps']:>9.1f} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                       f"{result['p99_ms']:>9.2f} {result['errors']:>7}")
+
+    if not as_json:
+        typer.echo(f'Midiendo {len(routes)} ruta(s) contra {target}: {requests} requests, concurrencia {concurrency}')
+        typer.echo(f"{'ruta':<40} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>7}")
+    try:
+        results = asyncio.run(run_bench(
+            routes, app=app_instance, url=url, prefix=prefix if prefix is not None else default_prefix,
+            requests=requests, concurrency=concurrency, warmup=warmup, on_route=on_route,
+        ))
+    finally:
+        if server is not None:
+            stop_entrypoint(server)
+
+    report = bench_report(results, target, requests, concurrency)
+    lifecycle = sys.modules.get('src.api_local.lambda_lifecycle') if app_instance is not None else None
+    if lifecycle is not None and lifecycle.ENABLED:
+        report['lambdas'] = lifecycle.stats()
+        if not as_json:
+            lifecycle.print_report(sys.stdout)
+    saved = save_baseline(report, save) if save else None
+    regressions = compare(baseline, report, threshold) if baseline is not None else []
+
+    if as_json:
+        typer.echo(json.dumps({**report, 'regressions': [
+            {'route': r, 'metric': m, 'baseline': b, 'current': c, 'change_pct': pct} for r, m, b, c, pct in regressions
+        ]}, indent=2))
+    else:
+        if saved:
+            typer.echo(f'Baseline guardado en {saved}')
+        if baseline is not None and not regressions:
+            typer.echo(f'Sin regresiones mayores a {threshold:g}% contra {compare_to}.', color=typer.colors.GREEN)
+        for route_key, metric, before, after, change in regressions:
+            typer.echo(f'[regresión] {route_key} {metric}: {before} → {after} ({change:+.1f}%)', color=typer.colors.RED)
+    if regressions:
+        raise typer.Exit(code=1)
@@ -0,0 +1,555 @@
+"""Runtime compartido por los routers generados en `src/api_local/router.py`.
+
+`build_local_api` copia este archivo a `src/api_local/api_runtime.py`. Contiene lo que
+ambos targets de router necesitan (pool de handlers, invocación con el contexto de cada
+función de `lambda_lifecycle.py`, construcción del evento API Gateway v2) y el router ASGI mínimo (`AsgiRouter`) del target `asgi`.
+
+NO EDITAR la copia en `src/api_local`: se regenera con cada `run-api`/`build`.
+"""
+import asyncio
+import base64
+import inspect
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import mimetypes
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from src.api_local.lambda_lifecycle import LambdaContext, function_settings, get_pool
+from src.api_local.metrics import start_request
+
+# Los handlers síncronos corren en un pool acotado para no bloquear el event loop.
+# Tamaño configurable con SPA_HANDLER_THREADS (default: mismo criterio que ThreadPoolExecutor).
+HANDLER_THREADS = int(os.getenv("SPA_HANDLER_THREADS") or min(32, (os.cpu_count() or 1) + 4))
+_handler_pool = ThreadPoolExecutor(max_workers=HANDLER_THREADS, thread_name_prefix="lambda-handler")
+
+
+# Tamaño máximo del body de un request (default: 10 MiB, el límite de API Gateway)
+MAX_BODY_BYTES = int(os.getenv("SPA_MAX_BODY_BYTES") or 10 * 1024 * 1024)
+STREAM_CHUNK_BYTES = 64 * 1024
+STREAM_THRESHOLD_BYTES = 1024 * 1024
+# Llaves de respuesta para enviar un archivo o un generador en lugar de `body`
+FILE_KEY = "spa:file"
+STREAM_KEY = "spa:stream"
+
+# Los lambdas pueden consultar esta variable para regresar {"spa:file": ...} o {"spa:stream": ...}
+# en container/run-api y un body base64 normal en Lambda real, donde no existe.
+os.environ.setdefault("SPA_STREAMING_RESPONSES", "1")
+
+
+async def invoke_handler(handler: Callable, event: Dict[str, Any], context: Any) -> Any:
+    if inspect.iscoroutinefunction(handler):
+        return await handler(event, context)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_handler_pool, handler, event, context)
+
+
+async def invoke_lambda(name: str, handler: Callable, event: Dict[str, Any]) -> Any:
+    """Invoca el lambda `name` con su contexto; con `SPA_LAMBDA_LIFECYCLE=1` en una instancia de su pool."""
+    request_id = event["requestContext"]["requestId"]
+    pool = get_pool(name)
+    if pool is not None:
+        return await pool.invoke(event, request_id, invoke_handler)
+    return await invoke_handler(handler, event, LambdaContext(function_settings(name), request_id))
+
+
+def _client_cert() -> Dict[str, Any]:
+    # Literales nuevos por request (sin deepcopy): un handler que los modifica no afecta a otros
+    return {
+        "clientCertPem": "CERT_CONTENT",
+        "subjectDN": "www.example.com",
+        "issuerDN": "Example issuer",
+        "serialNumber": "a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1",
+        "validity": {
+            "notBefore": "May 28 12:30:02 2019 GMT",
+            "notAfter": "Aug  5 09:36:04 2021 GMT",
+        },
+    }
+
+
+def _authorizer() -> Dict[str, Any]:
+    return {
+        "jwt": {
+            "claims": {"claim1": "value1", "claim2": "value2"},
+            "scopes": ["scope1", "scope2"],
+        }
+    }
+
+
+# Parte fija del requestContext; se copia superficialmente por request
+_REQUEST_CONTEXT = {
+    "accountId": "123456789012",
+    "apiId": "api-id",
+    "domainName": "id.execute-api.us-east-1.amazonaws.com",
+    "domainPrefix": "id",
+    "routeKey": "$default",
+    "stage": "$default",
+}
+
+
+def _parse_query(raw_query: str) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """Separa los query params de un valor de los que se repiten, como el router FastAPI."""
+    grouped: Dict[str, List[str]] = {}
+    for key, value in parse_qsl(raw_query, keep_blank_values=True):
+        grouped.setdefault(key, []).append(value)
+    single = {key: values[0] for key, values in grouped.items() if len(values) == 1}
+    multi = {key: values for key, values in grouped.items() if len(values) > 1}
+    return single, multi
+
+
+def build_event(scope: Dict[str, Any], body: bytes, path_params: Dict[str, str]) -> Dict[str, Any]:
+    """Evento API Gateway HTTP (v2) construido directamente del scope ASGI."""
+    headers: Dict[str, str] = {}
+    for raw_name, raw_value in scope.get("headers", ()):
+        name = raw_name.decode("latin-1")
+        value = raw_value.decode("latin-1")
+        headers[name] = f"{headers[name]},{value}" if name in headers else value
+
+    raw_query = scope.get("query_string", b"").decode("latin-1")
+    query_params, multi_value_query_params = _parse_query(raw_query) if raw_query else ({}, {})
+
+    cookie_header = headers.get("cookie")
+    cookies = [c.strip() for c in cookie_header.split(";") if c.strip()] if cookie_header else []
+
+    body_str = None
+    is_base64_encoded = False
+    if body:
+        try:
+            body_str = body.decode("utf-8")
+        except UnicodeDecodeError:
+            body_str = base64.b64encode(body).decode("ascii")
+            is_base64_encoded = True
+
+    client = scope.get("client")
+    now = time.time()
+    request_context = dict(_REQUEST_CONTEXT)
+    request_context["authentication"] = {"clientCert": _client_cert()}
+    request_context["authorizer"] = _authorizer()
+    request_context["http"] = {
+        "method": scope["method"],
+        "path": scope["path"],
+        "protocol": f"HTTP/{scope.get('http_version', '1.1')}",
+        "sourceIp": client[0] if client else "127.0.0.1",
+        "userAgent": headers.get("user-agent", ""),
+    }
+    request_context["requestId"] = str(uuid.uuid4())
+    request_context["time"] = time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now))
+    request_context["timeEpoch"] = int(now * 1000)
+
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": scope["path"],
+        "rawQueryString": raw_query,
+        "cookies": cookies,
+        "headers": headers,
+        "queryStringParameters": query_params or None,
+        "multiValueQueryStringParameters": multi_value_query_params or None,
+        "requestContext": request_context,
+        "body": body_str,
+        "pathParameters": path_params,
+        "isBase64Encoded": is_base64_encoded,
+    }
+
+
+class _RouteNode:
+    __slots__ = ("children", "param", "target", "param_names")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_RouteNode"] = {}
+        self.param: Optional["_RouteNode"] = None
+        self.target: Any = None
+        self.param_names: Tuple[str, ...] = ()
+
+
+def _split_path(path: str) -> List[str]:
+    # "/items/" termina en un segmento vacío: la barra final cuenta, como en Starlette
+    stripped = path[1:] if path.startswith("/") else path
+    return stripped.split("/") if stripped else []
+
+
+def _is_param(segment: str) -> bool:
+    return segment.startswith("{") and segment.endswith("}")
+
+
+class RouteTable:
+    """Tabla de rutas precompilada: dict por método para paths estáticos y trie por
+    segmentos para paths con parámetros. Un lookup cuesta O(segmentos del path).
+
+    `/items` y `/items/` son rutas distintas; `AsgiRouter` redirige de una a otra."""
+
+    def __init__(self) -> None:
+        self.static: Dict[str, Dict[str, Any]] = {}
+        self.templated: Dict[str, _RouteNode] = {}
+
+    def add(self, method: str, path: str, target: Any) -> None:
+        segments = _split_path(path)
+        if not any(_is_param(seg) for seg in segments):
+            self.static.setdefault(method, {}).setdefault("/" + "/".join(segments), target)
+            return
+        node = self.templated.setdefault(method, _RouteNode())
+        for seg in segments:
+            if _is_param(seg):
+                node.param = node.param or _RouteNode()
+                node = node.param
+            else:
+                node = node.children.setdefault(seg, _RouteNode())
+        if node.target is None:
+            node.target = target
+            node.param_names = tuple(seg[1:-1] for seg in segments if _is_param(seg))
+
+    def match(self, method: str, path: str) -> Optional[Tuple[Any, Dict[str, str]]]:
+        segments = _split_path(path)
+        static = self.static.get(method)
+        if static:
+            target = static.get("/" + "/".join(segments))
+            if target is not None:
+                return target, {}
+        root = self.templated.get(method)
+        if root is None:
+            return None
+        values: List[str] = []
+        node = self._match_node(root, segments, 0, values)
+        if node is None:
+            return None
+        return node.target, dict(zip(node.param_names, values))
+
+    def _match_node(self, node: _RouteNode, segments: List[str], pos: int,
+                    values: List[str]) -> Optional[_RouteNode]:
+        if pos == len(segments):
+            return node if node.target is not None else None
+        child = node.children.get(segments[pos])
+        if child is not None:
+            found = self._match_node(child, segments, pos + 1, values)
+            if found is not None:
+                return found
+        if node.param is not None and segments[pos]:
+            values.append(segments[pos])
+            found = self._match_node(node.param, segments, pos + 1, values)
+            if found is not None:
+                return found
+            values.pop()
+        return None
+
+    def allowed_methods(self, path: str) -> List[str]:
+        methods = set(self.static) | set(self.templated)
+        return sorted(m for m in methods if self.match(m, path) is not None)
+
+
+class BodyTooLarge(Exception):
+    """El body del request excede `SPA_MAX_BODY_BYTES`."""
+
+
+def _declared_length(content_length: Optional[str], limit: int) -> None:
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise BodyTooLarge(int(content_length))
+
+
+async def read_body(receive: Callable, content_length: Optional[str] = None,
+                    limit: Optional[int] = None) -> bytes:
+    """Lee el body completo del scope ASGI; `BodyTooLarge` si pasa de `limit` bytes."""
+    limit = MAX_BODY_BYTES if limit is None else limit
+    _declared_length(content_length, limit)
+    chunks: List[bytes] = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge(size)
+        chunks.append(chunk)
+        more_body = message.get("more_body", False)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+async def read_request_body(request: Any, limit: Optional[int] = None) -> bytes:
+    """Equivalente de `read_body` para un `Request` de Starlette/FastAPI."""
+    limit = MAX_BODY_BYTES if limit is None else limit
+    _declared_length(request.headers.get("content-length"), limit)
+    chunks: List[bytes] = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge(size)
+        chunks.append(chunk)
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def iter_base64(body: str, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    """Decodifica `body` (base64 sin saltos de línea) por bloques de ~`chunk_size` bytes."""
+    step = max(4, chunk_size // 3 * 4)
+    for start in range(0, len(body), step):
+        yield base64.b64decode(body[start:start + step])
+
+
+def _iter_file(path: str, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def aiter_chunks(source: Any) -> AsyncIterator[bytes]:
+    """Itera bytes de un iterable síncrono (en el pool de handlers) o asíncrono."""
+    if hasattr(source, "__aiter__"):
+        async for chunk in source:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+        return
+    iterator = iter(source)
+    loop = asyncio.get_running_loop()
+    done = object()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(_handler_pool, next, iterator, done)
+            if chunk is done:
+                return
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+def _stream_field(res: Dict[str, Any], key: str) -> Any:
+    # Solo en respuestas proxy: `{"file": "x.csv", "rows": 3}` son datos y API Gateway los serializa
+    return res.get(key) if "statusCode" in res else None
+
+
+def stream_source(res: Any) -> Optional[Tuple[Any, Optional[int], str]]:
+    """Si la respuesta debe enviarse por bloques regresa `(fuente, content_length, content_type_default)`.
+
+    - `{"statusCode": 200, "spa:file": "/tmp/x.csv"}`: se envía el archivo por bloques
+      (convención de container).
+    - `{"statusCode": 200, "spa:stream": generador}`: iterable (sync o async) de bytes/str
+      (convención de container).
+    - `isBase64Encoded` con body de más de `STREAM_THRESHOLD_BYTES`: se decodifica por bloques
+      en lugar de crear una copia completa en memoria.
+    """
+    if not isinstance(res, dict):
+        return None
+    if _stream_field(res, FILE_KEY) is not None:
+        path = os.fspath(res[FILE_KEY])
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return _iter_file(path), os.path.getsize(path), content_type
+    if _stream_field(res, STREAM_KEY) is not None:
+        return res[STREAM_KEY], None, "application/octet-stream"
+    body = res.get("body")
+    if res.get("isBase64Encoded") and isinstance(body, str) and len(body) > STREAM_THRESHOLD_BYTES \
+            and "\n" not in body and len(body) % 4 == 0:
+        length = len(body) // 4 * 3 - body[-2:].count("=")
+        return iter_base64(body), length, "application/octet-stream"
+    return None
+
+
+def _encode_headers(res: Dict[str, Any], default_type: str) -> Tuple[int, List[Tuple[bytes, bytes]]]:
+    raw_headers: List[Tuple[bytes, bytes]] = []
+    seen = set()
+    for name, value in (res.get("headers") or {}).items():
+        lower = name.lower()
+        seen.add(lower)
+        raw_headers.append((lower.encode("latin-1"), str(value).encode("latin-1")))
+    for name, values in (res.get("multiValueHeaders") or {}).items():
+        lower = name.lower()
+        seen.add(lower)
+        raw_headers.extend((lower.encode("latin-1"), str(value).encode("latin-1")) for value in values)
+    for cookie in res.get("cookies") or ():
+        raw_headers.append((b"set-cookie", str(cookie).encode("latin-1")))
+    if "content-type" not in seen:
+        raw_headers.append((b"content-type", default_type.encode("latin-1")))
+    raw_headers = [h for h in raw_headers if h[0] != b"content-length"]
+    return int(res.get("statusCode", 200)), raw_headers
+
+
+def response_status(res: Any) -> int:
+    """Status HTTP de la respuesta de un lambda (200 si no es formato proxy)."""
+    if isinstance(res, dict) and "statusCode" in res:
+        try:
+            return int(res["statusCode"])
+        except (TypeError, ValueError):
+            return 500
+    return 200
+
+
+def _encode_body(res: Any) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Convierte la respuesta de un lambda (formato proxy de API Gateway) a status, headers y body."""
+    if not isinstance(res, dict) or ("statusCode" not in res and "body" not in res):
+        return 200, [(b"content-type", b"application/json")], json.dumps(res).encode("utf-8")
+
+    body = res.get("body")
+    if body is None:
+        payload = b""
+    elif res.get("isBase64Encoded"):
+        payload = base64.b64decode(body)
+    elif isinstance(body, bytes):
+        payload = body
+    elif isinstance(body, str):
+        payload = body.encode("utf-8")
+    else:
+        payload = json.dumps(body).encode("utf-8")
+
+    status, raw_headers = _encode_headers(res, "application/json")
+    return status, raw_headers, payload
+
+
+async def send_lambda_response(send: Callable, res: Any, head: bool = False) -> None:
+    streamed = stream_source(res)
+    if streamed is None:
+        status, raw_headers, payload = _encode_body(res)
+        raw_headers.append((b"content-length", str(len(payload)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": b"" if head else payload})
+        return
+
+    source, length, default_type = streamed
+    status, raw_headers = _encode_headers(res, default_type)
+    if length is not None:
+        raw_headers.append((b"content-length", str(length).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    if not head:
+        async for chunk in aiter_chunks(source):
+            if chunk:
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def streaming_response(res: Any) -> Any:
+    """`StreamingResponse`/`FileResponse` para el router FastAPI, o None si no aplica."""
+    streamed = stream_source(res)
+    if streamed is None:
+        return None
+    from starlette.responses import FileResponse, StreamingResponse
+
+    source, length, default_type = streamed
+    status, raw_headers = _encode_headers(res, default_type)
+    if _stream_field(res, FILE_KEY) is not None:
+        # FileResponse agrega content-length, etag y soporte de Range al enviarse
+        response = FileResponse(os.fspath(res[FILE_KEY]), status_code=status)
+    else:
+        response = StreamingResponse(aiter_chunks(source), status_code=status)
+        if length is not None:
+            raw_headers.append((b"content-length", str(length).encode("latin-1")))
+    # En sitio: `response.headers` ya envuelve esta misma lista
+    response.raw_headers[:] = raw_headers + [h for h in response.raw_headers if h[0] == b"accept-ranges"]
+    return response
+
+
+async def _send_json(send: Callable, status: int, content: Dict[str, Any],
+                     extra_headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+    payload = json.dumps(content).encode("utf-8")
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode("latin-1"))]
+    await send({"type": "http.response.start", "status": status, "headers": headers + (extra_headers or [])})
+    await send({"type": "http.response.body", "body": payload})
+
+
+def _toggle_slash(path: str) -> Optional[str]:
+    """`/items/` ↔ `/items`; `None` para la raíz."""
+    if path in ("", "/"):
+        return None
+    return path[:-1] if path.endswith("/") else path + "/"
+
+
+def _header(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    for raw_name, raw_value in scope.get("headers", ()):
+        if raw_name == name:
+            return raw_value.decode("latin-1")
+    return None
+
+
+class AsgiRouter:
+    """App ASGI mínima que despacha directamente a los `lambda_handler`.
+
+    Sin parsing de FastAPI/Starlette por request: la ruta se resuelve con `RouteTable`
+    y el evento se arma del scope ASGI. `handlers` es `{nombre_lambda: lambda_handler}`
+    y se consulta en cada request, así que reemplazar una entrada cambia el handler.
+    """
+
+    def __init__(self, handlers: Dict[str, Callable]):
+        self.handlers = handlers
+        self.routes = RouteTable()
+        self.route_list: List[Tuple[str, str, str]] = []
+
+    def add_route(self, method: str, path: str, name: str) -> None:
+        self.route_list.append((method.upper(), path, name))
+        self.routes.add(method.upper(), path, (name, path))
+
+    def replace_routes(self, name: str, routes: List[Tuple[str, str]]) -> None:
+        """Reemplaza las rutas del lambda `name` por `[(method, path)]` (hot reload)."""
+        route_list = [route for route in self.route_list if route[2] != name]
+        route_list.extend((method.upper(), path, name) for method, path in routes)
+        table = RouteTable()
+        for method, path, target in route_list:
+            table.add(method, path, (target, path))
+        self.route_list, self.routes = route_list, table
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        # Montado con `app.mount("/{env}", router)`: se rutea sobre el path sin el prefijo
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        # Sin fallback de HEAD a GET: como el router FastAPI, HEAD solo existe si el
+        # endpoint.yaml lo declara (y así auth_bridge también lo protege)
+        method = scope["method"]
+        match = self.routes.match(method, path)
+        if match is None:
+            allowed = self.routes.allowed_methods(path)
+            redirect = _toggle_slash(path)
+            if not allowed and redirect is not None and self.routes.allowed_methods(redirect):
+                # Igual que `redirect_slashes` de Starlette: 307 a la ruta con/sin barra final
+                location = _toggle_slash(scope["path"]) or redirect
+                host = _header(scope, b"host")
+                if host:
+                    location = f"{scope.get('scheme', 'http')}://{host}{location}"
+                query = scope.get("query_string", b"")
+                if query:
+                    location += "?" + query.decode("latin-1")
+                await send({"type": "http.response.start", "status": 307,
+                            "headers": [(b"location", location.encode("latin-1")), (b"content-length", b"0")]})
+                await send({"type": "http.response.body", "body": b""})
+            elif allowed:
+                await _send_json(send, 405, {"detail": "Method Not Allowed"},
+                                 [(b"allow", ", ".join(allowed).encode("latin-1"))])
+            else:
+                await _send_json(send, 404, {"detail": "Not Found"})
+            return
+
+        (name, route), path_params = match
+        timer = start_request(route, method, scope)
+        try:
+            body = await read_body(receive, _header(scope, b"content-length"))
+        except BodyTooLarge:
+            await _send_json(send, 413, {"detail": "Request body too large"})
+            timer.finish(413)
+            return
+        event = build_event(scope, body, path_params)
+        timer.mark("event")
+        try:
+            res = await invoke_lambda(name, self.handlers[name], event)
+        except Exception:
+            timer.finish(500, error=True)
+            raise
+        timer.mark("handler")
+        await send_lambda_response(send, res, head=method == "HEAD")
+        timer.finish(response_status(res))
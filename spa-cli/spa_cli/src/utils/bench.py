@@ -0,0 +1,269 @@
+"""Generador de carga para la API local (`spa project bench`).
+
+Descubre las rutas de `src/lambdas/*/endpoint.yaml` y las ejecuta una por una con
+`concurrency` requests en vuelo, ya sea contra la app de `main_server.py` dentro del
+mismo proceso (`httpx.ASGITransport`, sin red) o contra un servidor HTTP (`--url`,
+p. ej. el entrypoint del container). Reporta throughput y latencias p50/p95/p99 por
+ruta; los resultados se guardan como baselines JSON en `.spa/bench/` y se pueden
+comparar contra una corrida anterior para detectar regresiones.
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .endpoint_index import EndpointIndex
+
+BENCH_DIR = Path('.spa') / 'bench'
+BODY_METHODS = ('POST', 'PUT', 'PATCH')
+SUPPORTED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD')
+PATH_PARAM = re.compile(r'\{([^}/]+)\}')
+# Métricas comparadas con `--compare`: (clave, True si un valor mayor es peor)
+COMPARED_METRICS = (('p50_ms', True), ('p95_ms', True), ('p99_ms', True), ('rps', False))
+
+
+@dataclass
+class BenchRoute:
+    name: str
+    method: str
+    path: str
+    body: Any = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    query: Dict[str, str] = field(default_factory=dict)
+    path_params: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f'{self.method} {self.path}'
+
+    def url(self, prefix: str) -> str:
+        path = PATH_PARAM.sub(lambda m: str(self.path_params.get(m.group(1), '1')), self.path)
+        return prefix + path
+
+
+def _example_body(operation: Dict[str, Any]) -> Any:
+    """Primer `example` del requestBody JSON de la operación, o `{}`."""
+    content = ((operation or {}).get('requestBody') or {}).get('content') or {}
+    media = content.get('application/json') or next(iter(content.values()), {})
+    if not isinstance(media, dict):
+        return {}
+    if 'example' in media:
+        return media['example']
+    examples = media.get('examples') or {}
+    for example in examples.values():
+        if isinstance(example, dict) and 'value' in example:
+            return example['value']
+    return (media.get('schema') or {}).get('example', {})
+
+
+def discover_routes(index: EndpointIndex, payloads: Optional[Dict[str, Any]] = None,
+                    only: Optional[List[str]] = None) -> List[BenchRoute]:
+    """Rutas del índice con payloads sintéticos, sobreescritos por `payloads["METHOD /path"]`.
+
+    Cada entrada de `payloads` puede tener `body`, `headers`, `query` y `path_params`;
+    `payloads["*"]` aplica a todas las rutas (p. ej. un header `Authorization`).
+    """
+    payloads = payloads or {}
+    defaults = payloads.get('*', {})
+    routes = []
+    for entry in index.entries:
+        for path, methods in entry.definition.items():
+            if not isinstance(methods, dict):
+                continue
+            for method, operation in methods.items():
+                method = method.upper()
+                if method not in SUPPORTED_METHODS:
+                    continue
+                route = BenchRoute(entry.name, method, path)
+                if method in BODY_METHODS:
+                    route.body = _example_body(operation if isinstance(operation, dict) else {})
+                custom = payloads.get(route.key, {})
+                route.body = custom.get('body', route.body)
+                route.headers = {**defaults.get('headers', {}), **custom.get('headers', {})}
+                route.query = {**defaults.get('query', {}), **custom.get('query', {})}
+                route.path_params = {**defaults.get('path_params', {}), **custom.get('path_params', {})}
+                if only and not any(pattern in route.key or pattern == entry.name for pattern in only):
+                    continue
+                routes.append(route)
+    return routes
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    count = len(values) + errors
+    return {
+        'requests': count,
+        'errors': errors + sum(n for status, n in statuses.items() if status.startswith('5')),
+        'status': dict(sorted(statuses.items())),
+        'rps': round(count / elapsed, 1) if elapsed > 0 else 0.0,
+        'mean_ms': round(sum(values) / len(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'p99_ms': round(percentile(values, 99), 3),
+        'max_ms': round(values[-1], 3) if values else 0.0,
+    }
+
+
+async def _bench_route(client: Any, route: BenchRoute, prefix: str, requests: int,
+                       concurrency: int, warmup: int) -> Dict[str, Any]:
+    url = route.url(prefix)
+    kwargs: Dict[str, Any] = {'headers': route.headers, 'params': route.query}
+    if route.body is not None:
+        if isinstance(route.body, (str, bytes)):
+            kwargs['content'] = route.body
+        else:
+            kwargs['json'] = route.body
+
+    for _ in range(warmup):
+        try:
+            await client.request(route.method, url, **kwargs)
+        except Exception:
+            pass
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(route.method, url, **kwargs)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return summarize(latencies, statuses, errors, time.perf_counter() - started)
+
+
+async def run_bench(routes: List[BenchRoute], app: Any = None, url: Optional[str] = None, prefix: str = '',
+                    requests: int = 200, concurrency: int = 10, warmup: int = 5,
+                    timeout: float = 30.0, on_route=None) -> Dict[str, Dict[str, Any]]:
+    """Ejecuta cada ruta en secuencia (`concurrency` requests en vuelo) contra `app` o `url`."""
+    import httpx
+
+    if app is not None:
+        transport = httpx.ASGITransport(app=app)
+        base_url = 'http://bench.local'
+    else:
+        transport = None
+        base_url = url.rstrip('/')
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results: Dict[str, Dict[str, Any]] = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=timeout, limits=limits) as client:
+        for route in routes:
+            results[route.key] = await _bench_route(client, route, prefix, requests, concurrency, warmup)
+            if on_route is not None:
+                on_route(route, results[route.key])
+    return results
+
+
+def load_local_app(base_path: Path, layers_path: Path) -> Tuple[Any, str]:
+    """Importa `src/api_local/main_server.py` en este proceso; regresa `(app, prefijo de rutas)`."""
+    paths = [str(base_path)] + [str(p) for p in sorted(layers_path.glob('*/python')) if p.is_dir()]
+    sys.path[:0] = [p for p in paths if p not in sys.path]
+    from importlib import import_module
+
+    main_server = import_module('src.api_local.main_server')
+    return main_server.app, f"/{main_server.env.lower() or 'v1'}"
+
+
+def start_entrypoint(build_path: Path, port: int, startup_timeout: float = 60.0) -> subprocess.Popen:
+    """Arranca `build/entrypoint.sh` (gunicorn como en el container) y espera a que responda."""
+    import httpx
+
+    env = os.environ.copy()
+    env['PORT'] = str(port)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in [str(build_path), env.get('PYTHONPATH')] if p)
+    proc = subprocess.Popen(['sh', 'entrypoint.sh'], cwd=build_path, env=env, start_new_session=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'entrypoint.sh terminó con código {proc.returncode}:\n'
+                               + proc.stderr.read().decode(errors='replace')[-2000:])
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/', timeout=1.0)
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.2)
+    stop_entrypoint(proc)
+    raise RuntimeError(f'El servidor no respondió en {startup_timeout:g}s')
+
+
+def stop_entrypoint(proc: subprocess.Popen) -> None:
+    if proc.poll() is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=15)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        proc.kill()
+        proc.wait()
+
+
+def bench_report(results: Dict[str, Dict[str, Any]], target: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'target': target,
+        'requests': requests,
+        'concurrency': concurrency,
+        'routes': results,
+    }
+
+
+def baseline_path(name: str) -> Path:
+    return BENCH_DIR / f'{name}.json'
+
+
+def save_baseline(report: Dict[str, Any], name: str) -> Path:
+    path = baseline_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    return path
+
+
+def load_baseline(name: str) -> Dict[str, Any]:
+    path = Path(name) if name.endswith('.json') else baseline_path(name)
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, str, float, float, float]]:
+    """Regresiones `(ruta, métrica, antes, ahora, % de cambio)` que exceden `threshold` por ciento."""
+    regressions = []
+    for key, metrics in current['routes'].items():
+        previous = baseline.get('routes', {}).get(key)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS:
+            before, after = previous.get(metric), metrics.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append((key, metric, before, after, round(change, 1)))
+    return regressions
@@ -1,137 +1,296 @@
-import os
+import ast
 import json
+import re
+import textwrap
 import tqdm
-import yaml
 import typer
 from pathlib import Path
-from typing import List
-from shutil import copytree, copy2
-from typing import cast
+from typing import Any, Dict, List, Tuple
+from shutil import copy2, rmtree
+from typing import cast, Optional
 
-from ...globals import load_config, Config
+from ...globals import load_config, Config, Server
+from .build_manifest import BuildManifest, hash_files, hash_text, sync_tree
+from .build_profile import record_io
+from .link_mode import LinkMode, copy_tree, materialize, materialize_tree, place_file
+from .endpoint_index import EndpointIndex, load_yaml
 
 DOCKER_TEMPLATES_DIR = Path(__file__).resolve().parent.parent.parent / 'templates' / 'docker'
 DOCKER_ARTIFACTS = ('Dockerfile', 'docker-compose.yml', 'entrypoint.sh', '.dockerignore')
+BYTECODE_IGNORE_RULES = ('__pycache__/', '__pycache__', '*.pyc', '*.pyo', '**/__pycache__/', '**/*.pyc', '**/*.pyo')
 
-def get_lambda_dirs_with_endpoint(base_path: Path) -> List[str]:
-    result = []
-    if not os.path.exists(base_path):
-        raise FileNotFoundError(f"La ruta base no existe: {base_path}")
-
-    for entry in os.listdir(base_path):
-        dir_path = os.path.join(base_path, entry)
-        endpoint_file = os.path.join(dir_path, "endpoint.yaml")
-        if os.path.isdir(dir_path) and os.path.isfile(endpoint_file):
-            result.append(entry)
-
-    return result
+def get_lambda_dirs_with_endpoint(base_path: Path, index: Optional[EndpointIndex] = None) -> List[str]:
+    index = index or EndpointIndex.build(base_path)
+    return index.names
 
 def get_api_initial_definition(dir_name: Path):
-    with open(dir_name, 'r', encoding="utf-8") as f:
-        return yaml.safe_load(f)
+    return load_yaml(dir_name)
 
-def get_api_config(lambdas_path: Path):
-    endpoint_dirs = get_lambda_dirs_with_endpoint(lambdas_path)
+def get_api_config(lambdas_path: Path, index: Optional[EndpointIndex] = None):
+    index = index or EndpointIndex.build(lambdas_path)
     import_lambdas = []
     endpoint_list = []
-    for dir_name in endpoint_dirs:
+    for entry, definition in zip(index.entries, index.definitions()):
+        dir_name = entry.name
         import_lambdas.append(f"from src.lambdas.{dir_name}.lambda_function import lambda_handler as {dir_name}_handler")
-
-        with open(Path(lambdas_path / dir_name / "endpoint.yaml"), 'r', encoding="utf-8") as f:
-            endpoint_list.append({"definition": yaml.safe_load(f), "name": dir_name})
+        endpoint_list.append({"definition": definition, "name": dir_name})
 
     return import_lambdas, endpoint_list
 
-def build_api_config(lambdas_path: Path, environment: str = None, app_name: str = None, aws_account: str = None, aws_region: str = None):
-    endpoint_dirs = get_lambda_dirs_with_endpoint(lambdas_path)
+def build_api_config(lambdas_path: Path, environment: str = None, app_name: str = None, aws_account: str = None, aws_region: str = None,
+                     index: Optional[EndpointIndex] = None):
+    index = index or EndpointIndex.build(lambdas_path)
     endpoint_list = []
-    for dir_name in endpoint_dirs:
-
-        with open(Path(lambdas_path / dir_name / "endpoint.yaml"), 'r', encoding="utf-8") as f:
-            endpoint_node = cast(dict, yaml.safe_load(f))
-            for endpoint_name in endpoint_node.keys():
-                for method in endpoint_node[endpoint_name]:
-                    if 'x-amazon-apigateway-integration' in endpoint_node[endpoint_name][method]:
-                        integration = endpoint_node[endpoint_name][method]['x-amazon-apigateway-integration']
-                        if 'uri' in integration and environment is not None:
-                            integration['uri'] = f'arn:aws:apigateway:{aws_region}:lambda:path/2015-03-31/functions/arn:aws:lambda:{aws_region}:{aws_account}:function:{environment}-{app_name}-{dir_name}/invocations'
-                        if 'credentials' in integration and environment is not None:
-                            integration['credentials'] = f'arn:aws:iam::{aws_account}:role/{environment}-{app_name}-apigw-invoke-lambda-role'
-            endpoint_list.append(endpoint_node)
+    for entry, endpoint_node in zip(index.entries, index.definitions()):
+        dir_name = entry.name
+        endpoint_node = cast(dict, endpoint_node)
+        for endpoint_name in endpoint_node.keys():
+            for method in endpoint_node[endpoint_name]:
+                if 'x-amazon-apigateway-integration' in endpoint_node[endpoint_name][method]:
+                    integration = endpoint_node[endpoint_name][method]['x-amazon-apigateway-integration']
+                    if 'uri' in integration and environment is not None:
+                        integration['uri'] = f'arn:aws:apigateway:{aws_region}:lambda:path/2015-03-31/functions/arn:aws:lambda:{aws_region}:{aws_account}:function:{environment}-{app_name}-{dir_name}/invocations'
+                    if 'credentials' in integration and environment is not None:
+                        integration['credentials'] = f'arn:aws:iam::{aws_account}:role/{environment}-{app_name}-apigw-invoke-lambda-role'
+        endpoint_list.append(endpoint_node)
 
     return endpoint_list
 
-def build_lambdas(lambdas_path: Path, build_path: Path):
+def build_lambdas(lambdas_path: Path, build_path: Path, manifest: Optional[BuildManifest] = None,
+                  link_mode: LinkMode = LinkMode.COPY):
     """
     Copia toda la estructura de src/lambdas a infra/components/lambdas,
     manteniendo la jerarquía de carpetas.
+
+    Con `manifest` solo se copian los archivos que cambiaron y se eliminan
+    las lambdas cuya carpeta fuente ya no existe. `link_mode` permite armar el
+    build con hardlinks/reflinks/symlinks en lugar de copias.
     """
 
     # Crear destino si no existe
     build_path.mkdir(parents=True, exist_ok=True)
 
+    current_lambdas = []
     # Iterar sobre cada subcarpeta dentro de src/lambdas
     for lambda_dir in tqdm.tqdm(lambdas_path.iterdir()):
         if lambda_dir.is_dir():
+            current_lambdas.append(lambda_dir.name)
             target = build_path / lambda_dir.name
-            # copytree falla si ya existe el destino → usamos dirs_exist_ok
-            copytree(lambda_dir, target, dirs_exist_ok=True)
+            if manifest is not None:
+                copied, removed = sync_tree(lambda_dir, target, manifest, f'lambdas/{lambda_dir.name}',
+                                            link_mode=link_mode)
+                if copied or removed:
+                    typer.echo(f"Sincronizado {lambda_dir} → {target} ({copied} copiados, {removed} eliminados)")
+                continue
+            # copy_tree usa dirs_exist_ok: el destino puede existir de un build previo
+            copy_tree(lambda_dir, target, link_mode)
             typer.echo(f"Copiado {lambda_dir} → {target}")
 
-
-def build_lambda_stack(build_lambdas_path: Path, environment: str, app_name: str):
-    lambdas_init = build_lambdas_path / "__init__.py"
-
-    excluded_dirs = [
-        "__pycache__"
-    ]
-
-    for lambda_dir in tqdm.tqdm(build_lambdas_path.iterdir()):
-        if lambda_dir.is_dir() and lambda_dir.name not in excluded_dirs:
-            typer.echo(f"Procesando {lambda_dir.name} para __init__.py")
-
-            lambda_camel_case = lambda_dir.name.replace("-", "_").title().replace("_", "")
-
-            infra_config = ""
-            with open(lambdas_init, "r") as f:
-                infra_config = f.read()
-
-            with open(lambdas_init, "a") as f:
-                header = f"############ Lambda{lambda_camel_case}Stack ############"
-                if header in infra_config:
-                    typer.echo(f"Sección {header} ya existe en __init__.py, se omite.")
-                    continue
-                f.write(f"""
-        {header}
-        from .{lambda_dir.name}.infra_config import Lambda{lambda_camel_case}Stack
-
-        Lambda{lambda_camel_case}Stack(
-            name="{environment}-{app_name}-{lambda_camel_case}Stack",
-            environment="{environment}",
-            app_name="{app_name}",
+    if manifest is not None:
+        for key in manifest.keys('lambdas/'):
+            name = key.split('/', 1)[1]
+            if name in current_lambdas:
+                continue
+            if (build_path / name).exists():
+                rmtree(build_path / name)
+                typer.echo(f"Lambda eliminada del build: {name}")
+            manifest.drop(key)
+
+
+LAMBDAS_MANIFEST = 'lambdas.manifest.json'
+LAMBDA_STACK_MARKER = '# ############ spa-cli: stacks de lambdas (generado) ############'
+# Nombres que el `__init__.py` base define para los stacks (antes los bloques generados
+# se agregaban con 8 espacios, dentro del método que recibe estos valores)
+LAMBDA_STACK_NAMES = ('lambda_execution_role_arn', 'layers', 'sg_ids', 'subnets_ids', 'DEFAULT_TAGS')
+LAMBDA_STACK_LOADER = f'''
+{LAMBDA_STACK_MARKER}
+# Instancia el stack de cada lambda listada en {LAMBDAS_MANIFEST}; cada infra_config se
+# importa solo al llegar a su lambda.
+def _spa_lambda_stacks(lambda_execution_role_arn, layers, sg_ids, subnets_ids, tags):
+    import importlib
+    import json
+    from pathlib import Path
+
+    manifest = json.loads((Path(__file__).parent / "{LAMBDAS_MANIFEST}").read_text(encoding="utf-8"))
+    for spec in manifest["lambdas"]:
+        module = importlib.import_module(f"{{__name__}}.{{spec['module']}}.infra_config")
+        kwargs = dict(
+            name=spec["stack_name"],
+            environment=manifest["environment"],
+            app_name=manifest["app_name"],
             lambda_execution_role_arn=lambda_execution_role_arn,
             layers=layers,
             sg_ids=sg_ids,
             subnets_ids=subnets_ids,
-            tags=DEFAULT_TAGS
-        )\n\n""")
+            tags=tags,
+        )
+        kwargs.update(spec.get("overrides") or {{}})
+        getattr(module, spec["class"])(**kwargs)
 
-def build_api(api_path: Path, lambdas_path: Path, output_file: Path, build_mode: str = 'serverless'):
 
-    config = load_config()
-    api_definition = get_api_initial_definition(api_path)
+_spa_lambda_stacks({', '.join(LAMBDA_STACK_NAMES)})
+'''
+
+
+def _bound_names(body: List[ast.stmt]) -> set:
+    """Nombres asignados, importados o definidos en `body` (sin entrar a defs anidados)."""
+    names = set()
+    pending = list(body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+            continue
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
 
-    environment = os.getenv("ENVIRONMENT") or "dev"
-    app_name = os.getenv("APP_NAME") or "myapp"
-    aws_account = os.getenv("AWS_ACCOUNT_ID") or "123456789012"
-    aws_region = os.getenv("AWS_REGION") or "us-east-1"
+
+def lambda_stack_loader(base_init: str) -> str:
+    """`LAMBDA_STACK_LOADER` con la sangría y el scope del último bloque del `__init__.py` base.
+
+    Si el base termina dentro de una función (o el método de una clase), el loader se
+    agrega ahí con la misma sangría y recibe los nombres de `LAMBDA_STACK_NAMES` como
+    argumentos; si no, va a nivel de módulo. Falla el build si esos nombres no existen
+    en ese scope ni a nivel de módulo.
+    """
+    try:
+        tree = ast.parse(base_init)
+    except SyntaxError as e:
+        typer.echo(f"Build abortado: el __init__.py base de lambdas no es Python válido: {e}", color=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    scope, bound, indent = tree, _bound_names(tree.body), ''
+    while scope.body and isinstance(scope.body[-1], (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        scope = scope.body[-1]
+        if scope.body:
+            indent = ' ' * scope.body[-1].col_offset
+        if isinstance(scope, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            args = scope.args
+            bound |= {arg.arg for arg in args.posonlyargs + args.args + args.kwonlyargs}
+            bound |= {arg.arg for arg in (args.vararg, args.kwarg) if arg}
+            bound |= _bound_names(scope.body)
+    if isinstance(scope, ast.ClassDef):
+        # El cuerpo de una clase no es un scope visible para el código que se agrega
+        scope, indent = tree, ''
+        bound = _bound_names(tree.body)
+
+    missing = [name for name in LAMBDA_STACK_NAMES if name not in bound]
+    if missing:
+        where = f"la función {scope.name}()" if scope is not tree else "el módulo"
+        typer.echo(f"Build abortado: el __init__.py base de lambdas no define {', '.join(missing)} en {where}; "
+                   f"el stack de cada lambda los recibe como argumentos.", color=typer.colors.RED)
+        raise typer.Exit(code=1)
+    return textwrap.indent(LAMBDA_STACK_LOADER, indent)
+
+
+def lambda_stack_class(lambda_name: str) -> str:
+    return f"Lambda{lambda_name.replace('-', '_').title().replace('_', '')}Stack"
+
+
+def lambda_stack_manifest(build_lambdas_path: Path, environment: str, app_name: str, base_init: str = '',
+                          overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Lambdas del build con su módulo, clase de stack y argumentos extra.
+
+    Se omiten las lambdas sin `infra_config` y las que el `__init__.py` base ya
+    instancia a mano (su header `############ Lambda<Nombre>Stack ############`).
+    """
+    overrides = overrides or {}
+    lambdas = []
+    for lambda_dir in sorted(build_lambdas_path.iterdir()):
+        if not lambda_dir.is_dir() or lambda_dir.name.startswith(('__', '.')):
+            continue
+        stack_class = lambda_stack_class(lambda_dir.name)
+        if f"############ {stack_class} ############" in base_init:
+            typer.echo(f"Sección {stack_class} ya existe en __init__.py, se omite.")
+            continue
+        if not any((lambda_dir / name).exists() for name in ('infra_config.py', 'infra_config.pyc')):
+            typer.echo(f"[!] {lambda_dir.name} no tiene infra_config.py, se omite del stack.", color=typer.colors.YELLOW)
+            continue
+        lambdas.append({
+            "name": lambda_dir.name,
+            "module": lambda_dir.name,
+            "class": stack_class,
+            "stack_name": f"{environment}-{app_name}-{stack_class[len('Lambda'):]}",
+            "overrides": overrides.get(lambda_dir.name, {}),
+        })
+    return {"environment": environment, "app_name": app_name, "lambdas": lambdas}
+
+
+def build_lambda_stack(build_lambdas_path: Path, environment: str, app_name: str,
+                       manifest: Optional[BuildManifest] = None, source_init: Optional[Path] = None,
+                       overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+    """Genera `lambdas.manifest.json` y agrega a `__init__.py` el loop que instancia los stacks.
+
+    El `__init__.py` se escribe una sola vez: contenido base (`source_init`, o el
+    actual sin el bloque generado) más un loop fijo que recorre el manifest, así el
+    módulo no crece con el número de lambdas. `overrides` (`[spa.lambdas.<lambda>]`)
+    se pasan como argumentos extra al stack de cada lambda.
+
+    Con `manifest` el paso se omite si no cambiaron las lambdas, el entorno, los
+    overrides ni el `__init__.py` base.
+    """
+    lambdas_init = build_lambdas_path / "__init__.py"
+    if source_init and source_init.exists():
+        base_init = source_init.read_text(encoding="utf-8")
+    else:
+        base_init = lambdas_init.read_text(encoding="utf-8") if lambdas_init.exists() else ''
+        base_init = re.split(r'\n[ \t]*' + re.escape(LAMBDA_STACK_MARKER), base_init, maxsplit=1)[0]
+
+    stack_manifest = lambda_stack_manifest(build_lambdas_path, environment, app_name, base_init, overrides)
+    manifest_text = json.dumps(stack_manifest, indent=2, sort_keys=True) + '\n'
+    loader = lambda_stack_loader(base_init)
+    if manifest is not None:
+        digest = hash_text(base_init, manifest_text, loader)
+        if manifest.step('lambda_stack') == digest and lambdas_init.exists() \
+                and (build_lambdas_path / LAMBDAS_MANIFEST).exists():
+            typer.echo("Stack de lambdas sin cambios, se omite.")
+            return
+        manifest.set_step('lambda_stack', digest)
+
+    (build_lambdas_path / LAMBDAS_MANIFEST).write_text(manifest_text, encoding="utf-8")
+    # Este archivo se reescribe: nunca debe ser un enlace a la fuente
+    materialize(lambdas_init)
+    lambdas_init.write_text(base_init.rstrip('\n') + '\n' + loader, encoding="utf-8")
+    record_io(len(manifest_text), 1)
+    record_io(files=1, path=lambdas_init)
+    typer.echo(f"Stack de {len(stack_manifest['lambdas'])} lambdas → {LAMBDAS_MANIFEST}")
+
+
+def build_api(api_path: Path, lambdas_path: Path, output_file: Path, build_mode: str = 'serverless',
+              manifest: Optional[BuildManifest] = None, index: Optional[EndpointIndex] = None,
+              config: Optional[Config] = None):
+
+    config = config or load_config()
+
+    environment = config.environment
+    app_name = config.deploy.app_name
+    aws_account = config.deploy.aws_account
+    aws_region = config.deploy.aws_region
+
+    if manifest is not None:
+        endpoint_files = [lambdas_path / name / "endpoint.yaml" for name in get_lambda_dirs_with_endpoint(lambdas_path, index)]
+        digest = hash_text(
+            hash_files([api_path]),
+            hash_files(endpoint_files, base=lambdas_path),
+            config.fingerprint, build_mode,
+        )
+        if manifest.step('api') == digest and output_file.exists():
+            typer.echo("Definición de API sin cambios, se omite.")
+            return
+
+    api_definition = get_api_initial_definition(api_path)
 
     endpoint_list = build_api_config(
         lambdas_path,
         environment=environment,
         app_name=app_name,
         aws_account=aws_account,
-        aws_region=aws_region
+        aws_region=aws_region,
+        index=index,
     )
 
     for ep in endpoint_list:
@@ -184,6 +343,10 @@ def build_api(api_path: Path, lambdas_path: Path, output_file: Path, build_mode:
 
     with open(output_file, "w+", encoding="utf-8") as f:
         json.dump(api_definition, f, indent=2)
+    record_io(files=1, path=output_file)
+
+    if manifest is not None:
+        manifest.set_step('api', digest)
 
 
 def generate_docker_files(project_root: Path, project_config: Config, force: bool = False):
@@ -212,30 +375,59 @@ def generate_docker_files(project_root: Path, project_config: Config, force: boo
         typer.echo(f"[+] Generado: {dest}")
 
 
-def bake_container_runtime(project_root: Path, build_path: Path, project_config: Config):
+def generate_server_config(build_path: Path, project_config: Config) -> Path:
+    """Genera `gunicorn.conf.py` en build_path a partir de `[spa.container.server]`."""
+    from .template_gen import copy_template_file
+
+    server = project_config.container.server if project_config.container else Server()
+    overrides = {attr: repr(value) for attr, value in server.to_dict().items()}
+    # Solo se escriben los valores definidos; sin ellos gunicorn.conf.py usa el default del runtime
+    overrides['workers_default'] = repr(server.workers) if server.workers else '_available_cpus()'
+    runtime_env = {'SPA_HANDLER_THREADS': server.handler_threads, 'SPA_MAX_BODY_BYTES': server.max_body_bytes}
+    overrides['runtime_env'] = ''.join(f'\nos.environ.setdefault("{name}", "{value}")\n'
+                                       for name, value in runtime_env.items() if value)
+    dest = build_path / 'gunicorn.conf.py'
+    copy_template_file(DOCKER_TEMPLATES_DIR / 'gunicorn.conf.txt', dest, overrides)
+    return dest
+
+
+def bake_container_runtime(project_root: Path, build_path: Path, project_config: Config,
+                           manifest: Optional[BuildManifest] = None, link_mode: LinkMode = LinkMode.COPY,
+                           index: Optional[EndpointIndex] = None):
     """Prepara dentro de build/ los archivos que el container necesita en runtime:
     src/ (lambdas + layers), src/api_local/{router.py, openapi.json, main_server.py},
     spa_project.toml y api.yaml.
     """
     from .build_local_api import build_local_api
     from .build_api_json import build_api_json
+    from .auth_bridge_gen import authorizer_registry, generate_auth_bridge
 
     src_root = project_root / project_config.project.folders.root
     if src_root.exists():
         target_src = build_path / src_root.name
-        copytree(src_root, target_src, dirs_exist_ok=True)
-        typer.echo(f"Copiado {src_root} → {target_src}")
+        if manifest is not None:
+            copied, removed = sync_tree(src_root, target_src, manifest, 'container/src', link_mode=link_mode)
+            typer.echo(f"Sincronizado {src_root} → {target_src} ({copied} copiados, {removed} eliminados)")
+        else:
+            copy_tree(src_root, target_src, link_mode)
+            typer.echo(f"Copiado {src_root} → {target_src}")
+        # api_local se regenera a continuación: sus archivos deben ser copias reales
+        materialize_tree(target_src / 'api_local')
     else:
         typer.echo(f"[!] No se encontró carpeta de fuentes: {src_root}", color=typer.colors.YELLOW)
 
     lambdas_path = project_root / project_config.project.folders.lambdas
     api_path = project_root / project_config.project.definition.base_api
 
-    typer.echo('Generando router FastAPI local…')
-    build_local_api(lambdas_path, build_path)
+    index = index or EndpointIndex.build(lambdas_path)
+    server = project_config.container.server if project_config.container else Server()
 
-    typer.echo('Generando openapi.json para api_local…')
-    build_api_json(api_path, lambdas_path, build_path)
+    typer.echo(f'Generando router local (target={server.router})…')
+    build_local_api(lambdas_path, build_path, index=index, target=server.router, config=project_config)
+
+    typer.echo('Generando openapi.json y openapi.snapshot para api_local…')
+    build_api_json(api_path, lambdas_path, build_path, index=index,
+                   authorizers=authorizer_registry(project_config))
 
     main_server_template = Path(__file__).resolve().parent / 'main_server.py'
     api_local_dir = build_path / 'src' / 'api_local'
@@ -244,31 +436,60 @@ def bake_container_runtime(project_root: Path, build_path: Path, project_config:
     typer.echo(f"Copiado main_server.py → {api_local_dir}")
 
     typer.echo('Generando auth_bridge.py …')
-    from .auth_bridge_gen import generate_auth_bridge
     generate_auth_bridge(api_local_dir, project_config)
 
     authorizers_path = project_root / 'src' / 'authorizers'
     if authorizers_path.exists():
         target_auth = build_path / 'src' / 'authorizers'
-        copytree(authorizers_path, target_auth, dirs_exist_ok=True)
+        copy_tree(authorizers_path, target_auth, link_mode)
         typer.echo(f"Copiado {authorizers_path} → {target_auth}")
 
     legacy_auth = project_root / 'infra' / 'components' / 'authorizers'
     if legacy_auth.exists():
         target_legacy = build_path / 'infra' / 'components' / 'authorizers'
-        copytree(legacy_auth, target_legacy, dirs_exist_ok=True)
+        copy_tree(legacy_auth, target_legacy, link_mode)
         typer.echo(f"Copiado authorizers legacy → {target_legacy}")
 
     for filename in ('spa_project.toml', 'api.yaml'):
         src = project_root / filename
         if src.exists():
-            copy2(src, build_path / filename)
+            place_file(src, build_path / filename, link_mode)
             typer.echo(f"Copiado {filename} → {build_path}")
 
+    server_config = generate_server_config(build_path, project_config)
+    typer.echo(f"Generado {server_config.name} → {build_path}")
+
+
+def dockerfile_python_version(dockerfile: Path) -> Optional[Tuple[int, int]]:
+    """Versión `(major, minor)` de la imagen `python:X.Y` del último `FROM` del Dockerfile
+    (la etapa que corre en runtime); None si no existe o la imagen no es `python:X.Y*`.
+    """
+    if not dockerfile.exists():
+        return None
+    version = None
+    for line in dockerfile.read_text(encoding='utf-8').splitlines():
+        parts = line.split()
+        if not parts or parts[0].upper() != 'FROM':
+            continue
+        image = next((part for part in parts[1:] if not part.startswith('--')), '')
+        match = re.match(r'(?:.+/)?python:(\d+)\.(\d+)', image)
+        version = (int(match.group(1)), int(match.group(2))) if match else None
+    return version
 
-def copy_container_artifacts(project_root: Path, build_path: Path):
+
+def _container_dockerignore(text: str) -> str:
+    # El contexto de docker es build/: ahí los .pyc son los que precompiló [spa.build.bytecode]
+    # (con drop_sources son los únicos módulos), así que esas reglas solo aplican al árbol del host
+    return ''.join(line for line in text.splitlines(keepends=True)
+                   if line.strip() not in BYTECODE_IGNORE_RULES)
+
+
+def copy_container_artifacts(project_root: Path, build_path: Path, keep_bytecode: bool = False):
     """Copia Dockerfile / docker-compose.yml / entrypoint.sh / .dockerignore desde la raíz del
     proyecto al build_path. Si faltan, sugiere correr `spa project docker-init`.
+
+    Con `keep_bytecode` se quitan del `.dockerignore` copiado las reglas de `__pycache__/`
+    y `*.pyc` para que el bytecode precompilado llegue a la imagen.
     """
     missing = []
     for filename in DOCKER_ARTIFACTS:
@@ -276,7 +497,11 @@ def copy_container_artifacts(project_root: Path, build_path: Path):
         if not src.exists():
             missing.append(filename)
             continue
-        copy2(src, build_path / filename)
+        if filename == '.dockerignore' and keep_bytecode:
+            (build_path / filename).write_text(_container_dockerignore(src.read_text(encoding='utf-8')),
+                                               encoding='utf-8')
+        else:
+            copy2(src, build_path / filename)
         typer.echo(f"Copiado {filename} → {build_path}")
 
     if missing:
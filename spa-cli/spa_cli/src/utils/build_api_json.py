@@ -1,14 +1,25 @@
-from typing import cast
+from typing import cast, Dict, Optional
 from pathlib import Path
+from shutil import copy2
 from .build import get_api_config, get_api_initial_definition
+from .build_profile import record_io
+from .endpoint_index import EndpointIndex
+from .openapi_snapshot import SNAPSHOT_NAME, write_snapshot
 import json
 import typer
 
-def build_api_json(api_path: Path, lambdas_path: Path, base_path: Path, output_path: Path = None):
+SNAPSHOT_MODULE_PATH = Path(__file__).resolve().parent / "openapi_snapshot.py"
+
+def build_api_json(api_path: Path, lambdas_path: Path, base_path: Path, output_path: Path = None,
+                   index: Optional[EndpointIndex] = None, authorizers: Optional[Dict[str, dict]] = None) -> dict:
+    """Escribe `openapi.json` (compacto) y, a su lado, `openapi.snapshot` + `openapi_snapshot.py`.
+
+    `authorizers` es el registry de `auth_bridge` que se incluye en el snapshot.
+    """
     if output_path is None:
         output_path = base_path / "src/api_local" / "openapi.json"
     api_definition = get_api_initial_definition(api_path)
-    _, endpoint_list = get_api_config(lambdas_path)
+    _, endpoint_list = get_api_config(lambdas_path, index)
 
     for ep in endpoint_list:
         for route_path, methods in ep['definition'].items():
@@ -19,4 +30,9 @@ def build_api_json(api_path: Path, lambdas_path: Path, base_path: Path, output_p
                 cast(dict, api_definition['paths'])[route_path] = methods
 
     with open(output_path, "w+", encoding="utf-8") as f:
-        json.dump(api_definition, f, indent=2)
+        json.dump(api_definition, f, separators=(",", ":"))
+    write_snapshot(output_path.with_name(SNAPSHOT_NAME), api_definition, authorizers)
+    copy2(SNAPSHOT_MODULE_PATH, output_path.with_name(SNAPSHOT_MODULE_PATH.name))
+    for name in (output_path.name, SNAPSHOT_NAME, SNAPSHOT_MODULE_PATH.name):
+        record_io(files=1, path=output_path.with_name(name))
+    return api_definition
@@ -1,10 +1,24 @@
-from typing import cast, Dict, Iterable
+from typing import Any, cast, Dict, Iterable, List, Optional
 from pathlib import Path
+from shutil import copy2
 from .build import get_api_config
+from .endpoint_index import EndpointIndex
+from ...globals import Config
 import os
 
 
 SUPPORTED_METHODS: Iterable[str] = ("get", "post", "put", "patch", "delete", "head")
+ROUTER_TARGETS = ("fastapi", "asgi")
+API_RUNTIME_PATH = Path(__file__).resolve().parent / "api_runtime.py"
+METRICS_PATH = Path(__file__).resolve().parent / "metrics.py"
+LAMBDA_LIFECYCLE_PATH = Path(__file__).resolve().parent / "lambda_lifecycle.py"
+# [spa.lambdas.<lambda>] → argumento de lambda_lifecycle.FunctionSettings
+LAMBDA_RUNTIME_SETTINGS = {
+    "timeout": "timeout",
+    "memory_size": "memory_size",
+    "reserved_concurrent_executions": "reserved",
+    "provisioned_concurrent_executions": "provisioned",
+}
 
 def generate_fastapi_routes_from_openapi_path(endpoint_def: Dict) -> str:
     blocks = []
@@ -21,150 +35,167 @@ def generate_fastapi_routes_from_openapi_path(endpoint_def: Dict) -> str:
                 continue  # ignora options u otros no soportados
 
             handler_name = f"{dir_name}_handler"
-            http_method = m.upper()
 
             block = f'''@router.{m}("{path}")
 async def {dir_name}(request: Request, response: Response):
-    event = await build_event_from_request(request)
-    res = {handler_name}(event, MockContext())
-    response.status_code = get_status_code(res)
-    # Handle binary responses (e.g. .pkpass, files)
-    if isinstance(res, dict) and res.get("isBase64Encoded"):
-        from fastapi.responses import Response as FastAPIResponse
-        body = res.get("body", "")
-        binary_data = base64.b64decode(body) if isinstance(body, str) else body
-        headers = res.get("headers") or dict()
-        return FastAPIResponse(
-            content=binary_data,
-            status_code=response.status_code,
-            headers=headers,
-            media_type=headers.get("Content-Type") or headers.get("content-type"),
-        )
-    return get_body(res)
+    return await dispatch(request, response, {handler_name}, "{path}", "{dir_name}")
 '''
             blocks.append(block)
 
     return "\n\n".join(blocks)
 
 
-def build_local_api(lambdas_path: Path, base_path: Path):
+def generate_asgi_routes_from_openapi_path(endpoint_def: Dict) -> List[str]:
+    routes = []
+    dir_name = endpoint_def.get("name", "unknown")
+    openapi_paths = cast(dict, endpoint_def.get("definition", {}))
+    for path, methods in openapi_paths.items():
+        if not isinstance(methods, dict):
+            continue
+        for method in methods:
+            if method.lower() in SUPPORTED_METHODS:
+                routes.append(f'router.add_route("{method.upper()}", "{path}", "{dir_name}")')
+    return routes
+
+
+def lambda_runtime_settings(endpoint_list: List[Dict], config: Optional[Config] = None) -> Dict[str, Dict[str, Any]]:
+    """Argumentos de `lambda_lifecycle.configure()` por lambda: nombre real de la función
+    (`<env>-<app>-<lambda>`), región/cuenta de `[spa.deploy]` y lo que aplica de `[spa.lambdas.<lambda>]`."""
+    settings = {}
+    for ep in endpoint_list:
+        name = ep["name"]
+        values: Dict[str, Any] = {"function_name": name}
+        if config is not None:
+            if config.deploy.app_name:
+                values["function_name"] = f"{config.environment}-{config.deploy.app_name}-{name}"
+            values["region"] = config.deploy.aws_region
+            values["account"] = config.deploy.aws_account
+            overrides = config.lambdas.get(name, {})
+            values.update({attr: overrides[key] for key, attr in LAMBDA_RUNTIME_SETTINGS.items() if key in overrides})
+        settings[name] = values
+    return settings
+
+
+def build_asgi_router(import_lambdas: List[str], endpoint_list: List[Dict],
+                      settings: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    handlers = "\n".join(f'    "{ep["name"]}": {ep["name"]}_handler,' for ep in endpoint_list)
+    routes = "\n".join(route for ep in endpoint_list for route in generate_asgi_routes_from_openapi_path(ep))
+    return """\"\"\"Router ASGI generado por spa-cli (target `asgi`). NO EDITAR A MANO.\"\"\"
+from src.api_local.api_runtime import AsgiRouter
+from src.api_local.lambda_lifecycle import configure
+
+{IMPORT_LAMBDAS}
+
+configure({SETTINGS!r})
+
+HANDLERS = {{
+{HANDLERS}
+}}
+
+router = AsgiRouter(HANDLERS)
+{ROUTES}
+""".format(IMPORT_LAMBDAS="\n".join(import_lambdas), HANDLERS=handlers, ROUTES=routes,
+           SETTINGS=settings or lambda_runtime_settings(endpoint_list))
+
+
+def build_local_api(lambdas_path: Path, base_path: Path, index: Optional[EndpointIndex] = None,
+                    target: str = "fastapi", config: Optional[Config] = None):
+    """Genera `src/api_local/router.py` (y copia `api_runtime.py`, `metrics.py` y
+    `lambda_lifecycle.py` a su lado).
+
+    `target="fastapi"` emite un `APIRouter` con una ruta FastAPI por operación;
+    `target="asgi"` emite un `AsgiRouter` que despacha directo a los handlers sin
+    pasar por el parsing de FastAPI. `main_server.py` monta cualquiera de los dos.
+    Con `config` el contexto de cada lambda usa su nombre real y `[spa.lambdas.<lambda>]`.
+    """
+    if target not in ROUTER_TARGETS:
+        raise ValueError(f"Router target inválido: {target!r} (usa {', '.join(ROUTER_TARGETS)})")
+
+    api_local_dir = base_path / "src/api_local"
+    os.makedirs(api_local_dir, exist_ok=True)
+    copy2(API_RUNTIME_PATH, api_local_dir / "api_runtime.py")
+    copy2(METRICS_PATH, api_local_dir / "metrics.py")
+    copy2(LAMBDA_LIFECYCLE_PATH, api_local_dir / "lambda_lifecycle.py")
+
+    import_lambdas, endpoint_list = get_api_config(lambdas_path, index)
+    settings = lambda_runtime_settings(endpoint_list, config)
+
+    if target == "asgi":
+        with open(api_local_dir / "router.py", "w+", encoding="utf-8") as f:
+            f.write(build_asgi_router(import_lambdas, endpoint_list, settings))
+        return
+
     endpoints_config = []
-    
-    import_lambdas, endpoint_list = get_api_config(lambdas_path)
-    
     for ep in endpoint_list:
         endpoints_config.append(generate_fastapi_routes_from_openapi_path(ep))
 
 
     output_file_str = """from fastapi import APIRouter
 from fastapi import Request
-from fastapi import Body, Header, Query, Response
+from fastapi import Body, Header, Query, Response, HTTPException
 from core_http.utils import get_body, get_status_code
-import json
 import base64
-import uuid
-from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional, Dict, List, Any, cast
-
-class MockContext:
-    def __init__(self):
-        self.function_name = "role_users_report"
-        self.memory_limit_in_mb = 50
-        self.invoked_function_arn = "arn:aws:lambda:aws-region-1:123456789012:function:role_users_report"
-        self.aws_request_id = str(uuid.uuid4())
-
-async def build_event_from_request(request: Request) -> Dict[str, Any]:
-    path_parameters = request.path_params
-    body_bytes = await request.body()
+from src.api_local.api_runtime import (
+    BodyTooLarge, build_event, invoke_lambda, read_request_body, streaming_response,
+)
+from src.api_local.lambda_lifecycle import configure
+from src.api_local.metrics import start_request
+
+async def build_event_from_request(request: Request):
+    try:
+        body = await read_request_body(request)
+    except BodyTooLarge:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    return build_event(request.scope, body, dict(request.path_params))
+
+async def dispatch(request: Request, response: Response, handler, route: str, function: str):
+    timer = start_request(route, request.method, request.scope)
+    status, error = 500, True
     try:
-        body_str = body_bytes.decode('utf-8') if body_bytes else None
-    except UnicodeDecodeError:
-        body_str = base64.b64encode(body_bytes).decode('utf-8') if body_bytes else None
-
-    is_base64_encoded = False  # Cambia a True si decides codificar el body en base64
-
-    headers = dict(request.headers)
-    cookies = request.cookies
-
-    # Handle multiple query params with the same key
-    query_params: Dict[str, str] = {{}}
-    multi_value_query_params: Dict[str, List[str]] = {{}}
-    
-    for key in request.query_params.keys():
-        values = request.query_params.getlist(key)
-        if len(values) == 1:
-            query_params[key] = values[0]
-        else:
-            multi_value_query_params[key] = values
-
-    return {{
-        "version": "2.0",
-        "routeKey": "$default",
-        "rawPath": request.url.path,
-        "rawQueryString": request.url.query,
-        "cookies": list(cookies.values()) if cookies else [],
-        "headers": headers,
-        "queryStringParameters": query_params if query_params else None,
-        "multiValueQueryStringParameters": multi_value_query_params if multi_value_query_params else None,
-        "requestContext": {{
-            "accountId": "123456789012",
-            "apiId": "api-id",
-            "authentication": {{
-                "clientCert": {{
-                    "clientCertPem": "CERT_CONTENT",
-                    "subjectDN": "www.example.com",
-                    "issuerDN": "Example issuer",
-                    "serialNumber": "a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1:a1",
-                    "validity": {{
-                        "notBefore": "May 28 12:30:02 2019 GMT",
-                        "notAfter": "Aug  5 09:36:04 2021 GMT"
-                    }}
-                }}
-            }},
-            "authorizer": {{
-                "jwt": {{
-                    "claims": {{
-                        "claim1": "value1",
-                        "claim2": "value2"
-                    }},
-                    "scopes": [
-                        "scope1",
-                        "scope2"
-                    ]
-                }}
-            }},
-            "domainName": "id.execute-api.us-east-1.amazonaws.com",
-            "domainPrefix": "id",
-            "http": {{
-                "method": request.method,
-                "path": request.url.path,
-                "protocol": request.scope.get("http_version", "HTTP/1.1"),
-                "sourceIp": request.client.host if request.client else "127.0.0.1",
-                "userAgent": headers.get("user-agent", "")
-            }},
-            "requestId": str(uuid.uuid4()),
-            "routeKey": "$default",
-            "stage": "$default",
-            "time": datetime.utcnow().strftime("%d/%b/%Y:%H:%M:%S +0000"),
-            "timeEpoch": int(datetime.utcnow().timestamp() * 1000)
-        }},
-        "body": body_str,
-        "pathParameters": path_parameters,
-        "isBase64Encoded": is_base64_encoded
-    }}
+        event = await build_event_from_request(request)
+        timer.mark("event")
+        res = await invoke_lambda(function, handler, event)
+        timer.mark("handler")
+        status, error = get_status_code(res), False
+        return _to_response(res, response)
+    except HTTPException as e:
+        status, error = e.status_code, False
+        raise
+    finally:
+        timer.finish(status, error)
+
+def _to_response(res, response: Response):
+    streamed = streaming_response(res)
+    if streamed is not None:
+        return streamed
+    response.status_code = get_status_code(res)
+    # Handle binary responses (e.g. .pkpass, files)
+    if isinstance(res, dict) and res.get("isBase64Encoded"):
+        from fastapi.responses import Response as FastAPIResponse
+        body = res.get("body", "")
+        binary_data = base64.b64decode(body) if isinstance(body, str) else body
+        headers = res.get("headers") or dict()
+        return FastAPIResponse(
+            content=binary_data,
+            status_code=response.status_code,
+            headers=headers,
+            media_type=headers.get("Content-Type") or headers.get("content-type"),
+        )
+    return get_body(res)
 
 {IMPORT_LAMBDAS}
 
+configure({SETTINGS!r})
+
 router = APIRouter()
 
 {IMPORT_ENDPOINTS}
     """.format(
         IMPORT_LAMBDAS="\n".join(import_lambdas),
-        IMPORT_ENDPOINTS="\n".join(endpoints_config)
+        IMPORT_ENDPOINTS="\n".join(endpoints_config),
+        SETTINGS=settings,
     )
 
-    output_path = base_path / "src/api_local/router.py"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    output_path = api_local_dir / "router.py"
     with open(output_path, "w+", encoding="utf-8") as f:
         f.write(output_file_str)
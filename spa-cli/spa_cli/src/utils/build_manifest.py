@@ -0,0 +1,197 @@
+"""Manifest del build incremental.
+
+Guarda en `build/.spa-build-manifest.json` los hashes de contenido (sha256) de cada
+archivo fuente copiado al build y una "huella" por cada paso generado (stack de
+lambdas, openapi, requirements de layers). Con eso cada paso solo rehace el trabajo
+cuyos inputs cambiaron y elimina los outputs cuyas fuentes ya no existen.
+"""
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .build_profile import record_io
+from .link_mode import LinkMode, place_file
+
+MANIFEST_NAME = '.spa-build-manifest.json'
+MANIFEST_VERSION = 1
+EXCLUDED_NAMES = ('__pycache__',)
+EXCLUDED_SUFFIXES = ('.pyc', '.pyo')
+
+
+def hash_file(path: Path) -> str:
+    """Hash sha256 del contenido de un archivo."""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def hash_text(*parts: str) -> str:
+    """Hash sha256 de una secuencia de strings (separados para evitar colisiones)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def hash_tree(root: Path) -> Dict[str, str]:
+    """Regresa `{ruta_relativa_posix: sha256}` de todos los archivos bajo `root`.
+
+    Ignora `__pycache__` y bytecode compilado porque nunca son fuente del build.
+    """
+    result: Dict[str, str] = {}
+    if not root.exists():
+        return result
+    for path in sorted(root.rglob('*')):
+        if not path.is_file():
+            continue
+        rel = path.relative_to(root)
+        if any(part in EXCLUDED_NAMES for part in rel.parts) or path.suffix in EXCLUDED_SUFFIXES:
+            continue
+        result[rel.as_posix()] = hash_file(path)
+    return result
+
+
+class BuildManifest:
+    """Estado persistido del último build exitoso."""
+
+    def __init__(self, build_path: Path, data: Optional[dict] = None):
+        self.build_path = build_path
+        data = data or {}
+        self._files: Dict[str, Dict[str, str]] = data.get('files', {})
+        self._steps: Dict[str, str] = data.get('steps', {})
+        self._pruned: Dict[str, List[str]] = data.get('pruned', {})
+
+    @property
+    def path(self) -> Path:
+        return self.build_path / MANIFEST_NAME
+
+    @staticmethod
+    def exists(build_path: Path) -> bool:
+        return (build_path / MANIFEST_NAME).exists()
+
+    @classmethod
+    def load(cls, build_path: Path) -> 'BuildManifest':
+        """Lee el manifest; si no existe, está corrupto o es de otra versión regresa uno vacío."""
+        manifest_path = build_path / MANIFEST_NAME
+        try:
+            data = json.loads(manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return cls(build_path)
+        if data.get('version') != MANIFEST_VERSION:
+            return cls(build_path)
+        return cls(build_path, data)
+
+    def save(self):
+        self.build_path.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({
+            'version': MANIFEST_VERSION,
+            'files': self._files,
+            'steps': self._steps,
+            'pruned': self._pruned,
+        }, indent=2, sort_keys=True), encoding='utf-8')
+
+    def files(self, key: str) -> Dict[str, str]:
+        return self._files.get(key, {})
+
+    def set_files(self, key: str, files: Dict[str, str]):
+        self._files[key] = files
+
+    def pruned(self, key: str) -> Set[str]:
+        """Archivos de `key` que una etapa posterior a la copia (slim, `drop_sources`) eliminó del build."""
+        return set(self._pruned.get(key, ()))
+
+    def set_pruned(self, key: str, files: Iterable[str]):
+        files = sorted(files)
+        if files:
+            self._pruned[key] = files
+        else:
+            self._pruned.pop(key, None)
+
+    def clear_pruned(self):
+        """Olvida lo eliminado después de la copia; el siguiente `sync_tree` vuelve a copiarlo."""
+        self._pruned.clear()
+
+    def step(self, key: str) -> Optional[str]:
+        return self._steps.get(key)
+
+    def set_step(self, key: str, digest: str):
+        self._steps[key] = digest
+
+    def keys(self, prefix: str) -> List[str]:
+        """Llaves (de archivos o pasos) registradas bajo un prefijo, p. ej. `lambdas/`."""
+        return sorted({k for k in list(self._files) + list(self._steps) if k.startswith(prefix)})
+
+    def drop(self, key: str):
+        self._files.pop(key, None)
+        self._steps.pop(key, None)
+        self._pruned.pop(key, None)
+
+
+def _prune_empty_dirs(start: Path, stop: Path):
+    current = start
+    while current != stop and stop in current.parents:
+        try:
+            current.rmdir()
+        except OSError:
+            return
+        current = current.parent
+
+
+def sync_tree(src: Path, dst: Path, manifest: BuildManifest, key: str, force: bool = False,
+              link_mode: LinkMode = LinkMode.COPY) -> Tuple[int, int]:
+    """Sincroniza `src` → `dst` copiando (o enlazando) solo los archivos cuyo hash cambió.
+
+    Los archivos registrados en el build anterior que ya no existen en `src` se
+    eliminan de `dst`. Los que una etapa posterior eliminó a propósito
+    (`BuildManifest.pruned`) no se vuelven a copiar mientras su contenido no cambie.
+    Regresa `(copiados, eliminados)`.
+    """
+    current = hash_tree(src)
+    previous = {} if force else manifest.files(key)
+    pruned = set() if force else manifest.pruned(key)
+
+    copied = 0
+    for rel, digest in current.items():
+        target = dst / rel
+        if previous.get(rel) == digest and (rel in pruned or target.exists()):
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        place_file(src / rel, target, link_mode)
+        pruned.discard(rel)
+        copied += 1
+
+    removed = 0
+    for rel in set(previous) - set(current):
+        target = dst / rel
+        if target.is_symlink() or target.exists():
+            target.unlink()
+            removed += 1
+            record_io(files=1)
+            _prune_empty_dirs(target.parent, dst)
+
+    manifest.set_files(key, current)
+    manifest.set_pruned(key, pruned & set(current))
+    return copied, removed
+
+
+def sync_file(src: Path, dst: Path, manifest: BuildManifest, key: str,
+              link_mode: LinkMode = LinkMode.COPY) -> bool:
+    """Copia un archivo suelto solo si su contenido cambió. Regresa True si se copió."""
+    digest = hash_file(src)
+    previous = manifest.files(key)
+    if previous.get(src.name) == digest and dst.exists():
+        return False
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    place_file(src, dst, link_mode)
+    manifest.set_files(key, {src.name: digest})
+    return True
+
+
+def hash_files(paths: Iterable[Path], base: Optional[Path] = None) -> str:
+    """Huella combinada de varios archivos (ruta + contenido), estable respecto al orden."""
+    parts: List[str] = []
+    for path in sorted(paths):
+        parts.append(path.relative_to(base).as_posix() if base else str(path))
+        parts.append(hash_file(path) if path.exists() else '')
+    return hash_text(*parts)
@@ -0,0 +1,209 @@
+"""Perfil de `spa project build --profile`: tiempo, CPU y E/S por fase.
+
+Cada paso del build se envuelve en `phase(nombre)`. Sin `--profile` no hay perfil
+activo y `phase`, `record_io` y `record_cpu` no hacen nada. Con `--profile`,
+cada fase registra:
+
+- `wall`: tiempo real;
+- `cpu`: CPU del proceso y de los subprocesos terminados durante la fase (pip, los
+  pools de bytecode); en fases que corren en un hilo secundario (p. ej. el pip de
+  cada layer) solo la CPU de ese hilo más la de sus subprocesos (`record_cpu`);
+- `bytes`/`archivos`: lo que escribieron `place_file` (bytes copiados; los
+  hardlinks, reflinks y symlinks cuentan archivos pero no bytes), pip y los zips.
+
+La E/S de un hilo sin fase propia (los pools de empaquetado, por ejemplo) se
+atribuye a la fase abierta en el hilo principal. Al terminar se imprime una tabla
+y se escribe `build/build-profile.json` en formato Chrome trace-event (se abre en
+`chrome://tracing` o https://ui.perfetto.dev).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import typer
+
+TRACE_NAME = 'build-profile.json'
+
+
+@dataclass
+class Phase:
+    name: str
+    cat: str
+    tid: int
+    depth: int
+    start: float
+    parent: Optional['Phase'] = None
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    files: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+    _cpu_start: float = 0.0
+    _main: bool = True
+
+
+def _process_cpu() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class BuildProfiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.started_at = time.time()
+        self.phases: List[Phase] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main_ident = threading.get_ident()
+        self._main_stack: List[Phase] = []
+        self._tids: Dict[int, int] = {}
+
+    def _stack(self) -> List[Phase]:
+        if threading.get_ident() == self._main_ident:
+            return self._main_stack
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _current(self) -> Optional[Phase]:
+        stack = self._stack()
+        if stack:
+            return stack[-1]
+        return self._main_stack[-1] if self._main_stack else None
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            return self._tids.setdefault(ident, len(self._tids))
+
+    @contextmanager
+    def phase(self, name: str, cat: str = 'build', **args) -> Iterator[Phase]:
+        main = threading.get_ident() == self._main_ident
+        parent = self._current()
+        current = Phase(name=name, cat=cat, tid=self._tid(), depth=parent.depth + 1 if parent else 0,
+                        start=time.perf_counter(), parent=parent, args=args, _main=main,
+                        _cpu_start=_process_cpu() if main else time.thread_time())
+        stack = self._stack()
+        stack.append(current)
+        try:
+            yield current
+        finally:
+            stack.pop()
+            current.wall = time.perf_counter() - current.start
+            current.cpu += (_process_cpu() if main else time.thread_time()) - current._cpu_start
+            with self._lock:
+                self.phases.append(current)
+
+    def record_io(self, nbytes: int = 0, files: int = 0):
+        phase = self._current()
+        with self._lock:
+            while phase is not None:
+                phase.bytes += nbytes
+                phase.files += files
+                phase = phase.parent
+
+    def record_cpu(self, seconds: float):
+        """CPU de un subproceso esperado desde un hilo secundario (el hilo principal ya la mide)."""
+        phase = self._current()
+        if phase is None or phase._main:
+            return
+        with self._lock:
+            while phase is not None and not phase._main:
+                phase.cpu += seconds
+                phase = phase.parent
+
+    def ordered(self) -> List[Phase]:
+        """Fases en orden de inicio, con cada fase seguida de sus hijas."""
+        children: Dict[Optional[int], List[Phase]] = {}
+        for item in self.phases:
+            children.setdefault(id(item.parent) if item.parent else None, []).append(item)
+        ordered = []
+
+        def walk(key: Optional[int]):
+            for item in sorted(children.get(key, []), key=lambda p: p.start):
+                ordered.append(item)
+                walk(id(item))
+        walk(None)
+        return ordered
+
+    def trace(self, metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+             'args': {'name': 'main' if tid == 0 else f'worker-{tid}'}}
+            for tid in sorted(self._tids.values())
+        ]
+        for item in self.ordered():
+            events.append({
+                'name': item.name, 'cat': item.cat, 'ph': 'X', 'pid': pid, 'tid': item.tid,
+                'ts': round((item.start - self.origin) * 1e6), 'dur': round(item.wall * 1e6),
+                'args': {'cpu_ms': round(item.cpu * 1000, 1), 'bytes': item.bytes, 'files': item.files,
+                         **item.args},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'started_at': self.started_at, **(metadata or {})}}
+
+    def write_trace(self, build_path: Path, metadata: Optional[Dict[str, Any]] = None) -> Path:
+        build_path.mkdir(parents=True, exist_ok=True)
+        target = build_path / TRACE_NAME
+        target.write_text(json.dumps(self.trace(metadata), indent=1) + '\n', encoding='utf-8')
+        return target
+
+    def print_summary(self):
+        from .layer_cache import format_size  # layer_cache -> link_mode -> este módulo
+
+        typer.echo(f"{'fase':<44} {'wall':>9} {'cpu':>9} {'bytes':>10} {'archivos':>9}")
+        for item in self.ordered():
+            name = ('  ' * item.depth + item.name)[:44]
+            typer.echo(f'{name:<44} {item.wall:>8.2f}s {item.cpu:>8.2f}s {format_size(item.bytes):>10} '
+                       f'{item.files:>9}')
+
+
+_active: Optional[BuildProfiler] = None
+
+
+@contextmanager
+def profiling(enabled: bool, build_path: Path, **metadata) -> Iterator[Optional[BuildProfiler]]:
+    """Activa un perfil durante el bloque y, al salir (también si el build falla), imprime el
+    resumen y escribe el trace en `build_path`."""
+    global _active
+    if not enabled:
+        yield None
+        return
+    profiler = _active = BuildProfiler()
+    try:
+        with profiler.phase('build', cat='build', **metadata):
+            yield profiler
+    finally:
+        _active = None
+        typer.echo('')
+        profiler.print_summary()
+        target = profiler.write_trace(build_path, metadata)
+        typer.echo(f'Trace del build en {target} (ábrelo en chrome://tracing o ui.perfetto.dev)')
+
+
+def phase(name: str, cat: str = 'build', **args):
+    """Context manager que mide `name` si hay un perfil activo (no hace nada si no)."""
+    return _active.phase(name, cat, **args) if _active is not None else nullcontext()
+
+
+def record_io(nbytes: int = 0, files: int = 0, path: Optional[Path] = None):
+    """Suma E/S a la fase actual; con `path` los bytes son su tamaño (solo se mide si hay perfil)."""
+    if _active is None:
+        return
+    if path is not None:
+        try:
+            nbytes += os.lstat(path).st_size
+        except OSError:
+            pass
+    _active.record_io(nbytes, files)
+
+
+def record_cpu(seconds: float):
+    if _active is not None:
+        _active.record_cpu(seconds)
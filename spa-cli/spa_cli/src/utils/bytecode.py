@@ -0,0 +1,140 @@
+"""Precompilación de bytecode de los artefactos del build (`[spa.build.bytecode]`).
+
+El filesystem de Lambda es de solo lectura: sin `.pyc` utilizables cada cold start
+vuelve a compilar todos los `.py` importados. Aquí se compilan de antemano con
+invalidación `UNCHECKED_HASH`, que no depende del mtime y por lo tanto sigue siendo
+válido después de zip, `docker COPY` o cualquier copia que cambie timestamps.
+
+Cada archivo registra como ruta (`co_filename`) la que tendrá en runtime
+(`/var/task/...` para lambdas, `/opt/python/...` para layers, `/app/src/...` en el
+container), así los tracebacks apuntan a rutas reales y el bytecode no depende de
+la carpeta local del build.
+
+Con `drop_sources` se escriben `.pyc` "legacy" junto a cada módulo y se eliminan los
+`.py`; Python los importa sin fuente con cualquier nivel de `optimize`. Requiere que
+el runtime use la misma versión de Python que el build.
+"""
+import importlib.util
+import os
+import py_compile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import List, Optional, Tuple
+
+from ...globals import Bytecode
+
+# Pulumi importa estos módulos desde build/infra con su propio intérprete
+KEEP_SOURCES = ('infra_config.py',)
+LAMBDA_RUNTIME_DIR = '/var/task'
+LAYER_RUNTIME_DIR = '/opt'
+CONTAINER_RUNTIME_DIR = '/app'
+
+
+@dataclass
+class BytecodeReport:
+    compiled: int = 0
+    dropped: int = 0
+    up_to_date: int = 0
+    failed: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def _cfile(source: str, optimize: int, legacy: bool) -> str:
+    return (os.path.splitext(source)[0] + '.pyc' if legacy
+            else importlib.util.cache_from_source(source, optimization=optimize or ''))
+
+
+def is_current_pyc(pyc: Path, optimize: int) -> bool:
+    """True si `pyc` es bytecode de este build: `__pycache__` con el nivel `optimize`,
+    `UNCHECKED_HASH`, el magic number de este intérprete y el hash de su `.py` actual.
+
+    Los `.pyc` de pip o de corridas locales (invalidación por timestamp) no cuentan.
+    """
+    try:
+        source = Path(importlib.util.source_from_cache(str(pyc)))
+    except ValueError:
+        return False
+    if _cfile(str(source), optimize, legacy=False) != str(pyc) or not source.is_file():
+        return False
+    try:
+        with open(pyc, 'rb') as f:
+            header = f.read(16)
+        # magic (4) + flags (4): 0b01 = basado en hash sin verificar la fuente + hash (8)
+        return (len(header) == 16 and header[:4] == importlib.util.MAGIC_NUMBER
+                and int.from_bytes(header[4:8], 'little') == 0b01
+                and header[8:] == importlib.util.source_hash(source.read_bytes()))
+    except OSError:
+        return False
+
+
+def _compile_one(task: Tuple[str, str, int, bool]) -> Tuple[str, Optional[str]]:
+    source, runtime_path, optimize, legacy = task
+    cfile = _cfile(source, optimize, legacy)
+    try:
+        py_compile.compile(source, cfile=cfile, dfile=runtime_path, doraise=True, optimize=optimize,
+                           invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    except (py_compile.PyCompileError, OSError, ValueError) as e:
+        return source, str(e).strip().splitlines()[-1] if str(e).strip() else type(e).__name__
+    return source, None
+
+
+def _sources(root: Path, runtime_dir: str) -> List[Tuple[Path, str]]:
+    files = []
+    for current, dirs, names in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in sorted(names):
+            if name.endswith('.py'):
+                path = Path(current) / name
+                files.append((path, str(PurePosixPath(runtime_dir) / path.relative_to(root).as_posix())))
+    return files
+
+
+def artifact_targets(layers_path: Path, lambdas_path: Path) -> List[Tuple[Path, str]]:
+    """`(carpeta, ruta en runtime)` de cada layer y lambda del build serverless."""
+    targets = []
+    for base, runtime_dir in ((layers_path, LAYER_RUNTIME_DIR), (lambdas_path, LAMBDA_RUNTIME_DIR)):
+        if base.exists():
+            targets.extend((entry, runtime_dir) for entry in sorted(base.iterdir())
+                           if entry.is_dir() and not entry.name.startswith(('__', '.')))
+    return targets
+
+
+def compile_artifacts(targets: List[Tuple[Path, str]], config: Bytecode,
+                      jobs: Optional[int] = None) -> BytecodeReport:
+    """Compila los `.py` de `targets` en un solo pool de procesos (uno por CPU por default).
+
+    Los módulos cuyo `__pycache__` ya tiene bytecode vigente (ver `is_current_pyc`) se omiten.
+    """
+    report = BytecodeReport()
+    if not config.enabled:
+        return report
+    tasks = []
+    for root, runtime_dir in targets:
+        for path, runtime_path in _sources(root, runtime_dir):
+            legacy = config.drop_sources and path.name not in KEEP_SOURCES
+            if not legacy and is_current_pyc(Path(_cfile(str(path), config.optimize, legacy)), config.optimize):
+                report.up_to_date += 1
+                continue
+            tasks.append((str(path), runtime_path, config.optimize, legacy))
+    if not tasks:
+        return report
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    if jobs == 1:
+        results = map(_compile_one, tasks)
+    else:
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(_compile_one, tasks, chunksize=max(1, len(tasks) // (jobs * 8)))
+    try:
+        for (source, _, _, legacy), (_, error) in zip(tasks, results):
+            if error is not None:
+                report.failed.append((source, error))
+                continue
+            report.compiled += 1
+            if legacy:
+                os.unlink(source)
+                report.dropped += 1
+    finally:
+        if jobs > 1:
+            executor.shutdown()
+    return report
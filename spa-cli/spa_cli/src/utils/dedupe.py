@@ -0,0 +1,224 @@
+"""Detección de dependencias duplicadas entre layers (`[spa.build.dedupe]`).
+
+Cada layer instala su `requirements.txt` por separado, así que las dependencias
+transitivas comunes (pydantic, urllib3, ...) terminan copiadas en varias layers. Como
+todas las layers del proyecto se montan juntas en `/opt/python`, las copias extra solo
+ocupan espacio del límite de 250 MB; si además las versiones difieren, la que queda
+en runtime depende del orden de las layers.
+
+Después de `build_layers` se leen los `*.dist-info` de cada layer construida y se
+reportan las distribuciones presentes en más de una. Con `policy = "hoist"` las que
+tienen la misma versión se mueven (archivo por archivo, según su `RECORD`) a una
+layer compartida `build/tmp_build_layer/<shared_layer>`.
+"""
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from shutil import rmtree
+from typing import Dict, List, Optional
+
+import typer
+
+from ...globals import Dedupe
+from .build_manifest import BuildManifest, _prune_empty_dirs, hash_text
+from .layer_cache import _tree_size, format_size, requirements_digest
+from .slim import _normalize
+
+
+@dataclass
+class Distribution:
+    name: str
+    version: str
+    layer: str
+    site: Path
+    dist_info: Path
+    files: List[str] = field(default_factory=list)  # relativos a `site`; vacío si no hay RECORD
+    size: int = 0
+
+
+@dataclass
+class Duplicate:
+    name: str
+    copies: List[Distribution]
+
+    @property
+    def versions(self) -> Dict[str, str]:
+        return {dist.layer: dist.version for dist in self.copies}
+
+    @property
+    def conflict(self) -> bool:
+        return len(set(self.versions.values())) > 1
+
+    @property
+    def wasted(self) -> int:
+        """Bytes de las copias que sobran (todas menos la más grande)."""
+        sizes = [dist.size for dist in self.copies]
+        return sum(sizes) - max(sizes)
+
+
+@dataclass
+class DedupeReport:
+    duplicates: List[Duplicate] = field(default_factory=list)
+    hoisted: List[str] = field(default_factory=list)
+    saved: int = 0
+
+    @property
+    def conflicts(self) -> List[Duplicate]:
+        return [dup for dup in self.duplicates if dup.conflict]
+
+
+def _metadata(dist_info: Path) -> Dict[str, str]:
+    values = {}
+    metadata = dist_info / 'METADATA'
+    if not metadata.exists():
+        return values
+    for line in metadata.read_text(encoding='utf-8', errors='replace').splitlines():
+        if not line.strip():
+            break  # fin de los headers, empieza la descripción
+        key, _, value = line.partition(':')
+        if key in ('Name', 'Version') and key not in values:
+            values[key] = value.strip()
+    return values
+
+
+def _read_distribution(layer: str, site: Path, dist_info: Path) -> Distribution:
+    metadata = _metadata(dist_info)
+    stem = dist_info.name[:-len('.dist-info')]
+    name, _, version = stem.partition('-')
+    dist = Distribution(name=_normalize(metadata.get('Name', name)), version=metadata.get('Version', version),
+                        layer=layer, site=site, dist_info=dist_info)
+    record = dist_info / 'RECORD'
+    if record.exists():
+        site_resolved = site.resolve()
+        files = set()
+        for line in record.read_text(encoding='utf-8', errors='replace').splitlines():
+            rel_path = line.split(',', 1)[0]
+            if not rel_path:
+                continue
+            target = (site / rel_path).resolve()
+            if target.is_relative_to(site_resolved) and target.is_file():
+                files.add(target.relative_to(site_resolved).as_posix())
+        # RECORD no se lista a sí mismo con hash, pero el resto del dist-info puede faltar
+        files.update(p.relative_to(site).as_posix() for p in dist_info.rglob('*') if p.is_file())
+        dist.files = sorted(files)
+        dist.size = sum(os.lstat(site / rel).st_size for rel in dist.files)
+    else:
+        # Sin RECORD (p. ej. ya limpiado por [spa.build.slim]) solo se estima el tamaño
+        top_level = dist_info / 'top_level.txt'
+        tops = [t.strip() for t in top_level.read_text().splitlines() if t.strip()] if top_level.exists() else []
+        dist.size = _tree_size(dist_info)
+        for top in tops:
+            if (site / top).is_dir():
+                dist.size += _tree_size(site / top)
+            dist.size += sum(os.lstat(module).st_size for module in site.glob(f'{top}.*') if module.is_file())
+    return dist
+
+
+def scan_layers(layers_build_path: Path) -> Dict[str, List[Distribution]]:
+    """Distribuciones instaladas por layer construida (`<layer>/python/*.dist-info`)."""
+    layers = {}
+    if not layers_build_path.exists():
+        return layers
+    for entry in sorted(layers_build_path.iterdir()):
+        site = entry / 'python'
+        if not entry.is_dir() or entry.name.startswith(('__', '.')) or not site.is_dir():
+            continue
+        layers[entry.name] = [_read_distribution(entry.name, site, dist_info)
+                              for dist_info in sorted(site.glob('*.dist-info')) if dist_info.is_dir()]
+    return layers
+
+
+def find_duplicates(layers: Dict[str, List[Distribution]], ignore: Optional[List[str]] = None) -> List[Duplicate]:
+    ignored = {_normalize(name) for name in ignore or []}
+    by_name: Dict[str, List[Distribution]] = {}
+    for dists in layers.values():
+        for dist in dists:
+            if dist.name not in ignored:
+                by_name.setdefault(dist.name, []).append(dist)
+    return [Duplicate(name, copies) for name, copies in sorted(by_name.items()) if len(copies) > 1]
+
+
+def _hoist_one(dup: Duplicate, shared_site: Path) -> int:
+    """Mueve la primera copia a la layer compartida y elimina las demás; regresa bytes ahorrados."""
+    keep, *others = dup.copies
+    for rel in keep.files:
+        target = shared_site / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if not (keep.site / rel).exists():
+            continue
+        if target.exists():
+            (keep.site / rel).unlink()
+        else:
+            os.replace(keep.site / rel, target)
+        _prune_empty_dirs((keep.site / rel).parent, keep.site)
+    saved = 0
+    for dist in others:
+        for rel in dist.files:
+            path = dist.site / rel
+            if not path.exists():
+                continue  # compartido con otra distribución ya eliminada
+            saved += os.lstat(path).st_size
+            path.unlink()
+            _prune_empty_dirs(path.parent, dist.site)
+    return saved
+
+
+def dedupe_layers(layers_build_path: Path, config: Dedupe) -> DedupeReport:
+    """Detecta duplicados entre layers y, con `policy = "hoist"`, los mueve a la layer compartida.
+
+    Solo se mueven distribuciones con la misma versión en todas las layers y con
+    `RECORD` (sin él no se sabe qué archivos son suyos); el resto queda en el reporte.
+    """
+    report = DedupeReport(duplicates=find_duplicates(scan_layers(layers_build_path), config.ignore))
+    if config.policy != 'hoist':
+        return report
+    shared_site = layers_build_path / config.shared_layer / 'python'
+    for dup in report.duplicates:
+        if dup.conflict or any(not dist.files for dist in dup.copies):
+            continue
+        report.saved += _hoist_one(dup, shared_site)
+        report.hoisted.append(dup.name)
+    return report
+
+
+def invalidate_on_layers_change(manifest: BuildManifest, config: Dedupe, layers_path: Path,
+                                layers_build_path: Path) -> bool:
+    """Con `hoist`, si cambió algún `requirements.txt` o la configuración, reinstala todas las layers.
+
+    La layer compartida se arma a partir de todas las layers a la vez: si una cambia,
+    lo que se movió antes puede ya no ser compartido. Se descarta y se vuelve a armar
+    desde instalaciones limpias (normalmente tomadas del cache de layers).
+    """
+    requirements = sorted(
+        (layer.name, requirements_digest(layer / 'python' / 'requirements.txt'))
+        for layer in layers_path.iterdir() if (layer / 'python' / 'requirements.txt').exists()
+    ) if layers_path.exists() else []
+    digest = hash_text(json.dumps({'config': config.to_dict(), 'requirements': requirements}, sort_keys=True))
+    previous = manifest.step('dedupe')
+    manifest.set_step('dedupe', digest)
+    shared = layers_build_path / config.shared_layer
+    if previous == digest or not (config.policy == 'hoist' or shared.exists()):
+        return False
+    if shared.exists():
+        rmtree(shared)
+    for key in manifest.keys('layers/'):
+        if key.endswith('/requirements'):
+            manifest.drop(key)
+    return previous is not None
+
+
+def print_dedupe_report(report: DedupeReport):
+    if not report.duplicates:
+        typer.echo('Sin dependencias duplicadas entre layers.')
+        return
+    typer.echo(f"{'paquete':<28} {'duplicado':>10}  versiones por layer")
+    for dup in report.duplicates:
+        versions = ', '.join(f'{layer}={version}' for layer, version in dup.versions.items())
+        mark = ' [conflicto]' if dup.conflict else (' [movido]' if dup.name in report.hoisted else '')
+        typer.echo(f'{dup.name:<28} {format_size(dup.wasted):>10}  {versions}{mark}')
+    wasted = sum(dup.wasted for dup in report.duplicates)
+    typer.echo(f'{len(report.duplicates)} paquetes en más de una layer ({format_size(wasted)} duplicados, '
+               f'{len(report.conflicts)} con versiones distintas)')
+    if report.hoisted:
+        typer.echo(f'{len(report.hoisted)} paquetes movidos a la layer compartida: {format_size(report.saved)} ahorrados')
@@ -0,0 +1,120 @@
+"""Índice de endpoints del proyecto (`src/lambdas/*/endpoint.yaml`).
+
+Se construye una sola vez por comando y se comparte entre `build_api`,
+`build_local_api` y `build_api_json`, en lugar de que cada uno vuelva a listar
+`src/lambdas` y a parsear cada YAML. Usa `CSafeLoader` cuando PyYAML trae la
+extensión en C y guarda las definiciones ya parseadas en `.spa/endpoint_index.json`,
+indexadas por `mtime` y tamaño, para no re-parsear los archivos que no cambiaron.
+"""
+import os
+import json
+import copy
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML sin libyaml
+    from yaml import SafeLoader as YamlLoader
+
+INDEX_CACHE_PATH = Path('.spa') / 'endpoint_index.json'
+INDEX_CACHE_VERSION = 1
+
+
+def load_yaml(path: Path) -> Any:
+    with open(path, 'r', encoding="utf-8") as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+
+def _json_roundtrips(value: Any) -> bool:
+    """True si `value` sobrevive intacto a JSON (p. ej. sin llaves int ni fechas)."""
+    try:
+        return json.loads(json.dumps(value)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+@dataclass
+class EndpointEntry:
+    name: str
+    path: Path
+    definition: Dict[str, Any]
+
+
+class EndpointIndex:
+    """Lambdas con `endpoint.yaml` y su definición OpenAPI parseada."""
+
+    def __init__(self, lambdas_path: Path, entries: List[EndpointEntry]):
+        self.lambdas_path = lambdas_path
+        self.entries = entries
+
+    @property
+    def names(self) -> List[str]:
+        return [entry.name for entry in self.entries]
+
+    def get(self, name: str) -> Optional[EndpointEntry]:
+        for entry in self.entries:
+            if entry.name == name:
+                return entry
+        return None
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """Copias de las definiciones, para consumidores que las modifican."""
+        return [copy.deepcopy(entry.definition) for entry in self.entries]
+
+    @classmethod
+    def build(cls, lambdas_path: Path, cache_path: Optional[Path] = INDEX_CACHE_PATH) -> 'EndpointIndex':
+        if not os.path.exists(lambdas_path):
+            raise FileNotFoundError(f"La ruta base no existe: {lambdas_path}")
+
+        cached = cls._read_cache(cache_path)
+        fresh: Dict[str, Dict[str, Any]] = {}
+        entries: List[EndpointEntry] = []
+        for entry in sorted(os.scandir(lambdas_path), key=lambda e: e.name):
+            if not entry.is_dir():
+                continue
+            endpoint_file = Path(entry.path) / "endpoint.yaml"
+            try:
+                stat = endpoint_file.stat()
+            except FileNotFoundError:
+                continue
+
+            cache_key = str(endpoint_file.resolve())
+            hit = cached.get(cache_key)
+            if hit and hit.get('mtime_ns') == stat.st_mtime_ns and hit.get('size') == stat.st_size:
+                definition = hit['definition']
+            else:
+                definition = load_yaml(endpoint_file)
+            if _json_roundtrips(definition):
+                fresh[cache_key] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'definition': definition}
+            entries.append(EndpointEntry(entry.name, endpoint_file, definition))
+
+        if fresh != cached:
+            cls._write_cache(cache_path, fresh)
+        return cls(lambdas_path, entries)
+
+    @staticmethod
+    def _read_cache(cache_path: Optional[Path]) -> Dict[str, Dict[str, Any]]:
+        if cache_path is None or not cache_path.exists():
+            return {}
+        try:
+            data = json.loads(cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+        if data.get('version') != INDEX_CACHE_VERSION:
+            return {}
+        return data.get('entries', {})
+
+    @staticmethod
+    def _write_cache(cache_path: Optional[Path], entries: Dict[str, Dict[str, Any]]):
+        if cache_path is None:
+            return
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps({'version': INDEX_CACHE_VERSION, 'entries': entries}), encoding='utf-8')
+        except OSError:
+            # El cache es una optimización; un .spa/ de solo lectura no debe romper el build
+            pass
@@ -0,0 +1,389 @@
+"""Hot reload selectivo para `spa project run-api --hot-reload`.
+
+`up_local_server` copia este archivo a `src/api_local/hot_reload.py` y `main_server.py`
+lo arranca cuando existe `SPA_HOT_RELOAD=1`. En lugar de reiniciar el intérprete ante
+cualquier cambio, un watcher traduce cada archivo modificado a lo que afecta:
+
+- `src/lambdas/<name>/*.py`: se descartan de `sys.modules` los módulos de ese lambda,
+  se vuelve a importar `lambda_function` y el handler se reemplaza en el router.
+- `src/lambdas/<name>/endpoint.yaml`: se vuelven a registrar solo las rutas de ese lambda,
+  se re-escriben `openapi.json`/`openapi.snapshot` con su nueva definición (para `/docs`)
+  y se reconstruye la tabla de rutas aseguradas de `auth_bridge`.
+- `src/layers/<layer>/python/<pkg>/*.py`: se descarta el paquete `<pkg>` (y los paquetes
+  de layers que lo importan) y se recargan solo los lambdas que lo usan.
+
+El resto del proceso (otros lambdas, conexiones abiertas, el server) se mantiene.
+"""
+import ast
+import copy
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import FastAPI, Request, Response
+from fastapi.routing import APIRoute
+
+logger = logging.getLogger("uvicorn.error")
+
+SUPPORTED_METHODS = ("get", "post", "put", "patch", "delete", "head")
+POLL_INTERVAL = 1.0
+
+
+def _imported_roots(directory: Path) -> Set[str]:
+    """Paquetes de primer nivel que importan los `.py` bajo `directory`."""
+    roots: Set[str] = set()
+    for path in directory.rglob("*.py"):
+        if "__pycache__" in path.parts:
+            continue
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        except (OSError, SyntaxError, UnicodeDecodeError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                roots.update(alias.name.split(".")[0] for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                roots.add(node.module.split(".")[0])
+    return roots
+
+
+def _purge_modules(prefixes: Iterable[str]) -> int:
+    prefixes = tuple(prefixes)
+    doomed = [name for name in sys.modules
+              if any(name == prefix or name.startswith(prefix + ".") for prefix in prefixes)]
+    for name in doomed:
+        del sys.modules[name]
+    return len(doomed)
+
+
+class HotReloader:
+    def __init__(self, app: FastAPI, router_module: Any, prefix: str,
+                 lambdas_path: Path, layers_path: Path):
+        self.app = app
+        self.router_module = router_module
+        self.prefix = prefix
+        self.lambdas_path = lambdas_path.resolve()
+        self.layers_path = layers_path.resolve()
+        self.lambdas_package = ".".join(lambdas_path.parts)
+        self.layer_packages = self._scan_layer_packages()
+        self.lambda_imports: Dict[str, Set[str]] = {}
+        # Última definición (`endpoint.yaml`) de cada lambda ya incluida en openapi.json
+        self.definitions: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    # ── mapeo archivo → afectado ────────────────────────────────────────────
+
+    def _scan_layer_packages(self) -> Dict[str, Path]:
+        packages: Dict[str, Path] = {}
+        if not self.layers_path.exists():
+            return packages
+        for package_dir in sorted(self.layers_path.glob("*/python/*")):
+            if package_dir.is_dir() and "__" not in package_dir.name:
+                packages[package_dir.name] = package_dir
+        return packages
+
+    def _classify(self, path: Path) -> Optional[Tuple[str, str, str]]:
+        """`("lambda", name, kind)` o `("layer", paquete, kind)` para un archivo cambiado."""
+        path = path.resolve()
+        if "__pycache__" in path.parts or path.suffix in (".pyc", ".pyo"):
+            return None
+        try:
+            rel = path.relative_to(self.lambdas_path)
+            if len(rel.parts) >= 2:
+                kind = "routes" if rel.name == "endpoint.yaml" else "code" if path.suffix == ".py" else None
+                return ("lambda", rel.parts[0], kind) if kind else None
+            return None
+        except ValueError:
+            pass
+        try:
+            rel = path.relative_to(self.layers_path)
+        except ValueError:
+            return None
+        if len(rel.parts) >= 3 and rel.parts[1] == "python" and path.suffix == ".py":
+            return "layer", rel.parts[2].removesuffix(".py"), "code"
+        if rel.name == "requirements.txt":
+            logger.warning("[hot-reload] Cambió %s: ejecuta `spa project install` y reinicia run-api.", rel)
+        return None
+
+    def _lambda_imports(self, name: str) -> Set[str]:
+        if name not in self.lambda_imports:
+            self.lambda_imports[name] = _imported_roots(self.lambdas_path / name)
+        return self.lambda_imports[name]
+
+    def _dependent_layer_packages(self, package: str) -> Set[str]:
+        """`package` más los paquetes de layers que lo importan (transitivamente)."""
+        deps = {pkg: _imported_roots(path) if path.is_dir() else set()
+                for pkg, path in self.layer_packages.items()}
+        affected = {package}
+        changed = True
+        while changed:
+            changed = False
+            for pkg, imports in deps.items():
+                if pkg not in affected and imports & affected:
+                    affected.add(pkg)
+                    changed = True
+        return affected
+
+    # ── recarga ─────────────────────────────────────────────────────────────
+
+    def reload_lambda(self, name: str) -> bool:
+        module_prefix = f"{self.lambdas_package}.{name}"
+        _purge_modules([module_prefix])
+        self.lambda_imports.pop(name, None)
+        if not (self.lambdas_path / name / "lambda_function.py").exists():
+            return False
+        importlib.invalidate_caches()
+        try:
+            module = importlib.import_module(f"{module_prefix}.lambda_function")
+            handler = module.lambda_handler
+        except Exception:
+            logger.error("[hot-reload] Error importando %s; se mantiene el handler anterior:\n%s",
+                         name, traceback.format_exc())
+            return False
+        setattr(self.router_module, f"{name}_handler", handler)
+        handlers = getattr(self.router_module, "HANDLERS", None)
+        if isinstance(handlers, dict):
+            handlers[name] = handler
+        # Con SPA_LAMBDA_LIFECYCLE=1 las instancias del pool tienen el código anterior
+        lifecycle = sys.modules.get(self.router_module.__name__.rpartition(".")[0] + ".lambda_lifecycle")
+        if lifecycle is not None:
+            lifecycle.reset(name)
+        return True
+
+    def reload_layer_package(self, package: str) -> List[str]:
+        self.layer_packages = self._scan_layer_packages()
+        affected = self._dependent_layer_packages(package)
+        _purge_modules(affected)
+        importlib.invalidate_caches()
+        reloaded = []
+        for name in self._route_owners():
+            if self._lambda_imports(name) & affected and self.reload_lambda(name):
+                reloaded.append(name)
+        return reloaded
+
+    def _route_owners(self) -> List[str]:
+        handlers = getattr(self.router_module, "HANDLERS", None)
+        if isinstance(handlers, dict):
+            return sorted(handlers)
+        suffix = "_handler"
+        return sorted(attr[:-len(suffix)] for attr in vars(self.router_module)
+                      if attr.endswith(suffix) and callable(getattr(self.router_module, attr)))
+
+    def _read_definition(self, name: str) -> Dict[str, Any]:
+        endpoint_file = self.lambdas_path / name / "endpoint.yaml"
+        if not endpoint_file.exists():
+            return {}
+        import yaml
+
+        definition = yaml.safe_load(endpoint_file.read_text(encoding="utf-8")) or {}
+        return definition if isinstance(definition, dict) else {}
+
+    def remember_definitions(self) -> None:
+        """Definiciones con las que se generó `openapi.json` (antes de vigilar cambios)."""
+        for name in self._route_owners():
+            try:
+                self.definitions[name] = self._read_definition(name)
+            except Exception:
+                self.definitions[name] = {}
+
+    @staticmethod
+    def _routes_of(definition: Dict[str, Any]) -> List[Tuple[str, str]]:
+        routes = []
+        for path, methods in definition.items():
+            if not isinstance(methods, dict):
+                continue
+            routes.extend((method.upper(), path) for method in methods if method.lower() in SUPPORTED_METHODS)
+        return routes
+
+    def _make_endpoint(self, name: str, path: str):
+        router_module = self.router_module
+        handler_attr = f"{name}_handler"
+
+        async def endpoint(request: Request, response: Response):
+            return await router_module.dispatch(request, response, getattr(router_module, handler_attr),
+                                           path, name)
+
+        endpoint.__name__ = name
+        endpoint.__module__ = router_module.__name__
+        return endpoint
+
+    def update_routes(self, name: str) -> List[Tuple[str, str]]:
+        try:
+            definition = self._read_definition(name)
+        except Exception:
+            logger.error("[hot-reload] endpoint.yaml inválido en %s:\n%s", name, traceback.format_exc())
+            return []
+        routes = self._routes_of(definition)
+        self._register_routes(name, routes)
+        self.update_openapi(name, definition)
+        return routes
+
+    def _register_routes(self, name: str, routes: List[Tuple[str, str]]) -> None:
+        if routes and not hasattr(self.router_module, f"{name}_handler"):
+            self.reload_lambda(name)
+
+        asgi_router = getattr(self.router_module, "router", None)
+        if hasattr(asgi_router, "replace_routes"):
+            asgi_router.replace_routes(name, routes)
+            return
+
+        api_router = self.router_module.router
+        if any(getattr(route, "original_router", None) is api_router for route in self.app.router.routes):
+            # FastAPI resuelve el router incluido de forma diferida: basta con editar el original
+            self._replace_api_routes(api_router, "", name, routes)
+        else:
+            # FastAPI copia las rutas al incluir el router: se editan las copias con prefijo
+            self._replace_api_routes(self.app.router, self.prefix, name, routes)
+        if not routes and hasattr(self.router_module, f"{name}_handler"):
+            delattr(self.router_module, f"{name}_handler")
+
+    def _replace_api_routes(self, api_router: Any, prefix: str, name: str,
+                            routes: List[Tuple[str, str]]) -> None:
+        """Reemplaza las rutas de `name` en `api_router` manteniendo su posición."""
+        module_name = self.router_module.__name__
+        current = list(api_router.routes)
+        owned = {i for i, route in enumerate(current)
+                 if isinstance(route, APIRoute) and route.endpoint.__module__ == module_name
+                 and route.endpoint.__name__ == name}
+        position = min(owned) if owned else len(current)
+        kept = [route for i, route in enumerate(current) if i not in owned]
+        api_router.routes[:] = kept[:position]
+        for method, path in routes:
+            api_router.add_api_route(prefix + path, self._make_endpoint(name, path), methods=[method])
+        api_router.routes.extend(kept[position:])
+        if hasattr(api_router, "_mark_routes_changed"):
+            api_router._mark_routes_changed()
+
+    def _api_local_module(self, module: str) -> Any:
+        return sys.modules.get(self.router_module.__name__.rpartition(".")[0] + "." + module)
+
+    def update_openapi(self, name: str, definition: Dict[str, Any]) -> None:
+        """Aplica la nueva definición de `name` a `openapi.json`/`openapi.snapshot` y recarga
+        lo que se calculó de ellos al arrancar: el schema de `/docs` y las rutas de `auth_bridge`."""
+        snapshot = self._api_local_module("openapi_snapshot")
+        if snapshot is None:
+            return
+        directory = Path(snapshot.__file__).parent
+        try:
+            spec = copy.deepcopy(snapshot.load_schema(directory))
+            index = snapshot.load_index(directory)
+        except Exception:
+            logger.warning("[hot-reload] No se pudo leer openapi.json; /docs y auth_bridge no verán "
+                           "los cambios de %s hasta reiniciar run-api.", name)
+            return
+        paths = spec.setdefault("paths", {})
+        for path, methods in self.definitions.get(name, {}).items():
+            current = paths.get(path)
+            if isinstance(current, dict) and isinstance(methods, dict):
+                for key in methods:
+                    current.pop(key, None)
+                if not current:
+                    del paths[path]
+        for path, methods in definition.items():
+            if isinstance(paths.get(path), dict) and isinstance(methods, dict):
+                paths[path].update(copy.deepcopy(methods))
+            else:
+                paths[path] = copy.deepcopy(methods)
+        (directory / snapshot.OPENAPI_NAME).write_text(json.dumps(spec, separators=(",", ":")), encoding="utf-8")
+        if index is not None:
+            snapshot.write_snapshot(directory / snapshot.SNAPSHOT_NAME, spec, index.get("authorizers"))
+        snapshot.invalidate(directory)
+        self.definitions[name] = definition
+        self.app.openapi_schema = None
+
+        auth_bridge = self._api_local_module("auth_bridge")
+        if auth_bridge is not None and not auth_bridge.reload_security():
+            logger.warning("[hot-reload] %s declara rutas con `security` pero auth_bridge no registró su "
+                           "middleware al arrancar: reinicia run-api para protegerlas.", name)
+
+    def handle_changes(self, paths: Iterable[Path]) -> None:
+        lambdas_code: Set[str] = set()
+        lambdas_routes: Set[str] = set()
+        layer_packages: Set[str] = set()
+        for path in paths:
+            classified = self._classify(Path(path))
+            if classified is None:
+                continue
+            scope, name, kind = classified
+            if scope == "layer":
+                layer_packages.add(name)
+            elif kind == "routes":
+                lambdas_routes.add(name)
+            else:
+                lambdas_code.add(name)
+
+        with self._lock:
+            started = time.perf_counter()
+            done: List[str] = []
+            for package in sorted(layer_packages):
+                reloaded = self.reload_layer_package(package)
+                lambdas_code -= set(reloaded)
+                done.append(f"layer {package} → {', '.join(reloaded) or 'sin lambdas afectados'}")
+            for name in sorted(lambdas_code):
+                if name in self._route_owners() and self.reload_lambda(name):
+                    done.append(f"lambda {name}")
+            for name in sorted(lambdas_routes):
+                routes = self.update_routes(name)
+                done.append(f"rutas {name} ({len(routes)})")
+            if done:
+                elapsed = (time.perf_counter() - started) * 1000
+                logger.info("[hot-reload] %s en %.0f ms", "; ".join(done), elapsed)
+
+    # ── watcher ─────────────────────────────────────────────────────────────
+
+    def watch(self, stop: threading.Event) -> None:
+        self.remember_definitions()
+        paths = [str(p) for p in (self.lambdas_path, self.layers_path) if p.exists()]
+        try:
+            from watchfiles import watch
+        except ImportError:
+            watch = None
+        if watch is not None:
+            for changes in watch(*paths, stop_event=stop, raise_interrupt=False):
+                self.handle_changes(Path(path) for _, path in changes)
+            return
+        self._poll(paths, stop)
+
+    def _poll(self, paths: List[str], stop: threading.Event) -> None:
+        def snapshot() -> Dict[str, float]:
+            mtimes = {}
+            for root in paths:
+                for dirpath, dirnames, filenames in os.walk(root):
+                    dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+                    for filename in filenames:
+                        full = os.path.join(dirpath, filename)
+                        try:
+                            mtimes[full] = os.stat(full).st_mtime_ns
+                        except OSError:
+                            pass
+            return mtimes
+
+        previous = snapshot()
+        while not stop.wait(POLL_INTERVAL):
+            current = snapshot()
+            changed = {p for p in current.keys() | previous.keys() if current.get(p) != previous.get(p)}
+            previous = current
+            if changed:
+                self.handle_changes(Path(p) for p in changed)
+
+
+def start_hot_reload(app: FastAPI, router_module: Any, prefix: str) -> HotReloader:
+    """Arranca el watcher en un thread daemon y lo detiene con el shutdown de la app."""
+    reloader = HotReloader(
+        app, router_module, prefix,
+        Path(os.getenv("SPA_LAMBDAS_PATH", "src/lambdas")),
+        Path(os.getenv("SPA_LAYERS_PATH", "src/layers")),
+    )
+    stop = threading.Event()
+    thread = threading.Thread(target=reloader.watch, args=(stop,), name="spa-hot-reload", daemon=True)
+    thread.start()
+    app.router.on_shutdown.append(stop.set)
+    logger.info("[hot-reload] Vigilando %s y %s", reloader.lambdas_path, reloader.layers_path)
+    return reloader
@@ -6,8 +6,14 @@ import subprocess
 from glob import glob
 from pathlib import Path
 from shutil import copytree, rmtree
+from typing import Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ...globals import Config
+from .build_manifest import BuildManifest, sync_tree
+from .build_profile import phase, record_cpu, record_io
+from .layer_cache import LayerCache, _tree_size, link_tree, requirements_digest, requirements_key, scan_requirements
+from .link_mode import LinkMode, copy_tree
 
 
 LAYERS_VERSIONS = '1.0.0'
@@ -141,24 +147,170 @@ def install_layers(project_config: Config):
 
     typer.echo(f'Se han instalado las siguientes layers: {list(map(lambda l: l.name, layers))}')
 
-def build_layers(layers_path: Path, tmp_path: Path = Path('tmp_build_layer')):
-    if os.path.exists(tmp_path):
+def _run_captured(cmd) -> Tuple[int, str]:
+    """`subprocess.run` capturando stdout+stderr; con `os.wait4` también registra la CPU
+    del proceso en el perfil del build (desde un hilo secundario no se puede medir de otra forma)."""
+    if not hasattr(os, 'wait4'):
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        return proc.returncode, proc.stdout
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    with proc.stdout:
+        output = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    record_cpu(usage.ru_utime + usage.ru_stime)
+    return proc.returncode, output
+
+
+def _pip_install_layer(layer: str, req_path: Path, target_path: Path,
+                       cache: Optional[LayerCache] = None) -> Tuple[str, int, str, bool]:
+    """Instala el requirements de una layer en su carpeta `python/` capturando la salida.
+
+    Con `cache` primero busca una instalación previa del mismo requirements y la
+    enlaza; solo si no existe corre pip (dentro del cache) y la publica. Un requirements
+    con directorios locales se instala sin cache. Regresa
+    `(layer, código de salida, salida de pip, si vino del cache)`.
+    """
+    def pip_install(target: Path) -> Tuple[int, str]:
+        cmd = [sys.executable, "-m", "pip", "install",
+               "--no-input", "--disable-pip-version-check",
+               "-r", str(req_path), "-t", str(target)]
+        code, output = _run_captured(cmd)
+        if code == 0:
+            record_io(_tree_size(target), sum(len(files) for _, _, files in os.walk(target)))
+        return code, output
+
+    with phase(f'layer {layer}: dependencias', cat='layer'):
+        key = requirements_key(req_path) if cache is not None else None
+        if key is None:
+            return (layer, *pip_install(target_path), False)
+
+        cached = cache.get(key)
+        if cached is not None:
+            files = link_tree(cached, target_path)
+            return layer, 0, f'cache {key[:12]} ({files} archivos enlazados)', True
+
+        result = {}
+
+        def install(target: Path) -> bool:
+            result['code'], result['output'] = pip_install(target)
+            return result['code'] == 0
+
+        cached = cache.put(key, req_path, install)
+        if cached is None:
+            return layer, result.get('code', 1), result.get('output', ''), False
+        link_tree(cached, target_path)
+        return layer, 0, result['output'], False
+
+
+def _warn_uncached(layer: str, req_path: Path):
+    """Avisa cuando el cache no puede garantizar el mismo resultado que `pip install`."""
+    scan = scan_requirements(req_path)
+    if scan.local_dirs:
+        typer.echo(f'[!] Layer {layer}: instala directorios locales ({", ".join(scan.local_dirs)}); '
+                   'se instala sin cache.', color=typer.colors.YELLOW)
+    elif scan.unpinned:
+        typer.echo(f'[!] Layer {layer}: dependencias sin versión fija ({", ".join(scan.unpinned)}); el cache '
+                   'reutiliza lo instalado la primera vez. Fíjalas con == o ejecuta `spa cache prune --all`.',
+                   color=typer.colors.YELLOW)
+
+
+def build_layers(layers_path: Path, tmp_path: Path = Path('tmp_build_layer'), manifest: Optional[BuildManifest] = None,
+                 jobs: Optional[int] = None, cache: Optional[LayerCache] = None,
+                 link_mode: LinkMode = LinkMode.COPY):
+    """Copia cada layer a `tmp_path` e instala su `requirements.txt` dentro de `python/`.
+
+    Con `manifest` el build es incremental: solo se re-copian los archivos que
+    cambiaron, `pip install` corre únicamente si cambió el `requirements.txt` y se
+    eliminan las layers cuya fuente ya no existe.
+
+    Las instalaciones son independientes entre layers, así que corren en paralelo
+    (a lo más `jobs` procesos de pip a la vez, por default uno por CPU). La salida de
+    cada pip se captura por separado; si alguna falla se aborta el build.
+
+    Con `cache` las dependencias se toman del cache local de layers cuando el
+    `requirements.txt` ya fue instalado antes (ver `layer_cache.py`).
+    """
+    if manifest is None and os.path.exists(tmp_path):
         rmtree(tmp_path)
 
     if not os.path.exists(tmp_path):
         os.mkdir(tmp_path)
 
-    for layer in tqdm.tqdm(os.listdir(layers_path)):
+    current_layers = []
+    pending: Dict[str, Tuple[Path, Path, str]] = {}
+    for layer in sorted(os.listdir(layers_path)):
         layer_path = layers_path.joinpath(layer)
         if not layer_path.is_dir():
             continue  
+        current_layers.append(layer)
 
-        copytree(layer_path, tmp_path.joinpath(layer))
+        with phase(f'layer {layer}: copia', cat='layer'):
+            req_source = layer_path.joinpath('python').joinpath('requirements.txt')
+            req_hash = requirements_digest(req_source) if req_source.exists() else ''
 
-        layer_path_res = str(tmp_path.joinpath(layer).joinpath('python').resolve())
-        req_path = str(tmp_path.joinpath(layer).joinpath('python').joinpath('requirements.txt').resolve())
-        try:
-            typer.echo(f'running command: pip install -r {req_path} -t {layer_path_res}')
-            os.system(f'pip install -r {req_path} -t {layer_path_res}')
-        except Exception as e:
-            typer.echo(f"WARNING: {str(e)}", color=typer.colors.YELLOW)
+            if manifest is None:
+                copy_tree(layer_path, tmp_path.joinpath(layer), link_mode)
+            else:
+                req_changed = manifest.step(f'layers/{layer}/requirements') != req_hash
+                if req_changed and tmp_path.joinpath(layer).exists():
+                    # Las dependencias instaladas cambiaron: se parte de una layer limpia
+                    rmtree(tmp_path.joinpath(layer))
+                copied, removed = sync_tree(layer_path, tmp_path.joinpath(layer), manifest, f'layers/{layer}',
+                                            force=req_changed, link_mode=link_mode)
+                if not req_changed:
+                    typer.echo(f'Layer {layer} sin cambios en requirements ({copied} copiados, {removed} eliminados), se omite pip install.')
+                    continue
+
+            if not req_source.exists():
+                typer.echo(f'Layer {layer} sin requirements.txt, se omite pip install.')
+                if manifest is not None:
+                    manifest.set_step(f'layers/{layer}/requirements', req_hash)
+                continue
+
+            layer_path_res = tmp_path.joinpath(layer).joinpath('python').resolve()
+            req_path = layer_path_res.joinpath('requirements.txt')
+            pending[layer] = (req_path, layer_path_res, req_hash)
+            if cache is not None:
+                _warn_uncached(layer, req_path)
+
+    if manifest is not None:
+        for key in manifest.keys('layers/'):
+            layer = key.split('/')[1]
+            if layer in current_layers:
+                continue
+            if tmp_path.joinpath(layer).exists():
+                rmtree(tmp_path.joinpath(layer))
+                typer.echo(f'Layer eliminada del build: {layer}')
+            manifest.drop(key)
+
+    if not pending:
+        return
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+    typer.echo(f'Instalando dependencias de {len(pending)} layer(s) con {jobs} proceso(s) en paralelo...')
+    failed = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(_pip_install_layer, layer, req_path, target_path, cache)
+            for layer, (req_path, target_path, _) in pending.items()
+        ]
+        for future in tqdm.tqdm(as_completed(futures), total=len(futures)):
+            if future.cancelled():
+                continue
+            layer, exit_code, output, from_cache = future.result()
+            if exit_code != 0:
+                failed.append(layer)
+                typer.echo(f'\n[!] pip install falló para la layer {layer} (código {exit_code}):\n{output}', color=typer.colors.RED)
+                executor.shutdown(wait=False, cancel_futures=True)
+                continue
+            if from_cache:
+                typer.echo(f'[✓] Layer {layer}: dependencias tomadas del {output}')
+            else:
+                typer.echo(f'[✓] Layer {layer}: dependencias instaladas en {pending[layer][1]}')
+            if manifest is not None:
+                manifest.set_step(f'layers/{layer}/requirements', pending[layer][2])
+
+    if failed:
+        typer.echo(f'Build abortado: falló la instalación de las layers {failed}', color=typer.colors.RED)
+        raise typer.Exit(code=1)
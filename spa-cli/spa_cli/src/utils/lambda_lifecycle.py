@@ -0,0 +1,392 @@
+"""Contexto por función y ciclo de vida de Lambda emulado para el router generado.
+
+`build_local_api` copia este archivo a `src/api_local/lambda_lifecycle.py` y el router
+generado registra con `configure()` lo que aplica al runtime de `[spa.lambdas.<lambda>]`
+(los mismos argumentos que recibe el stack de Pulumi):
+
+- `timeout` (segundos, default 3 como en AWS) y `memory_size` (MB, default 128): cada
+  invocación recibe un `LambdaContext` con el nombre, ARN y memoria de su función y un
+  `get_remaining_time_in_millis()` que corre desde que empieza la invocación;
+- `reserved_concurrent_executions`: instancias simultáneas máximas del lambda;
+- `provisioned_concurrent_executions`: instancias que se inicializan al arrancar.
+
+Los dos últimos solo aplican con `SPA_LAMBDA_LIFECYCLE=1`. En ese modo cada lambda tiene
+un pool de instancias en lugar de compartir el módulo importado por el router:
+
+- una instancia nueva ejecuta `lambda_function.py` en un módulo propio (su código de
+  inicialización corre otra vez: cold start). Los demás módulos del lambda y las layers
+  se importan una sola vez por proceso, así que el init medido es el de `lambda_function.py`;
+- una instancia atiende una invocación a la vez y vuelve al pool al terminar (warm start);
+- al llegar al límite de concurrencia reservada el request espera una instancia libre
+  (queueing delay) en lugar de crear otra. Lambda real responde 429 (throttling) en ese
+  caso: `SPA_LAMBDA_THROTTLE=1` hace lo mismo. Con límite 0 siempre responde 429;
+- una invocación que excede `timeout` responde 500, como API Gateway ante un error del
+  lambda, y su instancia se descarta. Un handler async se cancela; uno síncrono no se
+  puede interrumpir y sigue en su hilo, ocupando su lugar en la concurrencia reservada
+  (y un hilo de `SPA_HANDLER_THREADS`) hasta que termina;
+- con `SPA_LAMBDA_IDLE_SECONDS` las instancias on-demand sin uso por ese tiempo se descartan.
+
+Por función se cuentan cold/warm starts, tiempo de init, requests encolados y su espera,
+throttles, timeouts y la concurrencia máxima. `stats()` los regresa (también en `/` de
+`main_server.py`), se exportan en `/metrics` si están activas y al terminar el proceso se
+imprime un resumen (`SPA_LAMBDA_REPORT=0` lo desactiva).
+
+NO EDITAR la copia en `src/api_local`: se regenera con cada `run-api`/`build`.
+"""
+import asyncio
+import atexit
+import importlib.util
+import inspect
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    from src.api_local import metrics
+except ImportError:
+    metrics = None
+
+ENABLED = os.getenv("SPA_LAMBDA_LIFECYCLE", "").lower() in ("1", "true", "yes")
+IDLE_SECONDS = float(os.getenv("SPA_LAMBDA_IDLE_SECONDS") or 0)
+THROTTLE = os.getenv("SPA_LAMBDA_THROTTLE", "").lower() in ("1", "true", "yes")
+LAMBDAS_PACKAGE = "src.lambdas"
+DEFAULT_TIMEOUT = 3
+DEFAULT_MEMORY_SIZE = 128
+
+# Lo que API Gateway responde cuando el lambda falla (aquí: cuando excede su timeout)
+TIMEOUT_RESPONSE = {
+    "statusCode": 500,
+    "headers": {"Content-Type": "application/json"},
+    "body": '{"message":"Internal Server Error"}',
+}
+# Invocación rechazada por concurrencia reservada (siempre con reserved_concurrent_executions = 0)
+THROTTLED_RESPONSE = {
+    "statusCode": 429,
+    "headers": {"Content-Type": "application/json"},
+    "body": '{"message":"Too Many Requests"}',
+}
+
+logger = logging.getLogger("spa.lambda")
+
+Runner = Callable[[Callable, Dict[str, Any], Any], Awaitable[Any]]
+
+
+@dataclass
+class FunctionSettings:
+    name: str
+    function_name: str
+    timeout: float = DEFAULT_TIMEOUT
+    memory_size: int = DEFAULT_MEMORY_SIZE
+    reserved: Optional[int] = None
+    provisioned: int = 0
+    region: str = "us-east-1"
+    account: str = "123456789012"
+
+    @property
+    def arn(self) -> str:
+        return f"arn:aws:lambda:{self.region}:{self.account}:function:{self.function_name}"
+
+
+def _log_stream_name() -> str:
+    return time.strftime("%Y/%m/%d/[$LATEST]", time.gmtime()) + uuid.uuid4().hex
+
+
+class LambdaContext:
+    """Contexto de una invocación con los datos de la función que la atiende."""
+
+    def __init__(self, function: FunctionSettings, aws_request_id: Optional[str] = None,
+                 log_stream_name: Optional[str] = None):
+        self.function_name = function.function_name
+        self.function_version = "$LATEST"
+        self.invoked_function_arn = function.arn
+        self.memory_limit_in_mb = str(function.memory_size)
+        self.log_group_name = f"/aws/lambda/{function.function_name}"
+        self.log_stream_name = log_stream_name or _log_stream_name()
+        self.aws_request_id = aws_request_id or str(uuid.uuid4())
+        self.identity = None
+        self.client_context = None
+        self._deadline = time.monotonic() + function.timeout
+
+    def get_remaining_time_in_millis(self) -> int:
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+@dataclass
+class FunctionStats:
+    invocations: int = 0
+    cold_starts: int = 0
+    warm_starts: int = 0
+    provisioned_inits: int = 0
+    init_seconds: float = 0.0
+    init_max_seconds: float = 0.0
+    queued: int = 0
+    queue_seconds: float = 0.0
+    queue_max_seconds: float = 0.0
+    throttled: int = 0
+    timeouts: int = 0
+    peak_concurrency: int = 0
+
+
+class Instance:
+    __slots__ = ("handler", "log_stream_name", "provisioned", "generation", "last_used")
+
+    def __init__(self, handler: Callable, provisioned: bool, generation: int):
+        self.handler = handler
+        self.log_stream_name = _log_stream_name()
+        self.provisioned = provisioned
+        self.generation = generation
+        self.last_used = time.monotonic()
+
+
+def _load_handler(name: str) -> Callable:
+    """Ejecuta `lambda_function.py` del lambda en un módulo nuevo (fuera de `sys.modules`)."""
+    module_name = f"{LAMBDAS_PACKAGE}.{name}.lambda_function"
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.origin is None:
+        raise ImportError(f"No se encontró {module_name}")
+    fresh = importlib.util.spec_from_file_location(module_name, spec.origin)
+    module = importlib.util.module_from_spec(fresh)
+    fresh.loader.exec_module(module)
+    return module.lambda_handler
+
+
+class FunctionPool:
+    """Instancias de un lambda. Solo se usa desde el event loop del worker: sin locks."""
+
+    def __init__(self, settings: FunctionSettings):
+        self.settings = settings
+        self.stats = FunctionStats()
+        self.idle: List[Instance] = []
+        self.size = 0
+        self.busy = 0
+        self.generation = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+    def _create(self, provisioned: bool = False) -> Instance:
+        return Instance(_load_handler(self.settings.name), provisioned, self.generation)
+
+    def provision(self):
+        for _ in range(self.settings.provisioned):
+            started = time.perf_counter()
+            self.idle.append(self._create(provisioned=True))
+            self.size += 1
+            self.stats.provisioned_inits += 1
+            self.stats.init_seconds += time.perf_counter() - started
+
+    def _reap_idle(self):
+        deadline = time.monotonic() - IDLE_SECONDS
+        kept = [instance for instance in self.idle if instance.provisioned or instance.last_used > deadline]
+        self.size -= len(self.idle) - len(kept)
+        self.idle = kept
+
+    async def _cold_start(self) -> Instance:
+        started = time.perf_counter()
+        try:
+            instance = await asyncio.get_running_loop().run_in_executor(None, self._create)
+        except BaseException:
+            self._free_slot()
+            raise
+        elapsed = time.perf_counter() - started
+        self.stats.cold_starts += 1
+        self.stats.init_seconds += elapsed
+        self.stats.init_max_seconds = max(self.stats.init_max_seconds, elapsed)
+        _observe("spa_lambda_init_duration_seconds", self.settings.name, elapsed)
+        return instance
+
+    async def acquire(self) -> Tuple[Instance, bool]:
+        """Instancia para una invocación y si fue cold start."""
+        if IDLE_SECONDS:
+            self._reap_idle()
+        waited = 0.0
+        cold = False
+        if self.idle:
+            instance = self.idle.pop()
+        elif self.settings.reserved is None or self.size < self.settings.reserved:
+            self.size += 1
+            instance, cold = await self._cold_start(), True
+        else:
+            started = time.perf_counter()
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                instance = await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Ya se le había asignado una instancia (o un lugar libre): se devuelve
+                    if waiter.result() is None:
+                        self._free_slot()
+                    else:
+                        self._return(waiter.result())
+                raise
+            waited = time.perf_counter() - started
+            self.stats.queued += 1
+            self.stats.queue_seconds += waited
+            self.stats.queue_max_seconds = max(self.stats.queue_max_seconds, waited)
+            if instance is None:
+                # Una instancia se descartó y dejó su lugar libre
+                instance, cold = await self._cold_start(), True
+        if not cold:
+            self.stats.warm_starts += 1
+        _observe("spa_lambda_queue_seconds", self.settings.name, waited)
+        _inc("spa_lambda_invocations_total", self.settings.name, "cold" if cold else "warm")
+        self.stats.invocations += 1
+        self.busy += 1
+        self.stats.peak_concurrency = max(self.stats.peak_concurrency, self.busy)
+        return instance, cold
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                return waiter
+        return None
+
+    def _return(self, instance: Instance):
+        waiter = self._next_waiter()
+        if waiter is not None:
+            waiter.set_result(instance)
+        else:
+            instance.last_used = time.monotonic()
+            self.idle.append(instance)
+
+    def _free_slot(self):
+        waiter = self._next_waiter()
+        if waiter is not None:
+            waiter.set_result(None)  # el lugar pasa al request en espera
+        else:
+            self.size -= 1
+
+    def release(self, instance: Instance, discard: bool = False):
+        self.busy -= 1
+        if discard or instance.generation != self.generation:
+            self._free_slot()
+        else:
+            self._return(instance)
+
+    def reset(self):
+        """Descarta las instancias (las ocupadas al terminar su invocación); `hot_reload` lo usa."""
+        self.generation += 1
+        self.size -= len(self.idle)
+        self.idle.clear()
+
+    async def invoke(self, event: Dict[str, Any], aws_request_id: str, run: Runner) -> Any:
+        reserved = self.settings.reserved
+        if reserved == 0 or (THROTTLE and reserved is not None and not self.idle and self.size >= reserved):
+            self.stats.throttled += 1
+            _inc("spa_lambda_throttles_total", self.settings.name)
+            return THROTTLED_RESPONSE
+        instance, _cold = await self.acquire()
+        context = LambdaContext(self.settings, aws_request_id, instance.log_stream_name)
+        timed_out = False
+
+        def finished(task: asyncio.Future):
+            if not task.cancelled():
+                task.exception()  # ya se propagó al request, o este ya respondió por timeout
+            self.release(instance, discard=timed_out)
+
+        # La instancia ocupa su lugar hasta que el handler termina de verdad, no hasta que
+        # se responde: un handler síncrono que excede el timeout sigue corriendo en su hilo
+        task = asyncio.ensure_future(run(instance.handler, event, context))
+        task.add_done_callback(finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.settings.timeout)
+        except asyncio.TimeoutError:
+            # Lambda termina la invocación y descarta el entorno de ejecución
+            timed_out = True
+            self.stats.timeouts += 1
+            _inc("spa_lambda_timeouts_total", self.settings.name)
+            logger.error("%s Task timed out after %.2f seconds", aws_request_id, self.settings.timeout)
+            if inspect.iscoroutinefunction(instance.handler):
+                task.cancel()
+            return TIMEOUT_RESPONSE
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "reserved": self.settings.reserved,
+            "provisioned": self.settings.provisioned,
+            "instances": self.size,
+            "busy": self.busy,
+            **asdict(self.stats),
+        }
+
+
+_functions: Dict[str, FunctionSettings] = {}
+_pools: Dict[str, FunctionPool] = {}
+
+
+def _observe(name: str, function: str, value: float):
+    if metrics is not None and metrics.registry is not None:
+        metrics.registry.observe(name, (function,), value)
+
+
+def _inc(name: str, function: str, *labels: str):
+    if metrics is not None and metrics.registry is not None:
+        metrics.registry.inc(name, (function, *labels))
+
+
+def configure(settings: Dict[str, Dict[str, Any]]):
+    """Registra los valores por lambda que genera `build_local_api` (ver docstring del módulo)."""
+    for name, values in settings.items():
+        function = _functions[name] = FunctionSettings(name=name, **values)
+        if ENABLED:
+            _pools[name] = pool = FunctionPool(function)
+            pool.provision()
+    if ENABLED and os.getenv("SPA_LAMBDA_REPORT", "1") != "0":
+        atexit.register(print_report)
+
+
+def function_settings(name: str) -> FunctionSettings:
+    function = _functions.get(name)
+    if function is None:
+        function = _functions[name] = FunctionSettings(name=name, function_name=name)
+    return function
+
+
+def get_pool(name: str) -> Optional[FunctionPool]:
+    """Pool del lambda si `SPA_LAMBDA_LIFECYCLE` está activo (`None` si no)."""
+    if not ENABLED:
+        return None
+    pool = _pools.get(name)
+    if pool is None:
+        pool = _pools[name] = FunctionPool(function_settings(name))
+    return pool
+
+
+def reset(name: str):
+    pool = _pools.get(name)
+    if pool is not None:
+        pool.reset()
+
+
+def stats() -> Optional[Dict[str, Dict[str, Any]]]:
+    if not ENABLED:
+        return None
+    return {name: pool.report() for name, pool in sorted(_pools.items())}
+
+
+def _ms(seconds: float, count: int = 1) -> str:
+    return f"{seconds / count * 1000:.1f}" if count else "-"
+
+
+def print_report(file=None):
+    """Tabla por lambda de cold/warm starts, espera en cola y concurrencia máxima."""
+    pools = [(name, pool) for name, pool in sorted(_pools.items()) if pool.stats.invocations]
+    if not pools:
+        return
+    file = file or sys.stderr
+    print(f"[lambdas pid={os.getpid()}] {'lambda':<24} {'invoc':>7} {'cold':>5} {'warm':>7} {'init ms':>8} "
+          f"{'init max':>8} {'encolados':>9} {'espera ms':>9} {'espera max':>10} {'pico':>5} {'reserved':>8} "
+          f"{'429':>5} {'timeouts':>8}", file=file)
+    for name, pool in pools:
+        st = pool.stats
+        inits = st.cold_starts + st.provisioned_inits
+        reserved = pool.settings.reserved if pool.settings.reserved is not None else "-"
+        print(f"[lambdas pid={os.getpid()}] {name[:24]:<24} {st.invocations:>7} {st.cold_starts:>5} "
+              f"{st.warm_starts:>7} {_ms(st.init_seconds, inits):>8} {_ms(st.init_max_seconds):>8} {st.queued:>9} "
+              f"{_ms(st.queue_seconds, st.queued):>9} {_ms(st.queue_max_seconds):>10} {st.peak_concurrency:>5} "
+              f"{reserved:>8} {st.throttled:>5} {st.timeouts:>8}", file=file)
@@ -0,0 +1,270 @@
+"""Perfil de cold start por lambda (`spa lambda profile`).
+
+Cada lambda se importa en un subproceso nuevo con `-X importtime` y con las layers
+en el path, igual que en el runtime de Lambda (`lambda_function` en la raíz). El
+subproceso mide el import de `lambda_function` y la primera llamada al handler
+(solo con un evento `GET`/`HEAD` o el de `--event`: las demás rutas pueden escribir);
+el proceso padre interpreta el reporte de `importtime` y atribuye el tiempo de
+cada paquete a la layer (o al lambda, stdlib o site-packages) de donde viene.
+"""
+import json
+import os
+import subprocess
+import sys
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .endpoint_index import EndpointIndex
+
+START_MARKER = "spa-profile:start"
+END_MARKER = "spa-profile:end"
+RESULT_PREFIX = "spa-profile:result "
+DEFAULT_TIMEOUT = 60
+HTTP_METHODS = ("get", "head", "post", "put", "patch", "delete", "options")
+# Métodos que `sample_event` invoca por su cuenta (sin efectos secundarios)
+SAMPLE_METHODS = ("get", "head")
+
+# Corre dentro del subproceso. Todo lo que importa el probe ocurre antes del marcador
+# de inicio, así el reporte de importtime solo contiene lo que importa el lambda.
+PROBE = r'''
+import json, sys, time, traceback
+event = json.loads(sys.argv[1])
+before = set(sys.modules)
+sys.stderr.write("{start}\n"); sys.stderr.flush()
+result = {{"ok": False, "import_ms": None, "first_call_ms": None, "error": None}}
+started = time.perf_counter()
+try:
+    import lambda_function
+    result["import_ms"] = (time.perf_counter() - started) * 1000
+    sys.stderr.write("{end}\n"); sys.stderr.flush()
+
+    if event is None:
+        # Solo rutas que escriben: se mide el import sin invocar el handler
+        result["ok"] = True
+    else:
+        class Context:
+            function_name = sys.argv[2]
+            function_version = "$LATEST"
+            memory_limit_in_mb = 128
+            aws_request_id = "spa-profile"
+            invoked_function_arn = "arn:aws:lambda:local:000000000000:function:" + sys.argv[2]
+            log_group_name = "/aws/lambda/" + sys.argv[2]
+            log_stream_name = "spa-profile"
+
+            def get_remaining_time_in_millis(self):
+                return 30000
+
+        call_started = time.perf_counter()
+        response = lambda_function.lambda_handler(event, Context())
+        result["first_call_ms"] = (time.perf_counter() - call_started) * 1000
+        status = response.get("statusCode", 200) if isinstance(response, dict) else 200
+        result["status_code"] = status
+        result["ok"] = not (isinstance(status, int) and status >= 500)
+except BaseException:
+    if result["import_ms"] is None:
+        sys.stderr.write("{end}\n"); sys.stderr.flush()
+    result["error"] = traceback.format_exc(limit=3).strip().splitlines()[-1]
+origins = {{}}
+for name in set(sys.modules) - before:
+    root = name.split(".")[0]
+    module = sys.modules.get(root)
+    if root not in origins and module is not None:
+        origins[root] = getattr(module, "__file__", None) or ""
+result["origins"] = origins
+print("{result}" + json.dumps(result))
+'''.format(start=START_MARKER, end=END_MARKER, result=RESULT_PREFIX)
+
+
+@dataclass
+class ModuleCost:
+    module: str
+    self_ms: float
+    origin: str
+
+
+@dataclass
+class LambdaProfile:
+    name: str
+    ok: bool
+    import_ms: Optional[float] = None
+    first_call_ms: Optional[float] = None
+    cold_start_ms: Optional[float] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    skipped_call: Optional[str] = None  # ruta que no se invocó por no ser GET/HEAD
+    modules: List[ModuleCost] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Suma el tiempo propio (`self`, en ms) por paquete raíz entre los marcadores del probe."""
+    totals: Dict[str, float] = {}
+    inside = False
+    for line in stderr.splitlines():
+        if line == START_MARKER:
+            inside = True
+            continue
+        if line == END_MARKER:
+            break
+        if not inside or not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # encabezado "self [us] | cumulative | imported package"
+        root = parts[2].strip().split(".")[0]
+        totals[root] = totals.get(root, 0.0) + int(parts[0]) / 1000
+    return totals
+
+
+def layer_python_paths(project_path: Path, layers_path: Path) -> List[Tuple[str, Path]]:
+    """`(layer, carpeta python/)` de cada layer; usa la del último build si existe (trae dependencias)."""
+    built = project_path / "build" / "tmp_build_layer"
+    paths = []
+    if not layers_path.exists():
+        return paths
+    for layer in sorted(os.listdir(layers_path)):
+        if "__" in layer or not (layers_path / layer).is_dir():
+            continue
+        python_dir = built / layer / "python"
+        if not python_dir.is_dir():
+            python_dir = layers_path / layer / "python"
+        paths.append((layer, python_dir))
+    return paths
+
+
+def classify_origin(file: Optional[str], lambda_path: Path, layers: List[Tuple[str, Path]]) -> str:
+    if file is None:
+        return "?"  # el import falló
+    if not file:
+        return "stdlib"  # módulo builtin o frozen
+    path = Path(file).resolve()
+    if path.is_relative_to(lambda_path.resolve()):
+        return "lambda"
+    for layer, python_dir in layers:
+        if path.is_relative_to(python_dir.resolve()):
+            return f"layer:{layer}"
+    if path.is_relative_to(Path(sysconfig.get_paths()["stdlib"]).resolve()) and "site-packages" not in path.parts:
+        return "stdlib"
+    return "site-packages"
+
+
+def first_route(index: EndpointIndex, name: str) -> Tuple[str, str]:
+    """`(METHOD, path)` de la primera ruta `GET`/`HEAD` del lambda; si no tiene, la primera
+    que declare (o `GET /` si no tiene endpoint)."""
+    routes = []
+    entry = index.get(name)
+    if entry is not None:
+        for route_path, methods in entry.definition.items():
+            if isinstance(methods, dict):
+                routes.extend((method.upper(), route_path) for method in methods if method.lower() in HTTP_METHODS)
+    return next((route for route in routes if route[0].lower() in SAMPLE_METHODS),
+                routes[0] if routes else ("GET", "/"))
+
+
+def sample_event(index: EndpointIndex, name: str) -> Optional[Dict[str, Any]]:
+    """Evento API Gateway v2 mínimo para la primera ruta `GET`/`HEAD` del lambda.
+
+    `None` si solo declara rutas con otros métodos: invocarlas podría escribir datos,
+    así que solo se mide el import (o se usa el evento de `--event`).
+    """
+    method, path = first_route(index, name)
+    if method.lower() not in SAMPLE_METHODS:
+        return None
+    return {
+        "version": "2.0",
+        "routeKey": f"{method} {path}",
+        "rawPath": path,
+        "rawQueryString": "",
+        "headers": {},
+        "queryStringParameters": None,
+        "pathParameters": None,
+        "body": None,
+        "isBase64Encoded": False,
+        "requestContext": {
+            "http": {"method": method, "path": path, "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1",
+                     "userAgent": "spa-profile"},
+            "requestId": "spa-profile",
+            "routeKey": f"{method} {path}",
+            "stage": "$default",
+        },
+    }
+
+
+def profile_lambda(name: str, lambdas_path: Path, layers: List[Tuple[str, Path]],
+                   event: Optional[Dict[str, Any]], top: int = 5, timeout: int = DEFAULT_TIMEOUT) -> LambdaProfile:
+    lambda_path = lambdas_path / name
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join([str(lambda_path)] + [str(path) for _, path in layers])
+    # Cold start real: sin .pyc escritos por ejecuciones anteriores del probe
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE, json.dumps(event), name],
+            cwd=lambda_path, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return LambdaProfile(name=name, ok=False, error=f"timeout después de {timeout}s")
+
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            result = json.loads(line[len(RESULT_PREFIX):])
+    if result is None:
+        tail = proc.stderr.strip().splitlines()[-1:] or [f"código de salida {proc.returncode}"]
+        return LambdaProfile(name=name, ok=False, error=tail[0])
+
+    origins = result.pop("origins", {})
+    costs = parse_importtime(proc.stderr)
+    costs.pop("lambda_function", None)
+    modules = [
+        ModuleCost(module, round(ms, 2), classify_origin(origins.get(module), lambda_path, layers))
+        for module, ms in sorted(costs.items(), key=lambda item: item[1], reverse=True)[:top]
+    ]
+    import_ms, first_call_ms = result.get("import_ms"), result.get("first_call_ms")
+    return LambdaProfile(
+        name=name,
+        ok=result["ok"],
+        import_ms=round(import_ms, 2) if import_ms is not None else None,
+        first_call_ms=round(first_call_ms, 2) if first_call_ms is not None else None,
+        cold_start_ms=round(import_ms + first_call_ms, 2) if None not in (import_ms, first_call_ms) else None,
+        status_code=result.get("status_code"),
+        error=result.get("error"),
+        modules=modules,
+    )
+
+
+def profile_lambdas(project_path: Path, lambdas_path: Path, layers_path: Path,
+                    names: Optional[List[str]] = None, event: Optional[Dict[str, Any]] = None,
+                    top: int = 5, jobs: Optional[int] = None) -> List[LambdaProfile]:
+    """Perfila los lambdas (todos los de `lambdas_path` por default) en paralelo, un subproceso por lambda.
+
+    Sin `event`, cada lambda se invoca con el evento de `sample_event`; los que solo tienen
+    rutas que no son `GET`/`HEAD` se miden sin invocarlos (`skipped_call`). Regresa los perfiles ordenados del cold start más lento al más rápido.
+    """
+    if names is None:
+        names = sorted(
+            entry for entry in os.listdir(lambdas_path)
+            if (lambdas_path / entry / "lambda_function.py").exists()
+        )
+    if not names:
+        return []
+    layers = layer_python_paths(project_path, layers_path)
+    index = EndpointIndex.build(lambdas_path)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(names)))
+
+    def run(name: str) -> LambdaProfile:
+        lambda_event = event if event is not None else sample_event(index, name)
+        profile = profile_lambda(name, lambdas_path, layers, lambda_event, top)
+        if lambda_event is None:
+            profile.skipped_call = " ".join(first_route(index, name))
+        return profile
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        profiles = list(executor.map(run, names))
+    return sorted(profiles, key=lambda p: (p.cold_start_ms is None, -(p.cold_start_ms or p.import_ms or 0)))
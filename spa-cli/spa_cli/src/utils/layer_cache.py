@@ -0,0 +1,318 @@
+"""Cache local de dependencias de layers, direccionado por contenido.
+
+Cada entrada es el resultado de `pip install -r requirements.txt -t <dir>` guardado en
+`~/.cache/spa-cli/layers/<sha256>/python`, donde la llave combina el contenido del
+`requirements.txt` y de todo lo que referencia (`-r`/`-c` y wheels/sdists locales), la
+versión de Python y la plataforma. En un build con cache caliente la layer se arma con
+hardlinks (o copias si no se puede) sin llamar a pip, por lo que funciona sin red.
+
+Un requirements que instala directorios locales (`./pkg`, `-e ./pkg`) no se cachea:
+su contenido puede cambiar sin que cambie ningún archivo de requirements.
+
+Variables de entorno:
+    SPA_CACHE_DIR: raíz del cache (default `$XDG_CACHE_HOME/spa-cli` o `~/.cache/spa-cli`).
+    SPA_CACHE_MAX_SIZE: tamaño máximo antes de desalojar por LRU (default `5G`).
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import sysconfig
+from dataclasses import dataclass, field
+from pathlib import Path
+from shutil import rmtree
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .link_mode import LinkMode, place_file
+
+CACHE_DIR_ENV = 'SPA_CACHE_DIR'
+CACHE_MAX_SIZE_ENV = 'SPA_CACHE_MAX_SIZE'
+DEFAULT_MAX_SIZE = '5G'
+META_FILE = 'meta.json'
+
+_SIZE_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """Convierte `512M`, `5G`, `1024` a bytes."""
+    text = str(value).strip().upper().removesuffix('IB').removesuffix('B')
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ''
+    number = text[:-1] if unit else text
+    try:
+        return int(float(number) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f'Tamaño inválido: {value!r} (usa por ejemplo 512M o 5G)')
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'K', 'M', 'G'):
+        if size < 1024 or unit == 'G':
+            return f'{size:.0f}{unit}' if unit == 'B' else f'{size:.1f}{unit}'
+        size /= 1024
+    return f'{size}'
+
+
+def default_cache_root() -> Path:
+    if os.getenv(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV]) / 'layers'
+    base = Path(os.getenv('XDG_CACHE_HOME') or Path.home() / '.cache')
+    return base / 'spa-cli' / 'layers'
+
+
+_INCLUDE_OPTIONS = ('-r', '--requirement', '-c', '--constraint')
+_EDITABLE_OPTIONS = ('-e', '--editable')
+_COMMENT = re.compile(r'(^|\s+)#.*$')
+_ARCHIVE_SUFFIXES = ('.whl', '.zip', '.tar.gz', '.tgz', '.tar.bz2')
+
+
+@dataclass
+class RequirementsScan:
+    """Lo que determina el resultado de `pip install -r <requirements>`."""
+    files: List[Path] = field(default_factory=list)      # requirements/constraints y archivos locales
+    unpinned: List[str] = field(default_factory=list)    # sin `==`: dependen del índice al instalar
+    local_dirs: List[str] = field(default_factory=list)  # directorios locales/editables
+
+    @property
+    def cacheable(self) -> bool:
+        return not self.local_dirs
+
+
+def _logical_lines(text: str) -> List[str]:
+    """Líneas de un requirements como las lee pip: sin comentarios y uniendo las terminadas en `\\`."""
+    lines, current = [], ''
+    for raw in text.splitlines():
+        if raw.endswith('\\'):
+            current += raw[:-1]
+            continue
+        line = _COMMENT.sub('', current + raw).strip()
+        current = ''
+        if line:
+            lines.append(line)
+    return lines
+
+
+def _option_value(line: str, options: Tuple[str, ...]) -> Optional[str]:
+    """Valor de la opción si `line` es una de `options` (`-r x`, `-rx`, `--requirement[=| ]x`)."""
+    for option in options:
+        if not line.startswith(option):
+            continue
+        rest = line[len(option):]
+        if not option.startswith('--'):
+            return rest.strip()
+        if not rest or rest[0] in '= \t':
+            return rest[1:].strip()
+    return None
+
+
+def _local_path(spec: str) -> Optional[Path]:
+    """Ruta de una entrada local (`./pkg`, `/wheels/x.whl`, `file:///...`) o `None`."""
+    if spec.startswith('file:'):
+        return Path(re.sub(r'^file:(//)?', '', spec)).expanduser()
+    if spec.startswith(('.', '/', '~')) or ('/' in spec.split(';')[0] and '://' not in spec):
+        # pip resuelve las rutas de requisitos contra el directorio actual, no el del archivo
+        return Path(spec.split(';')[0].strip()).expanduser()
+    return None
+
+
+def scan_requirements(req_path: Path, _seen: Optional[Set[Path]] = None) -> RequirementsScan:
+    """Recorre `req_path` y lo que referencia (`-r`, `-c`) como lo haría pip."""
+    seen = _seen if _seen is not None else set()
+    scan = RequirementsScan()
+    req_path = req_path.resolve()
+    if req_path in seen:
+        return scan
+    seen.add(req_path)
+    scan.files.append(req_path)
+    if not req_path.is_file():
+        return scan
+    for line in _logical_lines(req_path.read_text(encoding='utf-8', errors='replace')):
+        included = _option_value(line, _INCLUDE_OPTIONS)
+        if included is not None:
+            nested = scan_requirements(req_path.parent / included, seen)
+            scan.files += nested.files
+            scan.unpinned += nested.unpinned
+            scan.local_dirs += nested.local_dirs
+            continue
+        editable = _option_value(line, _EDITABLE_OPTIONS)
+        if editable is not None:
+            (scan.unpinned if '://' in editable else scan.local_dirs).append(line)
+            continue
+        if line.startswith('-'):
+            continue  # --index-url, --find-links, ...: ya forman parte del contenido
+        spec = line.split('@', 1)[1].strip() if ' @ ' in line else line
+        path = _local_path(spec)
+        if path is not None:
+            if path.is_file() and path.name.endswith(_ARCHIVE_SUFFIXES):
+                scan.files.append(path.resolve())
+            else:
+                scan.local_dirs.append(line)
+        elif '+' in spec.split('://')[0] and '://' in spec:
+            scan.unpinned.append(line)  # VCS (`git+https://...`): la rama o tag se puede mover
+        elif '://' not in spec and ('*' in spec or not re.search(r'===?', spec.split(';')[0])):
+            scan.unpinned.append(line)
+    return scan
+
+
+def requirements_digest(req_path: Path, scan: Optional[RequirementsScan] = None) -> str:
+    """sha256 del requirements y de los archivos que referencia (`-r`, `-c`, wheels locales)."""
+    scan = scan or scan_requirements(req_path)
+    digest = hashlib.sha256()
+    for path in scan.files:
+        digest.update(path.name.encode())
+        digest.update(b'\0')
+        digest.update(path.read_bytes() if path.is_file() else b'<missing>')
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def requirements_key(req_path: Path, scan: Optional[RequirementsScan] = None) -> Optional[str]:
+    """Llave del cache: `requirements_digest` + versión de Python + plataforma.
+
+    `None` si el requirements instala directorios locales y por lo tanto no se cachea.
+    """
+    scan = scan or scan_requirements(req_path)
+    if not scan.cacheable:
+        return None
+    digest = hashlib.sha256()
+    digest.update(requirements_digest(req_path, scan).encode())
+    digest.update(b'\0')
+    digest.update(f'{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}'.encode())
+    digest.update(b'\0')
+    digest.update(sysconfig.get_platform().encode())
+    return digest.hexdigest()
+
+
+def _tree_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def link_tree(src: Path, dst: Path) -> int:
+    """Replica `src` dentro de `dst` con hardlinks, usando copia si el FS no los soporta.
+
+    Los archivos que ya existen en `dst` (p. ej. el código fuente de la layer) se
+    respetan, igual que hace `pip install -t`. Regresa el número de archivos creados.
+    """
+    created = 0
+    for root, _, files in os.walk(src):
+        rel_root = Path(root).relative_to(src)
+        target_root = dst / rel_root
+        target_root.mkdir(parents=True, exist_ok=True)
+        for name in files:
+            target = target_root / name
+            if target.exists():
+                continue
+            place_file(Path(root) / name, target, LinkMode.HARDLINK)
+            created += 1
+    return created
+
+
+class LayerCache:
+    """Cache de `pip install -t` por requirements con desalojo LRU por tamaño."""
+
+    def __init__(self, root: Optional[Path] = None, max_size: Optional[int] = None):
+        self.root = root or default_cache_root()
+        self.max_size = max_size if max_size is not None else parse_size(
+            os.getenv(CACHE_MAX_SIZE_ENV, DEFAULT_MAX_SIZE)
+        )
+
+    def entry_path(self, key: str) -> Path:
+        return self.root / key
+
+    def get(self, key: str) -> Optional[Path]:
+        """Regresa la carpeta `python/` de la entrada si existe y marca su último uso."""
+        entry = self.entry_path(key)
+        meta = entry / META_FILE
+        if not meta.exists():
+            return None
+        os.utime(meta)
+        return entry / 'python'
+
+    def put(self, key: str, req_path: Path, install: Callable[[Path], bool]) -> Optional[Path]:
+        """Crea la entrada `key` llamando `install(target)`; si falla no se guarda nada.
+
+        La instalación ocurre en una carpeta temporal dentro del cache y se publica con
+        un `rename` atómico, así builds concurrentes nunca ven entradas a medias.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f'.tmp-{key}-{os.getpid()}-{time.monotonic_ns()}'
+        try:
+            if not install(staging / 'python'):
+                return None
+            (staging / META_FILE).write_text(json.dumps({
+                'requirements': req_path.read_text(encoding='utf-8', errors='replace'),
+                'python': f'{sys.implementation.name}-{sys.version_info.major}.{sys.version_info.minor}',
+                'platform': sysconfig.get_platform(),
+                'created': time.time(),
+                'size': _tree_size(staging),
+            }, indent=2), encoding='utf-8')
+            try:
+                os.rename(staging, self.entry_path(key))
+            except OSError:
+                # Otro build publicó la misma entrada primero; nos quedamos con la suya
+                pass
+        finally:
+            if staging.exists():
+                rmtree(staging, ignore_errors=True)
+        self.prune(keep=key)
+        return self.get(key)
+
+    def entries(self) -> List[Dict]:
+        """Entradas completas ordenadas de la más reciente a la menos usada."""
+        result = []
+        if not self.root.exists():
+            return result
+        for entry in self.root.iterdir():
+            meta_path = entry / META_FILE
+            if entry.name.startswith('.') or not meta_path.exists():
+                continue
+            try:
+                meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            except ValueError:
+                meta = {}
+            result.append({
+                'key': entry.name,
+                'path': entry,
+                'size': meta.get('size') or _tree_size(entry),
+                'last_used': meta_path.stat().st_mtime,
+                'python': meta.get('python', '?'),
+                'requirements': meta.get('requirements', ''),
+            })
+        result.sort(key=lambda e: e['last_used'], reverse=True)
+        return result
+
+    def total_size(self) -> int:
+        return sum(e['size'] for e in self.entries())
+
+    def prune(self, max_size: Optional[int] = None, keep: Optional[str] = None) -> List[Dict]:
+        """Desaloja las entradas menos usadas hasta quedar debajo de `max_size`."""
+        limit = self.max_size if max_size is None else max_size
+        entries = self.entries()
+        total = sum(e['size'] for e in entries)
+        evicted = []
+        for entry in reversed(entries):
+            if total <= limit:
+                break
+            if entry['key'] == keep:
+                continue
+            rmtree(entry['path'], ignore_errors=True)
+            total -= entry['size']
+            evicted.append(entry)
+        return evicted
+
+    def clear(self) -> List[Dict]:
+        evicted = self.entries()
+        for entry in evicted:
+            rmtree(entry['path'], ignore_errors=True)
+        if self.root.exists():
+            for leftover in self.root.glob('.tmp-*'):
+                rmtree(leftover, ignore_errors=True)
+        return evicted
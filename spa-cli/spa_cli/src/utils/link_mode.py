@@ -0,0 +1,131 @@
+"""Modos de "copia" para armar `build/` sin duplicar datos.
+
+- `copy`: copia real (`copy2`), el comportamiento histórico.
+- `hardlink`: mismo inodo que la fuente; cero bytes copiados.
+- `reflink`: clon copy-on-write (btrfs, XFS, ...); independiente de la fuente.
+- `symlink`: enlace simbólico absoluto a la fuente.
+
+Si el filesystem no soporta el modo pedido (otro dispositivo, FS sin reflinks,
+permisos) se cae automáticamente a `copy` para ese par de dispositivos.
+
+Los archivos que el build modifica después de copiarlos deben pasar por
+`materialize()` para no escribir a través del enlace sobre la fuente.
+"""
+import os
+import errno
+from enum import Enum
+from pathlib import Path
+from shutil import copy2, copystat, copytree
+from typing import Callable, Optional, Set, Tuple
+
+from .build_profile import record_io
+
+FICLONE = 0x40049409  # ioctl de Linux para clonar un archivo completo
+
+_FALLBACK_ERRNOS = (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP,
+                    errno.EINVAL, errno.ENOTTY, errno.EACCES)
+
+
+class LinkMode(str, Enum):
+    COPY = 'copy'
+    HARDLINK = 'hardlink'
+    REFLINK = 'reflink'
+    SYMLINK = 'symlink'
+
+
+_unsupported: Set[Tuple[LinkMode, int, int]] = set()
+
+
+def _reflink(src: Path, dst: Path):
+    import fcntl
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        dst.unlink(missing_ok=True)
+        raise
+    copystat(src, dst)
+
+
+def place_file(src: Path, dst: Path, mode: LinkMode = LinkMode.COPY) -> LinkMode:
+    """Coloca `src` en `dst` con el modo pedido; regresa el modo efectivamente usado.
+
+    `dst` siempre se elimina antes, así nunca se escribe a través de un enlace previo.
+    """
+    src, dst = Path(src), Path(dst)
+    if dst.is_symlink() or dst.exists():
+        dst.unlink()
+
+    mode = LinkMode(mode)
+    if mode is not LinkMode.COPY:
+        try:
+            devices = (mode, os.stat(src).st_dev, os.stat(dst.parent).st_dev)
+        except OSError:
+            devices = None
+        if devices not in _unsupported:
+            try:
+                if mode is LinkMode.HARDLINK:
+                    os.link(src, dst)
+                elif mode is LinkMode.SYMLINK:
+                    os.symlink(src.resolve(), dst)
+                else:
+                    _reflink(src, dst)
+                record_io(files=1)
+                return mode
+            except (OSError, ImportError) as e:
+                if isinstance(e, OSError) and e.errno not in _FALLBACK_ERRNOS:
+                    raise
+                if devices is not None:
+                    _unsupported.add(devices)
+
+    copy2(src, dst)
+    record_io(files=1, path=dst)
+    return LinkMode.COPY
+
+
+def copy_function(mode: LinkMode = LinkMode.COPY) -> Callable[[str, str], str]:
+    """Función compatible con `copytree(copy_function=...)` para el modo dado."""
+    def _copy(src: str, dst: str) -> str:
+        place_file(Path(src), Path(dst), mode)
+        return dst
+    return _copy
+
+
+def copy_tree(src: Path, dst: Path, mode: LinkMode = LinkMode.COPY, ignore: Optional[Callable] = None) -> Path:
+    """`copytree(..., dirs_exist_ok=True)` usando el modo de enlace pedido para los archivos."""
+    return copytree(src, dst, dirs_exist_ok=True, ignore=ignore, copy_function=copy_function(mode))
+
+
+def is_linked(path: Path) -> bool:
+    """True si modificar `path` afectaría a otro archivo (symlink o hardlink compartido)."""
+    path = Path(path)
+    if path.is_symlink():
+        return True
+    try:
+        return path.stat().st_nlink > 1
+    except FileNotFoundError:
+        return False
+
+
+def materialize(path: Path) -> bool:
+    """Convierte `path` en una copia real si es un enlace. Regresa True si lo cambió."""
+    path = Path(path)
+    if not is_linked(path):
+        return False
+    source = path.resolve()
+    tmp = path.with_name(f'.{path.name}.spa-materialize')
+    copy2(source, tmp)
+    os.replace(tmp, path)
+    record_io(files=1, path=path)
+    return True
+
+
+def materialize_tree(root: Path) -> int:
+    """Aplica `materialize` a todos los archivos bajo `root`."""
+    changed = 0
+    if not root.exists():
+        return changed
+    for path in Path(root).rglob('*'):
+        if (path.is_file() or path.is_symlink()) and materialize(path):
+            changed += 1
+    return changed
@@ -1,22 +1,32 @@
-from fastapi import FastAPI, Request
+from fastapi import APIRouter, FastAPI, Request, Response
 from mangum import Mangum
 from fastapi.middleware.cors import CORSMiddleware
 from pathlib import Path
 from dotenv import load_dotenv
 import os
-import json
+
+from src.api_local.openapi_snapshot import load_schema
 
 load_dotenv()
 
 env = os.getenv('ENVIRONMENT', 'dev')
-SCHEMA_PATH = Path(__file__).parent / "openapi.json"
+API_LOCAL_DIR = Path(__file__).parent
 
 app = FastAPI(
     title='Test API',
     description='API ',
     openapi_url="/openapi.json"
 )
-app.openapi_schema = json.loads(SCHEMA_PATH.read_text())
+
+
+def openapi():
+    # El schema (openapi.snapshot u openapi.json) se carga hasta el primer /openapi.json o /docs
+    if app.openapi_schema is None:
+        app.openapi_schema = load_schema(API_LOCAL_DIR)
+    return app.openapi_schema
+
+
+app.openapi = openapi
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,14 +35,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+auth_cache_stats = None
 try:
-    from src.api_local.auth_bridge import build_security_middleware
-    app.middleware('http')(build_security_middleware())
+    from src.api_local.auth_bridge import build_security_middleware, cache_stats as auth_cache_stats
+    security_middleware = build_security_middleware()
+    if security_middleware is not None:
+        app.middleware('http')(security_middleware)
 except ImportError:
     pass
 
+from src.api_local import router as router_module
+from src.api_local.lambda_lifecycle import stats as lambda_stats
 from src.api_local.router import router
-app.include_router(router, prefix=f"/{env.lower() or 'v1'}")
+if isinstance(router, APIRouter):
+    app.include_router(router, prefix=f"/{env.lower() or 'v1'}")
+else:
+    # Router ASGI (target `asgi`): se monta completo bajo el mismo prefijo
+    app.mount(f"/{env.lower() or 'v1'}", router)
+
+try:
+    from src.api_local.metrics import CONTENT_TYPE, METRICS_PATH, render as render_metrics
+except ImportError:
+    METRICS_PATH = ''
+
+if METRICS_PATH:
+    @app.get(METRICS_PATH, include_in_schema=False)
+    def metrics():
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+if os.getenv('SPA_HOT_RELOAD') == '1':
+    # `spa project run-api --hot-reload`: recarga solo el lambda/layer modificado
+    try:
+        from src.api_local.hot_reload import start_hot_reload
+        start_hot_reload(app, router_module, f"/{env.lower() or 'v1'}")
+    except ImportError:
+        pass
 
 
 @app.get("/")
@@ -59,7 +96,9 @@ def read_root(request: Request):
                 "openapi_url": "/openapi.json",
                 "docs_url": "/docs",
                 "redoc_url": "/redoc"
-            }
+            },
+            "auth_cache": auth_cache_stats() if auth_cache_stats else None,
+            "lambdas": lambda_stats()
         }
     }
 
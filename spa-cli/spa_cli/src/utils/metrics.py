@@ -0,0 +1,295 @@
+"""Métricas por ruta del router generado, expuestas en formato texto de Prometheus.
+
+`build_local_api` copia este archivo a `src/api_local/metrics.py`. El router registra
+por cada request (ruta del `endpoint.yaml`, método):
+
+- `spa_requests_total{route,method,status}`: requests por clase de status (`2xx`, `4xx`, ...);
+- `spa_request_errors_total{route,method}`: excepciones del handler o status >= 500;
+- `spa_request_duration_seconds{route,method,phase}`: histograma por fase: `event`
+  (leer el body y armar el evento), `authorizer` (middleware de `auth_bridge`, solo si
+  la ruta tiene `security`), `handler` (el `lambda_handler`) y `total` (las anteriores
+  más convertir la respuesta).
+
+Con `SPA_LAMBDA_LIFECYCLE=1` se agregan las series `spa_lambda_*` por lambda (cold/warm
+starts, init, espera por concurrencia reservada, throttles y timeouts) de `lambda_lifecycle.py`.
+
+`main_server.py` las expone en `SPA_METRICS_PATH` (default `/metrics`; vacío las
+desactiva y el router no mide nada).
+
+Con varios workers cada proceso tiene su propio registro:
+
+- si `prometheus_client` está instalado y existe `PROMETHEUS_MULTIPROC_DIR`, se usa su
+  modo multiproceso (archivos mmap por worker, agregados en cada scrape);
+- si no, con `SPA_METRICS_DIR` cada worker vuelca su registro a `<dir>/spa_<pid>_<arranque>.json`
+  cada `SPA_METRICS_FLUSH_SECONDS` (default 5) y el worker que atiende el scrape los
+  suma al suyo. Los archivos de workers terminados se conservan: los contadores de
+  Prometheus no deben bajar cuando gunicorn recicla un worker.
+
+`gunicorn.conf.py` prepara el directorio que corresponda. Las observaciones ocurren en
+el event loop del worker, así que el registro integrado no usa locks: el hilo que vuelca
+a disco solo copia los dicts (una operación atómica con el GIL).
+
+NO EDITAR la copia en `src/api_local`: se regenera con cada `run-api`/`build`.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+METRICS_PATH = os.getenv("SPA_METRICS_PATH", "/metrics")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FLUSH_SECONDS = float(os.getenv("SPA_METRICS_FLUSH_SECONDS") or 5)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUESTS = "spa_requests_total"
+ERRORS = "spa_request_errors_total"
+DURATION = "spa_request_duration_seconds"
+ROUTE_LABELS = ("route", "method")
+FUNCTION_LABELS = ("function",)
+_HELP = {
+    REQUESTS: ("counter", ROUTE_LABELS + ("status",), "Requests atendidos por ruta, método y clase de status."),
+    ERRORS: ("counter", ROUTE_LABELS, "Requests con excepción en el handler o status >= 500."),
+    DURATION: ("histogram", ROUTE_LABELS + ("phase",),
+               "Duración por fase: event, authorizer, handler y total (segundos)."),
+    # Solo con SPA_LAMBDA_LIFECYCLE=1 (ver lambda_lifecycle.py)
+    "spa_lambda_invocations_total": ("counter", FUNCTION_LABELS + ("start",), "Invocaciones por lambda: cold o warm."),
+    "spa_lambda_init_duration_seconds": ("histogram", FUNCTION_LABELS, "Init de las instancias nuevas (segundos)."),
+    "spa_lambda_queue_seconds": ("histogram", FUNCTION_LABELS,
+                                 "Espera por una instancia libre (concurrencia reservada, segundos)."),
+    "spa_lambda_throttles_total": ("counter", FUNCTION_LABELS, "Invocaciones rechazadas (429) por concurrencia reservada."),
+    "spa_lambda_timeouts_total": ("counter", FUNCTION_LABELS, "Invocaciones que excedieron el timeout del lambda."),
+}
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Registry:
+    """Registro integrado: contadores `{(métrica, labels): valor}` e histogramas
+    `{(métrica, labels): [conteo por bucket..., conteo +Inf, suma]}`."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else None
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._pid = os.getpid()
+        self._file = self._file_name()
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def _file_name(self) -> str:
+        # pid + arranque: un worker nuevo que reutiliza el pid no pisa el archivo del anterior
+        return f"spa_{self._pid}_{time.time_ns()}.json"
+
+    def _touch(self):
+        if self._pid != os.getpid():
+            # Proceso hijo (gunicorn con preload): lo heredado del master no es de este worker
+            self._pid = os.getpid()
+            self._file = self._file_name()
+            self.counters.clear()
+            self.histograms.clear()
+            self._flusher = None
+        if self.directory is not None and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name="spa-metrics", daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+        self._dirty = True
+
+    def inc(self, name: str, labels: Labels, value: float = 1):
+        self._touch()
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float):
+        self._touch()
+        key = (name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [0] * (len(BUCKETS) + 2)
+        histogram[bisect_left(BUCKETS, value)] += 1
+        histogram[-1] += value
+
+    def flush(self):
+        if self.directory is None or not self._dirty:
+            return
+        self._dirty = False
+        data = {
+            "counters": [[name, list(labels), value] for (name, labels), value in dict(self.counters).items()],
+            "histograms": [[name, list(labels), list(values)]
+                           for (name, labels), values in dict(self.histograms).items()],
+        }
+        target = self.directory / self._file
+        tmp = target.with_name(f".{target.name}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data), encoding="utf-8")
+            os.replace(tmp, target)
+        except OSError:
+            self._dirty = True
+
+    def _flush_loop(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(FLUSH_SECONDS)
+            self.flush()
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], List[float]]]:
+        """Este proceso más lo volcado por los demás workers (si hay `directory`)."""
+        counters = dict(self.counters)
+        histograms = {key: list(values) for key, values in dict(self.histograms).items()}
+        if self.directory is None or not self.directory.is_dir():
+            return counters, histograms
+        for path in self.directory.glob("spa_*.json"):
+            if path.name == self._file:
+                continue
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue  # otro worker lo está reemplazando; entra en el siguiente scrape
+            for name, labels, value in data.get("counters", ()):
+                key = (name, tuple(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in data.get("histograms", ()):
+                key = (name, tuple(labels))
+                current = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    current[i] += value
+        return counters, histograms
+
+    def render(self) -> bytes:
+        counters, histograms = self.snapshot()
+        lines: List[str] = []
+        for name, (kind, label_names, help_text) in _HELP.items():
+            series = counters if kind == "counter" else histograms
+            keys = sorted(key for key in series if key[0] == name)
+            if not keys:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in keys:
+                labels = key[1]
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(label_names, labels)} {_format_value(series[key])}")
+                    continue
+                values = series[key]
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), values[:-1]):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                    lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {_format_value(cumulative)}")
+                lines.append(f"{name}_sum{_labels(label_names, labels)} {_format_value(values[-1])}")
+                lines.append(f"{name}_count{_labels(label_names, labels)} {_format_value(cumulative)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class PrometheusRegistry:
+    """Mismas métricas sobre `prometheus_client` en modo multiproceso."""
+
+    def __init__(self):
+        from prometheus_client import Counter, Histogram
+
+        self._metrics = {
+            name: Counter(name, help_text, label_names) if kind == "counter"
+            else Histogram(name, help_text, label_names, buckets=BUCKETS)
+            for name, (kind, label_names, help_text) in _HELP.items()
+        }
+
+    def inc(self, name: str, labels: Labels, value: float = 1):
+        self._metrics[name].labels(*labels).inc(value)
+
+    def observe(self, name: str, labels: Labels, value: float):
+        self._metrics[name].labels(*labels).observe(value)
+
+    def render(self) -> bytes:
+        from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+
+
+def _create_registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        try:
+            return PrometheusRegistry()
+        except ImportError:
+            pass
+    return Registry(os.getenv("SPA_METRICS_DIR") or None)
+
+
+registry = _create_registry() if METRICS_PATH else None
+
+
+class RequestTimer:
+    """Mide un request: `mark(fase)` cierra la fase en curso y `finish(status)` registra todo."""
+
+    __slots__ = ("route", "method", "scope", "start", "last", "phases")
+
+    def __init__(self, route: str, method: str, scope: Dict[str, Any]):
+        self.route = route
+        self.method = method
+        self.scope = scope
+        self.start = self.last = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases[phase] = now - self.last
+        self.last = now
+
+    def finish(self, status: int, error: bool = False):
+        total = time.perf_counter() - self.start
+        labels = (self.route, self.method)
+        registry.inc(REQUESTS, labels + (f"{status // 100}xx",))
+        if error or status >= 500:
+            registry.inc(ERRORS, labels)
+        # `auth_bridge` deja en el state del request lo que tardaron sus authorizers
+        authorizer = (self.scope.get("state") or {}).get("spa_authorizer_seconds")
+        if authorizer is not None:
+            registry.observe(DURATION, labels + ("authorizer",), authorizer)
+            total += authorizer
+        for phase, seconds in self.phases.items():
+            registry.observe(DURATION, labels + (phase,), seconds)
+        registry.observe(DURATION, labels + ("total",), total)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def mark(self, phase: str):
+        pass
+
+    def finish(self, status: int, error: bool = False):
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def start_request(route: str, method: str, scope: Dict[str, Any]):
+    """`RequestTimer` del request, o uno que no hace nada si las métricas están desactivadas."""
+    if registry is None:
+        return _NO_TIMER
+    return RequestTimer(route, method, scope)
+
+
+def render() -> bytes:
+    return registry.render() if registry is not None else b""
@@ -0,0 +1,114 @@
+"""Snapshot binario de `openapi.json` para `main_server.py` y `auth_bridge.py`.
+
+`build_api_json` lo escribe junto a `openapi.json` y copia este módulo a
+`src/api_local/`. El archivo tiene dos bloques `marshal` independientes:
+
+- el índice (rutas aseguradas `(METHOD, path, [schemes])`, `securitySchemes` y el
+  registry de authorizers), que `auth_bridge` carga al arrancar cada worker;
+- el schema completo, que solo se decodifica la primera vez que se pide
+  `/openapi.json` o `/docs`.
+
+Así ningún worker parsea el JSON completo (varios MB) en el arranque. Si el snapshot
+falta o no es legible (otra versión del formato) se usa `openapi.json` directamente.
+
+NO EDITAR A MANO. Regenerado por `spa project run-api` y `spa project build`.
+"""
+import json
+import marshal
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+SNAPSHOT_NAME = "openapi.snapshot"
+OPENAPI_NAME = "openapi.json"
+_MAGIC = b"SPAO"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHI")  # magic, versión, bytes del bloque de índice
+
+_lock = threading.Lock()
+_indexes: Dict[str, Optional[Dict[str, Any]]] = {}
+_schemas: Dict[str, Dict[str, Any]] = {}
+
+
+def security_schemes(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return (spec.get("components") or {}).get("securitySchemes") or spec.get("securityDefinitions") or {}
+
+
+def security_index(spec: Dict[str, Any]) -> List[Tuple[str, str, List[str]]]:
+    """`(METHOD, path, [scheme])` de cada operación con `security` (propia o global)."""
+    entries = []
+    for path, methods in (spec.get("paths") or {}).items():
+        if not isinstance(methods, dict):
+            continue
+        for method, op in methods.items():
+            if not isinstance(op, dict):
+                continue
+            schemes: List[str] = []
+            for entry in op.get("security") or spec.get("security") or []:
+                if isinstance(entry, dict):
+                    schemes.extend(entry.keys())
+            if schemes:
+                entries.append((method.upper(), path, schemes))
+    return entries
+
+
+def write_snapshot(path: Path, spec: Dict[str, Any], authorizers: Optional[Dict[str, Any]] = None) -> int:
+    """Escribe el snapshot de `spec` en `path`; regresa su tamaño en bytes."""
+    index = {
+        "security": security_index(spec),
+        "schemes": security_schemes(spec),
+        "authorizers": authorizers or {},
+    }
+    index_blob = marshal.dumps(index)
+    data = _HEADER.pack(_MAGIC, _VERSION, len(index_blob)) + index_blob + marshal.dumps(spec)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def _read(directory: Path, with_schema: bool) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]:
+    try:
+        with open(directory / SNAPSHOT_NAME, "rb") as f:
+            magic, version, index_size = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                return None
+            index = marshal.loads(f.read(index_size))
+            return index, (marshal.loads(f.read()) if with_schema else None)
+    except (OSError, struct.error, ValueError, EOFError, TypeError):
+        return None
+
+
+def load_index(directory: Path) -> Optional[Dict[str, Any]]:
+    """Índice de seguridad del snapshot (una vez por proceso), o `None` si no hay snapshot."""
+    key = str(directory)
+    if key not in _indexes:
+        with _lock:
+            if key not in _indexes:
+                loaded = _read(directory, with_schema=False)
+                _indexes[key] = loaded[0] if loaded else None
+    return _indexes[key]
+
+
+def load_schema(directory: Path) -> Dict[str, Any]:
+    """Schema OpenAPI completo (una vez por proceso): del snapshot o, si no hay, de `openapi.json`."""
+    key = str(directory)
+    if key not in _schemas:
+        with _lock:
+            if key not in _schemas:
+                loaded = _read(directory, with_schema=True)
+                if loaded is not None:
+                    _schemas[key] = loaded[1]
+                else:
+                    _schemas[key] = json.loads((directory / OPENAPI_NAME).read_text(encoding="utf-8"))
+    return _schemas[key]
+
+
+def invalidate(directory: Path) -> None:
+    """Descarta el índice y el schema cacheados de `directory` (hot reload de `endpoint.yaml`)."""
+    key = str(directory)
+    with _lock:
+        _indexes.pop(key, None)
+        _schemas.pop(key, None)
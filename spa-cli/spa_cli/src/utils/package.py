@@ -0,0 +1,137 @@
+"""Empaquetado reproducible de lambdas y layers (`build/artifacts/`).
+
+Cada lambda (`build/infra/components/lambdas/<lambda>`) y layer
+(`build/tmp_build_layer/<layer>`) se comprime en un zip determinista: entradas
+ordenadas, fecha fija (1980-01-01), permisos normalizados (0644, o 0755 si el archivo
+es ejecutable) y sin entradas de directorio. El mismo contenido produce siempre los
+mismos bytes, así que el hash no cambia cuando solo cambian timestamps y Pulumi no
+vuelve a subir la función.
+
+`build/artifacts.json` registra ruta, tamaño y sha256 (hex y base64, el formato de
+`source_code_hash` de AWS) de cada zip.
+"""
+import base64
+import hashlib
+import json
+import os
+import stat
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .build_profile import record_io
+
+ARTIFACTS_DIR = 'artifacts'
+ARTIFACTS_MANIFEST = 'artifacts.json'
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# Archivos de Pulumi que viven junto al código de la lambda pero no se despliegan
+LAMBDA_EXCLUDE = ('infra_config.py', '__pycache__/infra_config.*', 'infra_config.pyc')
+
+
+@dataclass
+class PackagedArtifact:
+    kind: str  # 'layer' o 'lambda'
+    name: str
+    path: str  # relativo a build/
+    size: int
+    sha256: str
+    sha256_base64: str
+    files: int
+    uncompressed: int
+    changed: bool = True
+
+
+def _files(root: Path, exclude: Tuple[str, ...]) -> List[Tuple[str, Path]]:
+    files = []
+    for current, dirs, names in os.walk(root, followlinks=True):
+        dirs.sort()
+        for name in names:
+            path = Path(current) / name
+            rel = path.relative_to(root).as_posix()
+            if not any(fnmatch(rel, pattern) for pattern in exclude):
+                files.append((rel, path))
+    return sorted(files)
+
+
+def _sha256(path: Path) -> Tuple[str, str]:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest(), base64.b64encode(digest.digest()).decode()
+
+
+def write_zip(root: Path, target: Path, exclude: Tuple[str, ...] = ()) -> Tuple[int, int]:
+    """Escribe `root` como zip determinista en `target`; regresa `(archivos, bytes sin comprimir)`."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    count = uncompressed = 0
+    with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as archive:
+        for rel, path in _files(root, exclude):
+            info = zipfile.ZipInfo(rel, date_time=ZIP_DATE_TIME)
+            info.create_system = 3  # unix, para que external_attr se respete
+            mode = 0o755 if os.stat(path).st_mode & stat.S_IXUSR else 0o644
+            info.external_attr = (stat.S_IFREG | mode) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(path, 'rb') as f:
+                data = f.read()
+            archive.writestr(info, data)
+            count += 1
+            uncompressed += len(data)
+    return count, uncompressed
+
+
+def _package_one(task: Tuple[str, str, Path, Path, Tuple[str, ...]], build_path: Path) -> PackagedArtifact:
+    kind, name, root, target, exclude = task
+    tmp = target.with_name(target.name + '.tmp')
+    count, uncompressed = write_zip(root, tmp, exclude)
+    record_io(files=1, path=tmp)
+    sha256, sha256_b64 = _sha256(tmp)
+    changed = not target.exists() or _sha256(target)[0] != sha256
+    if changed:
+        os.replace(tmp, target)
+    else:
+        tmp.unlink()  # se conserva el zip anterior (mismos bytes, mismo mtime)
+    return PackagedArtifact(kind=kind, name=name, path=target.relative_to(build_path).as_posix(),
+                            size=target.stat().st_size, sha256=sha256, sha256_base64=sha256_b64,
+                            files=count, uncompressed=uncompressed, changed=changed)
+
+
+def package_artifacts(build_path: Path, layers_path: Path, lambdas_path: Path,
+                      jobs: Optional[int] = None) -> List[PackagedArtifact]:
+    """Empaqueta en paralelo cada layer y lambda del build y escribe `build/artifacts.json`.
+
+    Los zips de lambdas o layers que ya no existen se eliminan de `build/artifacts/`.
+    """
+    out = build_path / ARTIFACTS_DIR
+    tasks = []
+    for kind, base, exclude in (('layer', layers_path, ()), ('lambda', lambdas_path, LAMBDA_EXCLUDE)):
+        expected = set()
+        if base.exists():
+            for entry in sorted(base.iterdir()):
+                if entry.is_dir() and not entry.name.startswith(('__', '.')):
+                    target = out / f'{kind}s' / f'{entry.name}.zip'
+                    expected.add(target.name)
+                    tasks.append((kind, entry.name, entry, target, exclude))
+        stale_dir = out / f'{kind}s'
+        if stale_dir.exists():
+            for stale in stale_dir.iterdir():
+                if stale.name not in expected and stale.is_file():
+                    stale.unlink()
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks) or 1))
+    # zlib libera el GIL al comprimir, así que los hilos sí corren en paralelo
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        artifacts = list(executor.map(lambda task: _package_one(task, build_path), tasks))
+
+    manifest: Dict[str, Dict[str, dict]] = {'layers': {}, 'lambdas': {}}
+    for artifact in artifacts:
+        entry = asdict(artifact)
+        for key in ('kind', 'name', 'changed'):
+            entry.pop(key)
+        manifest[f'{artifact.kind}s'][artifact.name] = entry
+    (build_path / ARTIFACTS_MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n',
+                                                 encoding='utf-8')
+    return artifacts
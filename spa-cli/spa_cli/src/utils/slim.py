@@ -0,0 +1,329 @@
+"""Limpieza de artefactos de layers y lambdas (`[spa.build.slim]`).
+
+Después de `build_layers` y `build_lambdas` cada artefacto (`build/tmp_build_layer/<layer>`
+y `build/infra/components/lambdas/<lambda>`) se recorre una vez eliminando lo que no
+hace falta en Lambda: bytecode, tests, documentación, archivos de instalación de
+`*.dist-info`, type stubs y, si se configuran, los paquetes que el runtime ya incluye
+(p. ej. boto3/botocore).
+Luego se comparan los tamaños descomprimidos con los presupuestos configurados.
+
+Los artefactos contienen copias o enlaces por archivo (ver `link_mode.py`), así que
+eliminar aquí nunca toca las fuentes ni el cache de layers.
+"""
+import os
+import re
+import json
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+from shutil import rmtree
+from typing import Dict, List, Optional, Tuple
+
+import typer
+
+from ...globals import Bytecode, Slim
+from .build_manifest import BuildManifest, _prune_empty_dirs, hash_text
+from .bytecode import is_current_pyc
+from .layer_cache import _tree_size, format_size
+
+MB = 1024 * 1024
+TEST_DIRS = ('tests', 'test')
+TEST_FILES = ('test_*.py', '*_test.py', 'conftest.py')
+DOC_DIRS = ('docs', 'doc', 'examples')
+DOC_SUFFIXES = ('.md', '.rst')
+LICENSE_PREFIXES = ('license', 'licence', 'copying', 'notice', 'authors')
+MODULE_SUFFIXES = ('.py', '.so', '.pyd')
+# Sube cuando cambian las reglas de limpieza: fuerza reinstalar lo que las anteriores eliminaron
+RULES_VERSION = 2
+# Dentro de *.dist-info se conservan METADATA, entry_points.txt, top_level.txt y licencias
+DIST_INFO_EXTRAS = ('RECORD', 'INSTALLER', 'REQUESTED', 'WHEEL', 'direct_url.json', 'zip-safe')
+
+
+@dataclass
+class ArtifactReport:
+    name: str
+    kind: str  # 'layer' o 'lambda'
+    path: Path
+    before: int = 0
+    after: int = 0
+    removed: Dict[str, int] = field(default_factory=dict)  # regla -> bytes
+    runtime_removed: List[str] = field(default_factory=list)  # "boto3 1.34.0" por `runtime_packages`
+    added: Dict[str, int] = field(default_factory=dict)  # etapa posterior (p. ej. bytecode) -> bytes
+
+    @property
+    def saved(self) -> int:
+        return sum(self.removed.values())
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r'[-_.]+', '_', name).lower()
+
+
+class _Slimmer:
+    def __init__(self, config: Slim, root: Path, report: ArtifactReport, bytecode: Optional[Bytecode] = None):
+        self.config = config
+        self.root = root
+        self.report = report
+        # Con [spa.build.bytecode] activo el `__pycache__` se revisa archivo por archivo para
+        # conservar el bytecode que escribió el build anterior (ver `is_current_pyc`)
+        self.bytecode = bytecode if bytecode is not None and bytecode.enabled else None
+
+    def _kept(self, rel: str, is_dir: bool = False) -> bool:
+        for pattern in self.config.keep:
+            if fnmatch(rel, pattern) or (is_dir and pattern.startswith(rel + '/')):
+                return True
+        return False
+
+    def _remove(self, path: Path, rule: str):
+        size = _tree_size(path) if path.is_dir() and not path.is_symlink() else os.lstat(path).st_size
+        if path.is_dir() and not path.is_symlink():
+            rmtree(path)
+        else:
+            path.unlink()
+        self.report.removed[rule] = self.report.removed.get(rule, 0) + size
+
+    def remove_runtime_packages(self):
+        """Elimina las distribuciones de `runtime_packages` (paquetes y su *.dist-info)."""
+        wanted = {_normalize(name) for name in self.config.runtime_packages}
+        if not wanted:
+            return
+        for dist_info in sorted(self.root.rglob('*.dist-info')):
+            dist_name, _, version = dist_info.name[:-len('.dist-info')].partition('-')
+            dist_name = _normalize(dist_name)
+            if dist_name not in wanted or not dist_info.is_dir():
+                continue
+            self.report.runtime_removed.append(f'{dist_name} {version}'.strip())
+            site = dist_info.parent
+            record = dist_info / 'RECORD'
+            if record.exists():
+                # Archivo por archivo: un paquete namespace (p. ej. google/) puede ser compartido
+                for line in record.read_text(encoding='utf-8', errors='replace').splitlines():
+                    rel_path = line.split(',', 1)[0]
+                    target = (site / rel_path).resolve() if rel_path else None
+                    if (target is None or not target.is_relative_to(site.resolve())
+                            or target.is_relative_to(dist_info.resolve()) or not target.is_file()):
+                        continue
+                    if not self._kept(target.relative_to(self.root.resolve()).as_posix()):
+                        self._remove(target, 'runtime')
+                        _prune_empty_dirs(target.parent, site.resolve())
+            else:
+                top_level = dist_info / 'top_level.txt'
+                tops = [t.strip() for t in top_level.read_text().splitlines() if t.strip()] \
+                    if top_level.exists() else [dist_name]
+                for top in tops:
+                    target = site / top
+                    if target.is_dir() and not self._kept(target.relative_to(self.root).as_posix(), True):
+                        self._remove(target, 'runtime')
+            self._remove(dist_info, 'runtime')
+
+    @staticmethod
+    def _importable(path: Path) -> bool:
+        """True si la carpeta es un paquete Python (p. ej. `botocore/docs`), no documentación
+        o tests sueltos: tiene `__init__.py` o módulos que no son archivos de test.
+        """
+        for entry in path.iterdir():
+            if entry.name == '__init__.py':
+                return True
+            if entry.name.endswith(MODULE_SUFFIXES) and entry.is_file() \
+                    and not any(fnmatch(entry.name, pattern) for pattern in TEST_FILES):
+                return True
+        return False
+
+    def _dir_rule(self, path: Path) -> Optional[str]:
+        cfg = self.config
+        name = path.name
+        if cfg.pycache and name == '__pycache__':
+            return 'pycache'
+        if cfg.tests and name in TEST_DIRS and not self._importable(path):
+            return 'tests'
+        if cfg.docs and name in DOC_DIRS and not self._importable(path):
+            return 'docs'
+        if cfg.type_stubs and name.endswith('-stubs'):
+            return 'stubs'
+        return None
+
+    def _file_rule(self, name: str, in_dist_info: bool) -> Optional[str]:
+        cfg = self.config
+        lower = name.lower()
+        if cfg.pycache and lower.endswith(('.pyc', '.pyo')):
+            return 'pycache'
+        if in_dist_info:
+            return 'dist-info' if cfg.dist_info and name in DIST_INFO_EXTRAS else None
+        if lower.startswith(LICENSE_PREFIXES):
+            return None
+        if cfg.tests and any(fnmatch(name, pattern) for pattern in TEST_FILES):
+            return 'tests'
+        if cfg.docs and lower.endswith(DOC_SUFFIXES):
+            return 'docs'
+        if cfg.type_stubs and (lower.endswith('.pyi') or name == 'py.typed'):
+            return 'stubs'
+        return None
+
+    def _matches_exclude(self, rel: str) -> bool:
+        return any(fnmatch(rel, pattern) for pattern in self.config.exclude)
+
+    def prune(self):
+        for current, dirs, files in os.walk(self.root, topdown=True):
+            current_path = Path(current)
+            in_dist_info = current_path.name.endswith('.dist-info')
+            for name in list(dirs):
+                path = current_path / name
+                rel = path.relative_to(self.root).as_posix()
+                rule = self._dir_rule(path) or ('exclude' if self._matches_exclude(rel) else None)
+                if rule == 'pycache' and self.bytecode:
+                    continue
+                if rule and not self._kept(rel, is_dir=True):
+                    self._remove(path, rule)
+                    dirs.remove(name)
+            for name in files:
+                path = current_path / name
+                rel = path.relative_to(self.root).as_posix()
+                rule = self._file_rule(name, in_dist_info) or ('exclude' if self._matches_exclude(rel) else None)
+                if rule == 'pycache' and current_path.name != '__pycache__' \
+                        and not path.with_suffix('.py').exists():
+                    continue  # módulo sin fuente (`drop_sources` de [spa.build.bytecode])
+                if rule == 'pycache' and self.bytecode and is_current_pyc(path, self.bytecode.optimize):
+                    continue
+                if rule and not self._kept(rel):
+                    self._remove(path, rule)
+            if current_path.name == '__pycache__' and self.bytecode and not any(current_path.iterdir()):
+                current_path.rmdir()
+
+
+def invalidate_on_config_change(manifest: BuildManifest, config: Slim, bytecode: Optional[Bytecode] = None) -> bool:
+    """Si `[spa.build.slim]` (o `drop_sources`/`optimize` de `[spa.build.bytecode]`) cambió
+    desde el último build, fuerza reinstalar las layers.
+
+    Lo que una configuración anterior eliminó de las dependencias instaladas no se
+    recupera con el build incremental (pip solo corre si cambia el requirements).
+    Los archivos de lambdas y fuentes de layers sí se vuelven a copiar: se olvida lo que
+    se registró como eliminado (`record_pruned`).
+    """
+    rules = {key: value for key, value in config.to_dict().items() if not key.startswith('max_')}
+    rules['version'] = RULES_VERSION
+    if bytecode is not None and bytecode.enabled and bytecode.drop_sources:
+        rules['bytecode'] = {'drop_sources': True, 'optimize': bytecode.optimize}
+    digest = hash_text(json.dumps(rules, sort_keys=True))
+    previous = manifest.step('slim')
+    manifest.set_step('slim', digest)
+    if previous is None or previous == digest:
+        return False
+    manifest.clear_pruned()
+    for key in manifest.keys('layers/'):
+        if key.endswith('/requirements'):
+            manifest.drop(key)
+    return True
+
+
+def _artifacts(layers_path: Path, lambdas_path: Path) -> List[Tuple[str, str, Path]]:
+    artifacts = []
+    for kind, base in (('layer', layers_path), ('lambda', lambdas_path)):
+        if not base.exists():
+            continue
+        for entry in sorted(base.iterdir()):
+            if entry.is_dir() and not entry.name.startswith(('__', '.')):
+                artifacts.append((kind, entry.name, entry))
+    return artifacts
+
+
+def slim_artifacts(layers_path: Path, lambdas_path: Path, config: Slim,
+                   bytecode: Optional[Bytecode] = None) -> List[ArtifactReport]:
+    """Limpia cada layer y lambda del build según `config`; regresa tamaños antes/después.
+
+    Con `bytecode` activo se conservan los `.pyc` vigentes que compiló el build anterior.
+    """
+    reports = []
+    for kind, name, path in _artifacts(layers_path, lambdas_path):
+        report = ArtifactReport(name=name, kind=kind, path=path, before=_tree_size(path))
+        if config.enabled:
+            slimmer = _Slimmer(config, path, report, bytecode)
+            if kind == 'layer':
+                slimmer.remove_runtime_packages()
+            slimmer.prune()
+        report.after = _tree_size(path)
+        reports.append(report)
+    return reports
+
+
+def record_pruned(reports: List[ArtifactReport], manifest: BuildManifest):
+    """Registra en `manifest` los archivos fuente de cada artefacto que ya no están en el
+    build (eliminados por slim o por `drop_sources`), para que el siguiente build
+    incremental no los copie y elimine otra vez.
+    """
+    for report in reports:
+        key = f'{report.kind}s/{report.name}'
+        manifest.set_pruned(key, (rel for rel in manifest.files(key) if not os.path.lexists(report.path / rel)))
+
+
+def _pinned(requirements: Path) -> set:
+    if not requirements.exists():
+        return set()
+    names = set()
+    for line in requirements.read_text(encoding='utf-8', errors='replace').splitlines():
+        match = re.match(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)', line)
+        if match and not line.lstrip().startswith(('#', '-')):
+            names.add(_normalize(match.group(1)))
+    return names
+
+
+def print_runtime_notice(reports: List[ArtifactReport]):
+    """Avisa qué distribuciones quitó `runtime_packages` de cada layer, marcando las que su
+    `requirements.txt` declara: en Lambda se importará la versión del runtime, no esa.
+    """
+    for report in reports:
+        if not report.runtime_removed:
+            continue
+        pinned = _pinned(report.path / 'python' / 'requirements.txt')
+        removed = ', '.join(f'{dist} (en requirements.txt)' if dist.split()[0] in pinned else dist
+                            for dist in report.runtime_removed)
+        typer.echo(f'[!] layer {report.name}: spa.build.slim.runtime_packages eliminó {removed}; '
+                   f'en Lambda se usará la versión del runtime.', color=typer.colors.YELLOW)
+
+
+def check_budgets(reports: List[ArtifactReport], config: Slim) -> List[str]:
+    """Mensajes por cada presupuesto excedido (vacío si todo cabe).
+
+    El tamaño de una función es su lambda más todas las layers del proyecto, que
+    es lo que cuenta para el límite de 250 MB descomprimidos de AWS.
+    """
+    violations = []
+    layers_total = sum(r.after for r in reports if r.kind == 'layer')
+    for report in reports:
+        budget = config.max_layer_mb if report.kind == 'layer' else config.max_lambda_mb
+        if budget is not None and report.after > budget * MB:
+            violations.append(f'{report.kind} {report.name}: {format_size(report.after)} > {budget:g} MB')
+        if report.kind == 'lambda' and config.max_function_mb is not None:
+            function_size = report.after + layers_total
+            if function_size > config.max_function_mb * MB:
+                violations.append(f'función {report.name} (lambda + layers): {format_size(function_size)} '
+                                  f'> {config.max_function_mb:g} MB')
+    return violations
+
+
+def refresh_sizes(reports: List[ArtifactReport], stage: str):
+    """Vuelve a medir `after` después de `stage` y registra lo que agregó."""
+    for report in reports:
+        size = _tree_size(report.path)
+        report.added[stage] = report.added.get(stage, 0) + size - report.after
+        report.after = size
+
+
+def _net_pct(before: int, after: int) -> str:
+    # Ahorro neto: lo que otra etapa agregó (p. ej. bytecode) descuenta lo eliminado
+    return f'{(before - after) / before * 100:.0f}%' if before else '-'
+
+
+def print_slim_report(reports: List[ArtifactReport]):
+    typer.echo(f"{'artefacto':<36} {'antes':>10} {'después':>10} {'ahorro':>10}  detalle")
+    for report in reports:
+        pct = _net_pct(report.before, report.after)
+        detail = ', '.join([f'{rule} {format_size(size)}' for rule, size in sorted(report.removed.items()) if size]
+                           + [f"{'+' if size > 0 else '-'}{stage} {format_size(abs(size))}"
+                              for stage, size in report.added.items() if size])
+        typer.echo(f'{report.kind + " " + report.name:<36} {format_size(report.before):>10} '
+                   f'{format_size(report.after):>10} {pct:>10}  {detail}')
+    before = sum(r.before for r in reports)
+    after = sum(r.after for r in reports)
+    saved = sum(r.saved for r in reports)
+    pct = _net_pct(before, after)
+    typer.echo(f"{'total':<36} {format_size(before):>10} {format_size(after):>10} {pct:>10}  {format_size(saved)} eliminados")
@@ -2,7 +2,6 @@ import os
 import json
 import shutil
 from typing import cast
-from cookiecutter.main import cookiecutter
 from functools import wraps
 from typing import Any, Callable, Dict
 from pathlib import Path
@@ -30,6 +29,8 @@ def generate_project_template(project_name: str,
         pattern_version (str, optional): Rama o tag de github a utilizar del template. Lates utiliza la rama main.
         project_description (str, optional): Descripción del proyecto. Defaults to 'Autogenerado por SPA-CLI'.
     """
+    from cookiecutter.main import cookiecutter
+
     config_override = {
         "directory_name": project_name,
         "develop_branch": "main",
@@ -8,6 +8,8 @@ from pathlib import Path
 from .install_local_layers import install_layers
 from .build_local_api import build_local_api
 from .build_api_json import build_api_json
+from .auth_bridge_gen import authorizer_registry
+from .endpoint_index import EndpointIndex
 from ...globals import Config
 
 def on_cancel():
@@ -18,17 +20,30 @@ def on_error(code: int):
 def on_ok():
     typer.echo("[✓] El servidor terminó normalmente.")
 
-def main(project_config: Config, extra_args: list[str] = []):
+def prepare_local_api(project_config: Config, target: str = "fastapi") -> Path:
+    """Genera `src/api_local/` (router, openapi.json + snapshot y main_server.py) y regresa la raíz del proyecto."""
     lambdas_path = Path(os.getcwd()).joinpath(project_config.project.folders.lambdas)
     api_path = Path(os.getcwd()).joinpath(project_config.project.folders.root).parent.joinpath('api.yaml')
     base_path = Path(os.getcwd()).joinpath(project_config.project.folders.root).parent
 
+    index = EndpointIndex.build(lambdas_path)
+
     typer.echo('Instalando bibliotecas locales…')
-    build_local_api(lambdas_path, base_path)
+    build_local_api(lambdas_path, base_path, index=index, target=target, config=project_config)
 
     typer.echo('Generando definición OpenAPI…')
-    build_api_json(api_path, lambdas_path, base_path)
+    build_api_json(api_path, lambdas_path, base_path, index=index, authorizers=authorizer_registry(project_config))
     shutil.copy(Path(__file__).parent / "main_server.py", base_path / "src/api_local/main_server.py")
+    return base_path
+
+def main(project_config: Config, extra_args: list[str] = [], hot_reload: bool = False,
+         lambda_lifecycle: bool = False):
+    base_path = prepare_local_api(project_config)
+    if hot_reload:
+        shutil.copy(Path(__file__).parent / "hot_reload.py", base_path / "src/api_local/hot_reload.py")
+        # El reinicio completo de `fastapi dev` lo reemplaza el watcher selectivo
+        extra_args = [arg for arg in (extra_args or []) if arg not in ('--reload', '--no-reload')]
+        extra_args.append('--no-reload')
 
     # Construir comando base
     cmd = [sys.executable, "-m", "fastapi", "dev", str(base_path / "src/api_local/main_server.py")]
@@ -85,6 +100,17 @@ def main(project_config: Config, extra_args: list[str] = []):
     env['SERVER_LOG_LEVEL'] = server_config['log_level']
     env['SERVER_ROOT_PATH'] = server_config['root_path']
     env['SERVER_PROXY_HEADERS'] = server_config['proxy_headers']
+    if lambda_lifecycle:
+        env['SPA_LAMBDA_LIFECYCLE'] = '1'
+    if hot_reload:
+        layers_path = Path(os.getcwd()).joinpath(project_config.project.folders.layers)
+        env['SPA_HOT_RELOAD'] = '1'
+        env['SPA_LAMBDAS_PATH'] = str(project_config.project.folders.lambdas)
+        env['SPA_LAYERS_PATH'] = str(project_config.project.folders.layers)
+        # Los layers se importan desde el código fuente para que sus cambios se recarguen
+        # sin volver a ejecutar `spa project install`
+        layer_dirs = [str(p) for p in sorted(layers_path.glob("*/python")) if p.is_dir()]
+        env['PYTHONPATH'] = os.pathsep.join(layer_dirs + [p for p in [env.get('PYTHONPATH')] if p])
 
     # Lanzamos el proceso para poder controlarlo en Ctrl+C
     proc = subprocess.Popen(cmd, env=env)
@@ -0,0 +1,242 @@
+import asyncio
+import importlib
+import json
+import sys
+from shutil import copy2
+
+import pytest
+
+from spa_cli.src.utils.build_local_api import API_RUNTIME_PATH, LAMBDA_LIFECYCLE_PATH, METRICS_PATH
+
+
+@pytest.fixture(scope='module')
+def runtime(tmp_path_factory):
+    """`api_runtime` importado como en el build: desde `src/api_local/` junto a sus módulos."""
+    root = tmp_path_factory.mktemp('api_local_root')
+    api_local = root / 'src' / 'api_local'
+    api_local.mkdir(parents=True)
+    (root / 'src' / '__init__.py').write_text('')
+    (api_local / '__init__.py').write_text('')
+    for path in (API_RUNTIME_PATH, METRICS_PATH, LAMBDA_LIFECYCLE_PATH):
+        copy2(path, api_local / path.name)
+    sys.path.insert(0, str(root))
+    try:
+        yield importlib.import_module('src.api_local.api_runtime')
+    finally:
+        sys.path.remove(str(root))
+        for name in [name for name in sys.modules if name == 'src' or name.startswith('src.')]:
+            del sys.modules[name]
+
+
+def _table(runtime, routes):
+    table = runtime.RouteTable()
+    for method, path, target in routes:
+        table.add(method, path, target)
+    return table
+
+
+def test_static_route_wins_over_templated(runtime):
+    table = _table(runtime, [('GET', '/items/{id}', 'get_item'), ('GET', '/items/new', 'new_item')])
+
+    assert table.match('GET', '/items/new') == ('new_item', {})
+    assert table.match('GET', '/items/42') == ('get_item', {'id': '42'})
+
+
+def test_templated_route_backtracks_to_param(runtime):
+    table = _table(runtime, [('GET', '/items/new/edit', 'edit_new'), ('GET', '/items/{id}', 'get_item')])
+
+    assert table.match('GET', '/items/new') == ('get_item', {'id': 'new'})
+    assert table.match('GET', '/items/new/edit') == ('edit_new', {})
+
+
+def test_param_does_not_match_empty_segment(runtime):
+    table = _table(runtime, [('GET', '/items/{id}', 'get_item')])
+
+    assert table.match('GET', '/items/') is None
+    assert table.match('GET', '/items') is None
+
+
+def test_trailing_slash_is_a_distinct_route(runtime):
+    table = _table(runtime, [('GET', '/items', 'get_items')])
+
+    assert table.match('GET', '/items') == ('get_items', {})
+    assert table.match('GET', '/items/') is None
+
+
+def test_allowed_methods(runtime):
+    table = _table(runtime, [('GET', '/items', 'get_items'), ('POST', '/items', 'create_item'),
+                             ('DELETE', '/items/{id}', 'delete_item')])
+
+    assert table.allowed_methods('/items') == ['GET', 'POST']
+    assert table.allowed_methods('/items/7') == ['DELETE']
+    assert table.allowed_methods('/other') == []
+
+
+class _Handlers(dict):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def handler(self, body):
+        def lambda_handler(event, context):
+            self.events.append(event)
+            return {'statusCode': 200, 'headers': {'content-type': 'application/json'}, 'body': json.dumps(body)}
+        return lambda_handler
+
+
+def _router(runtime):
+    handlers = _Handlers()
+    handlers['get_items'] = handlers.handler({'items': []})
+    handlers['get_item'] = handlers.handler({'item': 1})
+    router = runtime.AsgiRouter(handlers)
+    router.add_route('get', '/items', 'get_items')
+    router.add_route('get', '/items/{id}', 'get_item')
+    return router, handlers
+
+
+def _request(router, method, path, query=b'', host='testserver'):
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query, 'scheme': 'http', 'http_version': '1.1',
+        'headers': [(b'host', host.encode())] if host else [],
+        'client': ('127.0.0.1', 1234), 'server': ('testserver', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(router(scope, receive, send))
+    start = next(m for m in messages if m['type'] == 'http.response.start')
+    body = b''.join(m.get('body', b'') for m in messages if m['type'] == 'http.response.body')
+    return start['status'], {k.decode(): v.decode() for k, v in start.get('headers', [])}, body
+
+
+def test_router_dispatches_with_path_params(runtime):
+    router, handlers = _router(runtime)
+
+    status, _, body = _request(router, 'GET', '/items/42')
+
+    assert status == 200
+    assert json.loads(body) == {'item': 1}
+    assert handlers.events[-1]['pathParameters'] == {'id': '42'}
+
+
+def test_router_undeclared_method_is_405(runtime):
+    router, handlers = _router(runtime)
+
+    status, headers, _ = _request(router, 'POST', '/items')
+
+    assert status == 405
+    assert headers['allow'] == 'GET'
+    assert handlers.events == []
+
+
+def test_router_unknown_path_is_404(runtime):
+    router, _ = _router(runtime)
+
+    status, _, _ = _request(router, 'GET', '/orders')
+
+    assert status == 404
+
+
+def test_router_head_is_not_served_by_get(runtime):
+    router, handlers = _router(runtime)
+
+    status, headers, _ = _request(router, 'HEAD', '/items')
+
+    assert status == 405
+    assert headers['allow'] == 'GET'
+    assert handlers.events == []
+
+
+def test_router_redirects_trailing_slash(runtime):
+    router, handlers = _router(runtime)
+
+    status, headers, _ = _request(router, 'GET', '/items/', query=b'page=2')
+
+    assert status == 307
+    assert headers['location'] == 'http://testserver/items?page=2'
+    assert handlers.events == []
+
+
+def test_router_redirect_without_host_is_relative(runtime):
+    router, _ = _router(runtime)
+
+    status, headers, _ = _request(router, 'GET', '/items/', host=None)
+
+    assert status == 307
+    assert headers['location'] == '/items'
+
+
+def _respond(runtime, response):
+    router = runtime.AsgiRouter({'export': lambda event, context: response})
+    router.add_route('GET', '/export', 'export')
+    return _request(router, 'GET', '/export')
+
+
+def test_data_dict_with_file_key_is_serialized(runtime, tmp_path):
+    secret = tmp_path / 'secret.txt'
+    secret.write_text('do not serve')
+
+    status, headers, body = _respond(runtime, {'file': str(secret), 'rows': 3})
+
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(body) == {'file': str(secret), 'rows': 3}
+
+
+def test_stream_markers_require_status_code(runtime, tmp_path):
+    report = tmp_path / 'report.csv'
+    report.write_text('a,b\n')
+
+    _, _, body = _respond(runtime, {'spa:file': str(report)})
+
+    assert json.loads(body) == {'spa:file': str(report)}
+
+
+def test_file_marker_streams_the_file(runtime, tmp_path):
+    report = tmp_path / 'report.csv'
+    report.write_text('a,b\n1,2\n')
+
+    status, headers, body = _respond(runtime, {'statusCode': 201, 'spa:file': str(report)})
+
+    assert status == 201
+    assert headers['content-type'] == 'text/csv'
+    assert headers['content-length'] == str(len(body))
+    assert body == b'a,b\n1,2\n'
+
+
+def test_stream_marker_sends_generator_chunks(runtime):
+    def chunks():
+        yield 'a'
+        yield b'b'
+
+    status, _, body = _respond(runtime, {'statusCode': 200, 'spa:stream': chunks()})
+
+    assert (status, body) == (200, b'ab')
+
+
+def test_proxy_response_without_markers_uses_body(runtime):
+    status, _, body = _respond(runtime, {'statusCode': 200, 'body': 'hello', 'file': '/etc/passwd'})
+
+    assert (status, body) == (200, b'hello')
+
+
+def test_event_request_context_is_a_complete_plain_dict(runtime):
+    router, handlers = _router(runtime)
+
+    _request(router, 'GET', '/items')
+    _request(router, 'GET', '/items')
+    first, second = handlers.events
+    context = first['requestContext']
+
+    assert type(context) is dict
+    assert {'authentication', 'authorizer', 'http', 'requestId'} <= set(context)
+    assert 'authorizer' in context
+    assert json.loads(json.dumps(first))['requestContext']['authorizer']['jwt']['scopes'] == ['scope1', 'scope2']
+    context['authorizer']['jwt']['claims']['claim1'] = 'changed'
+    assert second['requestContext']['authorizer']['jwt']['claims']['claim1'] == 'value1'
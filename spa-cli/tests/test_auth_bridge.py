@@ -0,0 +1,96 @@
+import importlib
+import sys
+from shutil import copy2
+
+import pytest
+
+from spa_cli.src.utils import openapi_snapshot
+from spa_cli.src.utils.auth_bridge_gen import TEMPLATE_PATH
+
+
+@pytest.fixture(scope='module')
+def bridge(tmp_path_factory):
+    """El template de `auth_bridge.py` importado como en el build, junto a `openapi_snapshot.py`."""
+    root = tmp_path_factory.mktemp('auth_bridge_root')
+    api_local = root / 'src' / 'api_local'
+    api_local.mkdir(parents=True)
+    (root / 'src' / '__init__.py').write_text('')
+    (api_local / '__init__.py').write_text('')
+    copy2(TEMPLATE_PATH, api_local / 'auth_bridge.py')
+    copy2(openapi_snapshot.__file__, api_local / 'openapi_snapshot.py')
+    sys.path.insert(0, str(root))
+    try:
+        yield importlib.import_module('src.api_local.auth_bridge')
+    finally:
+        sys.path.remove(str(root))
+        for name in [name for name in sys.modules if name == 'src' or name.startswith('src.')]:
+            del sys.modules[name]
+
+
+SPEC = {
+    'paths': {
+        '/items': {
+            'get': {},
+            'post': {'security': [{'jwt': []}]},
+        },
+        '/items/{id}': {
+            'get': {'security': [{'api_key': []}]},
+            'delete': {'security': [{'jwt': []}, {'api_key': []}]},
+        },
+        '/items/export': {
+            'get': {'security': [{'admin': []}]},
+        },
+        '/users/{user_id}/orders/{order_id}': {
+            'get': {'security': [{'jwt': []}]},
+        },
+    },
+}
+
+
+@pytest.fixture(scope='module')
+def table(bridge):
+    return bridge._build_security_index(openapi_snapshot.security_index(SPEC))
+
+
+def test_operation_security(table):
+    assert table.match('POST', '/items') == ['jwt']
+    assert table.match('GET', '/items/42') == ['api_key']
+    assert table.match('DELETE', '/items/42') == ['jwt', 'api_key']
+
+
+def test_public_operation_is_not_secured(table):
+    assert table.match('GET', '/items') is None
+
+
+def test_global_security_applies_to_operations_without_their_own(bridge):
+    spec = {'security': [{'jwt': []}], 'paths': {'/a': {'get': {}}, '/b': {'get': {'security': [{'api_key': []}]}}}}
+    table = bridge._build_security_index(openapi_snapshot.security_index(spec))
+
+    assert table.match('GET', '/a') == ['jwt']
+    assert table.match('GET', '/b') == ['api_key']
+
+
+def test_static_route_wins_over_templated(table):
+    assert table.match('GET', '/items/export') == ['admin']
+    assert table.match('GET', '/items/exports') == ['api_key']
+
+
+def test_templated_route_with_several_params(table):
+    assert table.match('GET', '/users/7/orders/9') == ['jwt']
+    assert table.match('GET', '/users/7/orders') is None
+    assert table.match('GET', '/users//orders/9') is None
+
+
+def test_trailing_slash_is_secured_like_the_route(table):
+    # El router responde 307 a `/items/42/`; la redirección no debe saltarse el authorizer
+    assert table.match('DELETE', '/items/42/') == ['jwt', 'api_key']
+
+
+def test_only_declared_methods_are_secured(table):
+    assert table.methods() == frozenset({'GET', 'POST', 'DELETE'})
+    assert table.match('HEAD', '/items/42') is None
+    assert table.match('PUT', '/items/42') is None
+
+
+def test_empty_table_is_falsy(bridge):
+    assert not bridge._build_security_index([])
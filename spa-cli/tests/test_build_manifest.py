@@ -0,0 +1,107 @@
+from pathlib import Path
+
+import pytest
+
+from spa_cli.src.utils.build import build_lambdas
+from spa_cli.src.utils.build_manifest import BuildManifest, sync_tree
+
+
+def _write(path: Path, text: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def source(tmp_path):
+    src = tmp_path / 'src'
+    _write(src / 'lambda_function.py', 'def lambda_handler(event, context):\n    return {}\n')
+    _write(src / 'pkg' / 'util.py', 'VALUE = 1\n')
+    _write(src / '__pycache__' / 'lambda_function.cpython-311.pyc', 'bytecode')
+    return src
+
+
+def test_first_sync_copies_sources_without_bytecode(tmp_path, source):
+    manifest = BuildManifest(tmp_path / 'build')
+
+    copied, removed = sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a')
+
+    assert (copied, removed) == (2, 0)
+    assert sorted(manifest.files('lambdas/a')) == ['lambda_function.py', 'pkg/util.py']
+    assert not (tmp_path / 'out' / '__pycache__').exists()
+
+
+def test_unchanged_rebuild_is_a_noop(tmp_path, source):
+    build = tmp_path / 'build'
+    manifest = BuildManifest(build)
+    sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a')
+    manifest.save()
+
+    manifest = BuildManifest.load(build)
+    assert sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a') == (0, 0)
+
+
+def test_only_changed_files_are_copied(tmp_path, source):
+    manifest = BuildManifest(tmp_path / 'build')
+    sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a')
+    _write(source / 'pkg' / 'util.py', 'VALUE = 2\n')
+
+    assert sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a') == (1, 0)
+    assert (tmp_path / 'out' / 'pkg' / 'util.py').read_text() == 'VALUE = 2\n'
+
+
+def test_deleted_source_is_removed_from_build(tmp_path, source):
+    manifest = BuildManifest(tmp_path / 'build')
+    sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a')
+    (source / 'pkg' / 'util.py').unlink()
+
+    assert sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a') == (0, 1)
+    assert not (tmp_path / 'out' / 'pkg').exists()
+
+
+def test_missing_output_is_copied_again(tmp_path, source):
+    manifest = BuildManifest(tmp_path / 'build')
+    sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a')
+    (tmp_path / 'out' / 'pkg' / 'util.py').unlink()
+
+    assert sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a') == (1, 0)
+
+
+def test_pruned_files_are_not_copied_until_they_change(tmp_path, source):
+    manifest = BuildManifest(tmp_path / 'build')
+    sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a')
+    (tmp_path / 'out' / 'pkg' / 'util.py').unlink()
+    manifest.set_pruned('lambdas/a', ['pkg/util.py'])
+
+    assert sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a') == (0, 0)
+
+    _write(source / 'pkg' / 'util.py', 'VALUE = 2\n')
+    assert sync_tree(source, tmp_path / 'out', manifest, 'lambdas/a') == (1, 0)
+    assert manifest.pruned('lambdas/a') == set()
+
+
+def test_manifest_of_another_version_is_ignored(tmp_path, source):
+    build = tmp_path / 'build'
+    build.mkdir()
+    (build / '.spa-build-manifest.json').write_text('{"version": 0, "files": {"lambdas/a": {"x": "y"}}}')
+
+    assert BuildManifest.load(build).files('lambdas/a') == {}
+
+
+def test_build_lambdas_removes_deleted_lambdas(tmp_path):
+    lambdas = tmp_path / 'lambdas'
+    for name in ('get_items', 'worker'):
+        _write(lambdas / name / 'lambda_function.py', f'NAME = {name!r}\n')
+    build = tmp_path / 'build'
+    out = build / 'infra' / 'components' / 'lambdas'
+    manifest = BuildManifest(build)
+    build_lambdas(lambdas, out, manifest=manifest)
+    manifest.save()
+
+    (lambdas / 'worker' / 'lambda_function.py').unlink()
+    (lambdas / 'worker').rmdir()
+    manifest = BuildManifest.load(build)
+    build_lambdas(lambdas, out, manifest=manifest)
+
+    assert sorted(p.name for p in out.iterdir()) == ['get_items']
+    assert manifest.keys('lambdas/') == ['lambdas/get_items']
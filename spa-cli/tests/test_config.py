@@ -0,0 +1,112 @@
+import pytest
+
+from spa_cli.globals import ConfigError, load_config, resolve_config
+
+MINIMAL = '''
+[spa.project.definition]
+name = "demo"
+description = ""
+author = ""
+author_email = ""
+base_api = "api.yaml"
+
+[spa.template.files]
+model = "model.txt"
+service = "service.txt"
+controller = "controller.txt"
+endpoint = "endpoint.txt"
+lambda_function = "lambda.txt"
+test_lambda = "test_lambda.txt"
+lambda_conf = "lambda_conf.txt"
+
+[spa.project.folders]
+root = "src"
+models = "src/models"
+services = "src/services"
+controllers = "src/controllers"
+jsons = ".spa/json"
+lambdas = "src/lambdas"
+layers = "src/layers"
+'''
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Escribe `spa_project.toml` (MINIMAL + `extra`) en un proyecto temporal."""
+    monkeypatch.chdir(tmp_path)
+    for variable in ('ENVIRONMENT', 'APP_NAME', 'AWS_ACCOUNT_ID', 'AWS_REGION'):
+        monkeypatch.delenv(variable, raising=False)
+
+    def write(extra: str = ''):
+        (tmp_path / 'spa_project.toml').write_text(MINIMAL + extra)
+        return load_config()
+    return write
+
+
+def test_minimal_config_uses_defaults(project):
+    config = project()
+
+    assert config.project.definition.name == 'demo'
+    assert config.deploy.app_name == 'demo'
+    assert config.container.server.router == 'fastapi'
+    assert config.build.slim.runtime_packages == []
+    assert config.environment == 'dev'
+
+
+def test_unknown_keys_are_ignored_with_a_warning(project, tmp_path, capsys):
+    (tmp_path / 'spa_project.toml').write_text(
+        MINIMAL.replace('base_api = "api.yaml"\n', 'base_api = "api.yaml"\nversion = "1.0"\n')
+        + '\n[spa.container.server]\nwrokers = 4\n')
+
+    config = load_config()
+
+    err = capsys.readouterr().err
+    assert 'spa.project.definition: se ignoran las claves desconocidas version' in err
+    assert 'spa.container.server: se ignoran las claves desconocidas wrokers' in err
+    assert config.container.server.workers is None
+
+
+@pytest.mark.parametrize('extra, message', [
+    ('\n[spa.build.slim]\nmax_layer_mb = -1\n', 'spa.build.slim.max_layer_mb debe ser un número positivo'),
+    ('\n[spa.container.server]\nworkers = "4"\n', 'spa.container.server.workers debe ser un entero'),
+    ('\n[spa.build.bytecode]\noptimize = 3\n', 'spa.build.bytecode.optimize debe ser 0, 1 o 2'),
+    ('\n[spa.build.dedupe]\npolicy = "drop"\n', 'spa.build.dedupe.policy debe ser uno de'),
+    ('\n[spa.lambdas.get_items]\ntimeout = 0\n', 'spa.lambdas.get_items.timeout debe ser un número positivo'),
+])
+def test_invalid_values_are_fatal(project, extra, message):
+    with pytest.raises(ConfigError, match=message):
+        project(extra)
+
+
+def test_missing_section_is_fatal(project, tmp_path):
+    (tmp_path / 'spa_project.toml').write_text('[spa.project.definition]\nname = "demo"\n')
+
+    with pytest.raises(ConfigError, match='falta'):
+        load_config()
+
+
+def test_invalid_toml_is_fatal(project, tmp_path):
+    (tmp_path / 'spa_project.toml').write_text('[spa\n')
+
+    with pytest.raises(ConfigError, match='no es un toml válido'):
+        load_config()
+
+
+def test_environment_overlay_is_merged(project, monkeypatch):
+    project('\n[spa.build.slim]\nmax_layer_mb = 60\n\n[spa.environments.prod.build.slim]\nmax_function_mb = 200\n')
+    monkeypatch.setenv('AWS_REGION', 'eu-west-1')
+
+    config = load_config(environment='prod')
+
+    assert (config.build.slim.max_layer_mb, config.build.slim.max_function_mb) == (60, 200)
+    assert config.deploy.aws_region == 'eu-west-1'
+    assert config.fingerprint != load_config(environment='dev').fingerprint
+
+
+def test_invalid_overlay_names_the_environment():
+    import tomllib
+
+    raw = tomllib.loads(MINIMAL + '\n[spa.environments.prod.build.bytecode]\nenabled = "yes"\n')
+
+    with pytest.raises(ConfigError, match=r'\[spa.environments.prod\]'):
+        resolve_config(raw, 'prod')
@@ -0,0 +1,143 @@
+from pathlib import Path
+from typing import Dict
+
+from spa_cli.globals import Dedupe
+from spa_cli.src.utils.build_manifest import BuildManifest
+from spa_cli.src.utils.dedupe import dedupe_layers, invalidate_on_layers_change
+
+
+def _install(build: Path, layer: str, name: str, version: str, files: Dict[str, str], record: bool = True):
+    """Simula `pip install -t build/<layer>/python` de una distribución con su `RECORD`."""
+    site = build / layer / 'python'
+    dist_info = f'{name}-{version}.dist-info'
+    for rel, text in files.items():
+        (site / rel).parent.mkdir(parents=True, exist_ok=True)
+        (site / rel).write_text(text)
+    (site / dist_info).mkdir(parents=True, exist_ok=True)
+    (site / dist_info / 'METADATA').write_text(f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n\nDescripción\n')
+    if record:
+        lines = [f'{rel},sha256=x,{len(text)}' for rel, text in files.items()]
+        lines += [f'{dist_info}/METADATA,,', f'{dist_info}/RECORD,,']
+        (site / dist_info / 'RECORD').write_text('\n'.join(lines) + '\n')
+    return site
+
+
+SIX = {'six.py': 'VERSION = "1.16.0"\n' * 20}
+
+
+def test_same_version_is_hoisted_to_the_shared_layer(tmp_path):
+    a = _install(tmp_path, 'a', 'six', '1.16.0', SIX)
+    b = _install(tmp_path, 'b', 'six', '1.16.0', SIX)
+
+    report = dedupe_layers(tmp_path, Dedupe(policy='hoist'))
+
+    shared = tmp_path / 'shared' / 'python'
+    assert report.hoisted == ['six']
+    assert report.saved >= len(SIX['six.py'])
+    assert (shared / 'six.py').read_text() == SIX['six.py']
+    assert (shared / 'six-1.16.0.dist-info' / 'METADATA').exists()
+    assert list(a.iterdir()) == [] and list(b.iterdir()) == []
+
+
+def test_warn_policy_only_reports(tmp_path):
+    a = _install(tmp_path, 'a', 'six', '1.16.0', SIX)
+    _install(tmp_path, 'b', 'six', '1.16.0', SIX)
+
+    report = dedupe_layers(tmp_path, Dedupe())
+
+    assert [dup.name for dup in report.duplicates] == ['six']
+    assert report.duplicates[0].wasted == report.duplicates[0].copies[0].size
+    assert report.hoisted == [] and (a / 'six.py').exists()
+    assert not (tmp_path / 'shared').exists()
+
+
+def test_version_conflicts_are_reported_and_never_moved(tmp_path):
+    a = _install(tmp_path, 'a', 'urllib3', '2.2.0', {'urllib3/__init__.py': 'v2'})
+    b = _install(tmp_path, 'b', 'urllib3', '1.26.18', {'urllib3/__init__.py': 'v1'})
+
+    report = dedupe_layers(tmp_path, Dedupe(policy='hoist'))
+
+    assert [dup.name for dup in report.conflicts] == ['urllib3']
+    assert report.conflicts[0].versions == {'a': '2.2.0', 'b': '1.26.18'}
+    assert report.hoisted == []
+    assert (a / 'urllib3' / '__init__.py').read_text() == 'v2'
+    assert (b / 'urllib3' / '__init__.py').read_text() == 'v1'
+
+
+def test_namespace_dirs_shared_with_other_distributions_are_kept(tmp_path):
+    auth = {'google/auth/__init__.py': 'auth', 'google/auth/jwt.py': 'jwt'}
+    a = _install(tmp_path, 'a', 'google-auth', '2.0.0', auth)
+    _install(tmp_path, 'a', 'protobuf', '4.25.0', {'google/protobuf/__init__.py': 'protobuf'})
+    b = _install(tmp_path, 'b', 'google-auth', '2.0.0', auth)
+
+    report = dedupe_layers(tmp_path, Dedupe(policy='hoist'))
+
+    assert report.hoisted == ['google_auth']
+    assert (a / 'google' / 'protobuf' / '__init__.py').read_text() == 'protobuf'
+    assert not (a / 'google' / 'auth').exists()
+    assert not (b / 'google').exists()
+    assert (tmp_path / 'shared' / 'python' / 'google' / 'auth' / 'jwt.py').read_text() == 'jwt'
+
+
+def test_distributions_without_record_are_not_moved(tmp_path):
+    a = _install(tmp_path, 'a', 'six', '1.16.0', SIX, record=False)
+    _install(tmp_path, 'b', 'six', '1.16.0', SIX)
+
+    report = dedupe_layers(tmp_path, Dedupe(policy='hoist'))
+
+    assert [dup.name for dup in report.duplicates] == ['six']
+    assert report.hoisted == [] and (a / 'six.py').exists()
+
+
+def test_ignored_distributions_are_not_reported(tmp_path):
+    _install(tmp_path, 'a', 'six', '1.16.0', SIX)
+    _install(tmp_path, 'b', 'six', '1.16.0', SIX)
+
+    assert dedupe_layers(tmp_path, Dedupe(policy='fail', ignore=['Six'])).duplicates == []
+
+
+def _layers_source(tmp_path: Path) -> Path:
+    src = tmp_path / 'src' / 'layers'
+    for layer in ('a', 'b'):
+        (src / layer / 'python').mkdir(parents=True)
+        (src / layer / 'python' / 'requirements.txt').write_text('-r base.txt\n')
+        (src / layer / 'python' / 'base.txt').write_text('six==1.16.0\n')
+    return src
+
+
+def _installed(manifest: BuildManifest):
+    for layer in ('a', 'b'):
+        manifest.set_step(f'layers/{layer}/requirements', 'installed')
+
+
+def test_requirements_change_reinstalls_every_layer(tmp_path):
+    src, build = _layers_source(tmp_path), tmp_path / 'build'
+    manifest = BuildManifest(build)
+    config = Dedupe(policy='hoist')
+    invalidate_on_layers_change(manifest, config, src, build)
+    _installed(manifest)
+    (build / 'shared' / 'python').mkdir(parents=True)
+
+    assert invalidate_on_layers_change(manifest, config, src, build) is False
+    assert manifest.step('layers/a/requirements') == 'installed'
+
+    (src / 'b' / 'python' / 'base.txt').write_text('six==1.17.0\n')
+
+    assert invalidate_on_layers_change(manifest, config, src, build) is True
+    assert manifest.keys('layers/') == []
+    assert not (build / 'shared').exists()
+
+
+def test_config_change_reinstalls_and_leaving_hoist_drops_the_shared_layer(tmp_path):
+    src, build = _layers_source(tmp_path), tmp_path / 'build'
+    manifest = BuildManifest(build)
+    invalidate_on_layers_change(manifest, Dedupe(policy='hoist'), src, build)
+    _installed(manifest)
+    (build / 'shared' / 'python').mkdir(parents=True)
+
+    assert invalidate_on_layers_change(manifest, Dedupe(policy='warn'), src, build) is True
+    assert not (build / 'shared').exists()
+
+    _installed(manifest)
+    assert invalidate_on_layers_change(manifest, Dedupe(policy='fail'), src, build) is False
+    assert manifest.step('layers/b/requirements') == 'installed'
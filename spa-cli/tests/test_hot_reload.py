@@ -0,0 +1,116 @@
+import importlib
+import logging
+import sys
+from pathlib import Path
+from shutil import copy2
+
+import pytest
+from fastapi import FastAPI
+
+from spa_cli.src.utils import hot_reload, openapi_snapshot
+from spa_cli.src.utils.auth_bridge_gen import TEMPLATE_PATH
+
+ROUTER = '''
+class Router:
+    def __init__(self):
+        self.routes = {}
+
+    def replace_routes(self, name, routes):
+        self.routes[name] = routes
+
+
+def get_item_handler(event, context):
+    return {"statusCode": 200}
+
+
+router = Router()
+HANDLERS = {"get_item": get_item_handler}
+'''
+
+PUBLIC = '/items/{id}:\n  get:\n    operationId: get_item\n'
+SECURED = '/items/{id}:\n  get:\n    security:\n      - jwt: []\n'
+
+
+def _spec(endpoint_yaml: str, secured_orders: bool) -> dict:
+    import yaml
+
+    orders = {'get': {'security': [{'jwt': []}]} if secured_orders else {}}
+    return {
+        'openapi': '3.0.1',
+        'components': {'securitySchemes': {'jwt': {'type': 'apiKey', 'in': 'header', 'name': 'Authorization'}}},
+        'paths': {'/orders': orders, **yaml.safe_load(endpoint_yaml)},
+    }
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Un `src/api_local` arrancado con `endpoint.yaml` público para `get_item`."""
+    def start(secured_orders: bool = True):
+        api_local = tmp_path / 'src' / 'api_local'
+        api_local.mkdir(parents=True)
+        (tmp_path / 'src' / '__init__.py').write_text('')
+        (api_local / '__init__.py').write_text('')
+        (api_local / 'router.py').write_text(ROUTER)
+        copy2(TEMPLATE_PATH, api_local / 'auth_bridge.py')
+        copy2(openapi_snapshot.__file__, api_local / 'openapi_snapshot.py')
+        endpoint = tmp_path / 'src' / 'lambdas' / 'get_item' / 'endpoint.yaml'
+        endpoint.parent.mkdir(parents=True)
+        endpoint.write_text(PUBLIC)
+        openapi_snapshot.write_snapshot(api_local / openapi_snapshot.SNAPSHOT_NAME, _spec(PUBLIC, secured_orders))
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        router_module = importlib.import_module('src.api_local.router')
+        bridge = importlib.import_module('src.api_local.auth_bridge')
+        snapshot = importlib.import_module('src.api_local.openapi_snapshot')
+        app = FastAPI()
+        app.openapi = lambda: app.openapi_schema or snapshot.load_schema(api_local)
+        middleware = bridge.build_security_middleware()
+        reloader = hot_reload.HotReloader(app, router_module, '/dev', Path('src/lambdas'), Path('src/layers'))
+        reloader.remember_definitions()
+        return reloader, bridge, middleware, endpoint
+
+    yield start
+    for name in [name for name in sys.modules if name == 'src' or name.startswith('src.')]:
+        del sys.modules[name]
+
+
+def _secured(bridge, method, path):
+    route_table, _ = bridge._active_routes['current']
+    return route_table.match(method, path)
+
+
+def test_endpoint_change_rebuilds_the_auth_routes(project):
+    reloader, bridge, middleware, endpoint = project()
+    assert middleware is not None
+    assert _secured(bridge, 'GET', '/items/7') is None
+
+    endpoint.write_text(SECURED)
+    reloader.handle_changes([endpoint])
+
+    assert _secured(bridge, 'GET', '/items/7') == ['jwt']
+    assert _secured(bridge, 'GET', '/orders') == ['jwt']
+    assert reloader.router_module.router.routes['get_item'] == [('GET', '/items/{id}')]
+
+
+def test_endpoint_change_refreshes_openapi(project):
+    reloader, _, _, endpoint = project()
+    reloader.app.openapi_schema = reloader.app.openapi()
+
+    endpoint.write_text('/items/{id}:\n  put:\n    operationId: put_item\n')
+    reloader.handle_changes([endpoint])
+
+    paths = reloader.app.openapi()['paths']
+    assert paths['/items/{id}'] == {'put': {'operationId': 'put_item'}}
+    assert '/orders' in paths
+
+
+def test_security_without_middleware_asks_for_restart(project, caplog):
+    reloader, _, middleware, endpoint = project(secured_orders=False)
+    assert middleware is None
+
+    endpoint.write_text(SECURED)
+    with caplog.at_level(logging.WARNING, logger='uvicorn.error'):
+        reloader.handle_changes([endpoint])
+
+    assert 'reinicia run-api' in caplog.text
@@ -0,0 +1,23 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'scripts' / 'check_import_time.py'
+_spec = importlib.util.spec_from_file_location('check_import_time', SCRIPT)
+check_import_time = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check_import_time)
+
+MAX_MS = float(os.getenv('SPA_MAX_IMPORT_MS', '0'))
+
+
+@pytest.mark.parametrize('argv, forbidden', check_import_time.CHECKS,
+                         ids=[' '.join(argv) for argv, _ in check_import_time.CHECKS])
+def test_command_imports_stay_light(argv, forbidden):
+    modules, total_us = check_import_time.run_check(argv)
+
+    assert 'spa_cli.cli' in modules, 'el comando no llegó a importar el CLI'
+    assert check_import_time.leaked_modules(modules, forbidden) == []
+    if MAX_MS:
+        assert total_us / 1000 <= MAX_MS
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+
+import pytest
+
+from spa_cli.src.utils import lambda_lifecycle
+from spa_cli.src.utils.lambda_lifecycle import (THROTTLED_RESPONSE, TIMEOUT_RESPONSE, FunctionPool,
+                                                FunctionSettings, Instance)
+
+
+def _pool(handler, reserved=None, timeout=1.0) -> FunctionPool:
+    """Pool cuyas instancias usan `handler` en lugar de importar `lambda_function.py`."""
+    pool = FunctionPool(FunctionSettings(name='items', function_name='dev-items', timeout=timeout,
+                                         reserved=reserved))
+    pool._create = lambda provisioned=False: Instance(handler, provisioned, pool.generation)
+    return pool
+
+
+async def run_async(handler, event, context):
+    return await handler(event, context)
+
+
+async def run_in_thread(handler, event, context):
+    return await asyncio.get_running_loop().run_in_executor(None, handler, event, context)
+
+
+def test_reserved_limit_queues_instead_of_creating_instances():
+    async def handler(event, context):
+        await asyncio.sleep(0.02)
+        return {'statusCode': 200, 'body': event['n']}
+
+    async def scenario():
+        pool = _pool(handler, reserved=1)
+        results = await asyncio.gather(*(pool.invoke({'n': n}, f'req-{n}', run_async) for n in range(3)))
+        return pool, results
+
+    pool, results = asyncio.run(scenario())
+
+    assert [r['body'] for r in results] == [0, 1, 2]
+    assert (pool.size, pool.busy, len(pool.idle)) == (1, 0, 1)
+    assert (pool.stats.cold_starts, pool.stats.warm_starts, pool.stats.queued) == (1, 2, 2)
+    assert pool.stats.peak_concurrency == 1
+
+
+def test_reserved_zero_always_throttles():
+    calls = []
+
+    async def handler(event, context):
+        calls.append(event)
+
+    pool = _pool(handler, reserved=0)
+
+    assert asyncio.run(pool.invoke({}, 'req', run_async)) is THROTTLED_RESPONSE
+    assert (calls, pool.size, pool.stats.throttled) == ([], 0, 1)
+
+
+def test_throttle_mode_rejects_instead_of_queueing(monkeypatch):
+    monkeypatch.setattr(lambda_lifecycle, 'THROTTLE', True)
+
+    async def handler(event, context):
+        await asyncio.sleep(0.02)
+        return {'statusCode': 200}
+
+    async def scenario():
+        pool = _pool(handler, reserved=1)
+        return pool, await asyncio.gather(pool.invoke({}, 'a', run_async), pool.invoke({}, 'b', run_async))
+
+    pool, (first, second) = asyncio.run(scenario())
+
+    assert first == {'statusCode': 200}
+    assert second is THROTTLED_RESPONSE
+    assert (pool.stats.throttled, pool.stats.queued) == (1, 0)
+
+
+def test_sync_timeout_keeps_its_slot_until_the_handler_finishes():
+    release = threading.Event()
+    invocations = []
+
+    def handler(event, context):
+        invocations.append(event['n'])
+        if event['n'] == 0:
+            release.wait(5)
+        return {'statusCode': 200}
+
+    async def scenario():
+        pool = _pool(handler, reserved=1, timeout=0.05)
+        assert await pool.invoke({'n': 0}, 'slow', run_in_thread) is TIMEOUT_RESPONSE
+        # El handler sigue en su hilo: la instancia no está libre ni se creó otra
+        assert (pool.size, pool.busy, pool.idle) == (1, 1, [])
+        second = asyncio.ensure_future(pool.invoke({'n': 1}, 'next', run_in_thread))
+        await asyncio.sleep(0.05)
+        assert not second.done() and len(pool.waiters) == 1
+        release.set()
+        return pool, await asyncio.wait_for(second, 2)
+
+    pool, result = asyncio.run(scenario())
+
+    assert result == {'statusCode': 200}
+    assert invocations == [0, 1]
+    # La instancia que excedió el timeout se descartó: la siguiente es un cold start
+    assert (pool.stats.timeouts, pool.stats.cold_starts, pool.stats.queued) == (1, 2, 1)
+    assert (pool.size, pool.busy) == (1, 0)
+
+
+def test_async_timeout_cancels_the_handler_and_frees_the_slot():
+    cancelled = []
+
+    async def handler(event, context):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(context.aws_request_id)
+            raise
+
+    async def scenario():
+        pool = _pool(handler, reserved=1, timeout=0.02)
+        result = await pool.invoke({}, 'slow', run_async)
+        await asyncio.sleep(0)
+        return pool, result
+
+    pool, result = asyncio.run(scenario())
+
+    assert result is TIMEOUT_RESPONSE
+    assert cancelled == ['slow']
+    assert (pool.size, pool.busy, pool.idle) == (0, 0, [])
+
+
+@pytest.mark.parametrize('handed_over', [False, True])
+def test_cancelled_waiter_does_not_leak_the_instance(handed_over):
+    async def handler(event, context):
+        return {'statusCode': 200}
+
+    async def scenario():
+        pool = _pool(handler, reserved=1)
+        instance, cold = await pool.acquire()
+        waiting = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        assert len(pool.waiters) == 1
+        if handed_over:
+            # La instancia ya se asignó al request en espera cuando este se cancela
+            pool.release(instance)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        if not handed_over:
+            pool.release(instance)
+        return pool, cold
+
+    pool, cold = asyncio.run(scenario())
+
+    assert cold is True
+    assert (pool.size, pool.busy, len(pool.idle)) == (1, 0, 1)
+    assert pool._next_waiter() is None
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from spa_cli.src.utils.endpoint_index import EndpointEntry, EndpointIndex
+from spa_cli.src.utils.lambda_profile import profile_lambdas, sample_event
+
+HANDLER = '''
+from pathlib import Path
+
+def lambda_handler(event, context):
+    Path("invoked").write_text(event["requestContext"]["http"]["method"] if "requestContext" in event else "custom")
+    return {"statusCode": 200}
+'''
+
+
+def _index(**definitions):
+    return EndpointIndex(Path('lambdas'), [EndpointEntry(name, Path(name), definition)
+                                           for name, definition in definitions.items()])
+
+
+def test_sample_event_prefers_a_read_only_route():
+    index = _index(items={'/items': {'post': {}, 'parameters': []}, '/items/{id}': {'get': {}}})
+
+    event = sample_event(index, 'items')
+
+    assert event['routeKey'] == 'GET /items/{id}'
+    assert event['requestContext']['http']['method'] == 'GET'
+
+
+@pytest.mark.parametrize('method', ['post', 'put', 'patch', 'delete'])
+def test_sample_event_never_builds_writes(method):
+    assert sample_event(_index(items={'/items': {method: {}}}), 'items') is None
+
+
+def test_sample_event_without_endpoint_is_get_root():
+    assert sample_event(_index(), 'worker')['routeKey'] == 'GET /'
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lambda_dir = tmp_path / 'lambdas' / 'create_item'
+    lambda_dir.mkdir(parents=True)
+    (lambda_dir / 'lambda_function.py').write_text(HANDLER)
+    (lambda_dir / 'endpoint.yaml').write_text('/items:\n  post:\n    operationId: create_item\n')
+    return tmp_path
+
+
+def test_write_only_lambda_is_profiled_without_invoking_it(project):
+    [profile] = profile_lambdas(project, project / 'lambdas', project / 'layers')
+
+    assert profile.ok and profile.import_ms is not None
+    assert profile.first_call_ms is None
+    assert profile.skipped_call == 'POST /items'
+    assert not (project / 'lambdas' / 'create_item' / 'invoked').exists()
+
+
+def test_explicit_event_is_always_invoked(project):
+    [profile] = profile_lambdas(project, project / 'lambdas', project / 'layers', event={'body': '{}'})
+
+    assert profile.ok and profile.first_call_ms is not None
+    assert profile.skipped_call is None
+    assert (project / 'lambdas' / 'create_item' / 'invoked').read_text() == 'custom'
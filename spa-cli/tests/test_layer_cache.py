@@ -0,0 +1,151 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from spa_cli.src.utils import install_local_layers
+from spa_cli.src.utils.layer_cache import LayerCache, requirements_key, scan_requirements
+
+
+def _write(path: Path, text: str = '') -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+@pytest.fixture
+def layer(tmp_path, monkeypatch):
+    """`python/requirements.txt` de una layer; pip resuelve las rutas locales contra el cwd."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / 'layer' / 'python'
+
+
+def test_key_is_stable_for_the_same_inputs(layer):
+    req = _write(layer / 'requirements.txt', 'requests==2.31.0\n')
+
+    assert requirements_key(req) == requirements_key(req)
+
+
+@pytest.mark.parametrize('line, referenced', [
+    ('-r base.txt', 'base.txt'),
+    ('--requirement=base.txt', 'base.txt'),
+    ('-c constraints.txt', 'constraints.txt'),
+])
+def test_key_covers_referenced_requirement_files(layer, line, referenced):
+    req = _write(layer / 'requirements.txt', f'{line}\n')
+    _write(layer / referenced, 'urllib3==2.0.0\n')
+    before = requirements_key(req)
+
+    _write(layer / referenced, 'urllib3==2.2.0\n')
+
+    assert requirements_key(req) != before
+
+
+def test_key_covers_nested_includes_without_looping(layer):
+    req = _write(layer / 'requirements.txt', '-r a.txt\n')
+    _write(layer / 'a.txt', '-r b.txt\n')
+    _write(layer / 'b.txt', '-r a.txt\nsix==1.16.0\n')
+    before = requirements_key(req)
+
+    _write(layer / 'b.txt', '-r a.txt\nsix==1.17.0\n')
+
+    assert requirements_key(req) != before
+
+
+def test_key_covers_local_wheels(layer, tmp_path):
+    wheel = _write(tmp_path / 'wheels' / 'mylib-1.0-py3-none-any.whl', 'v1')
+    req = _write(layer / 'requirements.txt', './wheels/mylib-1.0-py3-none-any.whl\n')
+    before = requirements_key(req)
+
+    wheel.write_text('v2')
+
+    assert requirements_key(req) != before
+
+
+@pytest.mark.parametrize('line', ['./mylib', '-e ./mylib', 'mylib @ file:///opt/mylib'])
+def test_local_directories_are_not_cached(layer, tmp_path, line):
+    (tmp_path / 'mylib').mkdir()
+    req = _write(layer / 'requirements.txt', f'{line}\n')
+
+    assert scan_requirements(req).local_dirs == [line]
+    assert requirements_key(req) is None
+
+
+def test_unpinned_requirements_are_reported(layer):
+    req = _write(layer / 'requirements.txt', '\n'.join([
+        'requests==2.31.0  # fijada',
+        'boto3>=1.28',
+        'six',
+        'attrs==23.*',
+        'pydantic===2.5.0',
+        'lib @ git+https://example.com/lib.git@main',
+        'wheel @ https://example.com/wheel-1.0-py3-none-any.whl',
+        '--index-url https://example.com/simple',
+        'pytz==2024.1 \\',
+        '    --hash=sha256:abc',
+    ]) + '\n')
+
+    assert scan_requirements(req).unpinned == [
+        'boto3>=1.28', 'six', 'attrs==23.*', 'lib @ git+https://example.com/lib.git@main',
+    ]
+    assert requirements_key(req) is not None
+
+
+def _fake_pip(calls):
+    def run(cmd):
+        calls.append(cmd)
+        target = Path(cmd[cmd.index('-t') + 1])
+        _write(target / 'requests' / '__init__.py', 'VERSION = 1\n')
+        return 0, 'instalado'
+    return run
+
+
+def test_second_install_comes_from_the_cache(layer, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(install_local_layers, '_run_captured', _fake_pip(calls))
+    req = _write(layer / 'requirements.txt', 'requests==2.31.0\n')
+    cache = LayerCache(tmp_path / 'cache', max_size=1 << 30)
+
+    first = install_local_layers._pip_install_layer('core', req, tmp_path / 'a', cache)
+    second = install_local_layers._pip_install_layer('core', req, tmp_path / 'b', cache)
+
+    assert (first[1], first[3]) == (0, False)
+    assert (second[1], second[3]) == (0, True)
+    assert len(calls) == 1
+    assert (tmp_path / 'b' / 'requests' / '__init__.py').exists()
+
+
+def test_local_directory_requirements_bypass_the_cache(layer, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(install_local_layers, '_run_captured', _fake_pip(calls))
+    (tmp_path / 'mylib').mkdir()
+    req = _write(layer / 'requirements.txt', './mylib\n')
+    cache = LayerCache(tmp_path / 'cache', max_size=1 << 30)
+
+    for target in ('a', 'b'):
+        assert install_local_layers._pip_install_layer('core', req, tmp_path / target, cache)[3] is False
+
+    assert len(calls) == 2
+    assert cache.entries() == []
+
+
+def test_failed_install_is_not_stored(tmp_path):
+    req = _write(tmp_path / 'requirements.txt', 'requests==2.31.0\n')
+    cache = LayerCache(tmp_path / 'cache', max_size=1 << 30)
+
+    assert cache.put('k', req, lambda target: False) is None
+    assert cache.get('k') is None
+    assert list((tmp_path / 'cache').iterdir()) == []
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    req = _write(tmp_path / 'requirements.txt', 'requests==2.31.0\n')
+    cache = LayerCache(tmp_path / 'cache', max_size=1 << 30)
+    for key in ('old', 'new'):
+        cache.put(key, req, lambda target: bool(_write(target / 'data.bin', 'x' * 100)))
+    os.utime(cache.entry_path('old') / 'meta.json', (0, 0))
+
+    evicted = cache.prune(max_size=150)
+
+    assert [e['key'] for e in evicted] == ['old']
+    assert cache.get('new') is not None
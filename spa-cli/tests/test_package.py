@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import zipfile
+from pathlib import Path
+from shutil import rmtree
+
+from spa_cli.src.utils.package import LAMBDA_EXCLUDE, package_artifacts, write_zip
+
+
+def _write(path: Path, text: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def _tree(root: Path, mtime: int) -> Path:
+    files = [
+        _write(root / 'lambda_function.py', 'def lambda_handler(event, context):\n    return {}\n'),
+        _write(root / 'pkg' / 'util.py', 'VALUE = 1\n'),
+        _write(root / 'bin' / 'tool', '#!/bin/sh\n'),
+    ]
+    os.chmod(root / 'bin' / 'tool', 0o755)
+    for path in files:
+        os.utime(path, (mtime, mtime))
+    return root
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_same_tree_with_other_mtimes_zips_to_the_same_bytes(tmp_path):
+    write_zip(_tree(tmp_path / 'a', 1_600_000_000), tmp_path / 'a.zip')
+    write_zip(_tree(tmp_path / 'b', 1_700_000_000), tmp_path / 'b.zip')
+
+    assert _sha256(tmp_path / 'a.zip') == _sha256(tmp_path / 'b.zip')
+
+
+def test_zip_entries_are_sorted_files_with_normalized_metadata(tmp_path):
+    count, uncompressed = write_zip(_tree(tmp_path / 'src', 1_700_000_000), tmp_path / 'out.zip')
+
+    with zipfile.ZipFile(tmp_path / 'out.zip') as archive:
+        infos = archive.infolist()
+    assert [info.filename for info in infos] == ['bin/tool', 'lambda_function.py', 'pkg/util.py']
+    assert {info.date_time for info in infos} == {(1980, 1, 1, 0, 0, 0)}
+    assert [info.external_attr >> 16 & 0o777 for info in infos] == [0o755, 0o644, 0o644]
+    assert (count, uncompressed) == (3, sum(info.file_size for info in infos))
+
+
+def test_lambda_zip_excludes_infra_config(tmp_path):
+    root = _tree(tmp_path / 'src', 1_700_000_000)
+    _write(root / 'infra_config.py', 'STACK = 1\n')
+    _write(root / '__pycache__' / 'infra_config.cpython-311.pyc', 'bytecode')
+
+    write_zip(root, tmp_path / 'out.zip', LAMBDA_EXCLUDE)
+
+    with zipfile.ZipFile(tmp_path / 'out.zip') as archive:
+        assert not [name for name in archive.namelist() if 'infra_config' in name]
+
+
+def _build(tmp_path: Path, lambdas=('get_items', 'worker'), layers=('core',)) -> Path:
+    build = tmp_path / 'build'
+    for name in lambdas:
+        _tree(build / 'infra' / 'components' / 'lambdas' / name, 1_700_000_000)
+        _write(build / 'infra' / 'components' / 'lambdas' / name / 'infra_config.py', 'STACK = 1\n')
+    for name in layers:
+        _write(build / 'tmp_build_layer' / name / 'python' / 'core' / '__init__.py', 'CORE = 1\n')
+    return build
+
+
+def _package(build: Path):
+    return package_artifacts(build, build / 'tmp_build_layer', build / 'infra' / 'components' / 'lambdas')
+
+
+def test_package_artifacts_writes_the_manifest(tmp_path):
+    build = _build(tmp_path)
+
+    artifacts = _package(build)
+
+    manifest = json.loads((build / 'artifacts.json').read_text())
+    assert sorted(manifest['lambdas']) == ['get_items', 'worker']
+    assert manifest['layers']['core']['path'] == 'artifacts/layers/core.zip'
+    for artifact in artifacts:
+        assert artifact.sha256 == _sha256(build / artifact.path)
+        with zipfile.ZipFile(build / artifact.path) as archive:
+            assert 'infra_config.py' not in archive.namelist()
+
+
+def test_unchanged_zip_is_kept(tmp_path):
+    build = _build(tmp_path)
+    _package(build)
+    zip_path = build / 'artifacts' / 'lambdas' / 'worker.zip'
+    os.utime(zip_path, (1, 1))
+    os.utime(build / 'infra' / 'components' / 'lambdas' / 'worker' / 'pkg' / 'util.py')
+
+    artifacts = {a.name: a for a in _package(build)}
+
+    assert artifacts['worker'].changed is False
+    assert zip_path.stat().st_mtime == 1
+    assert not list((build / 'artifacts' / 'lambdas').glob('*.tmp'))
+
+
+def test_stale_zips_are_removed(tmp_path):
+    build = _build(tmp_path)
+    _package(build)
+    rmtree(build / 'infra' / 'components' / 'lambdas' / 'worker')
+
+    _package(build)
+
+    assert sorted(p.name for p in (build / 'artifacts' / 'lambdas').iterdir()) == ['get_items.zip']
+    assert 'worker' not in json.loads((build / 'artifacts.json').read_text())['lambdas']
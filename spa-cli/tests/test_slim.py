@@ -0,0 +1,121 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from spa_cli.globals import Slim
+from spa_cli.src.utils.build_manifest import BuildManifest
+from spa_cli.src.utils.slim import invalidate_on_config_change, slim_artifacts
+
+
+def _write(path: Path, text: str = '') -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def _layer(tmp_path: Path) -> Path:
+    site = tmp_path / 'layers' / 'core' / 'python'
+    _write(site / 'botocore' / '__init__.py')
+    _write(site / 'botocore' / 'client.py', 'from botocore.docs.docstring import ClientMethodDocstring\n')
+    _write(site / 'botocore' / 'docs' / '__init__.py')
+    _write(site / 'botocore' / 'docs' / 'docstring.py', 'class ClientMethodDocstring:\n    pass\n')
+    _write(site / 'botocore' / 'docs' / 'README.md', '# docs')
+    _write(site / 'botocore' / 'tests' / 'test_client.py', 'def test_x():\n    pass\n')
+    _write(site / 'botocore' / 'tests' / 'conftest.py')
+    _write(site / 'pkg' / 'docs' / 'index.rst', 'docs')
+    _write(site / 'pkg' / 'examples' / 'img.png', 'png')
+    _write(site / 'pkg' / '__init__.py')
+    _write(site / 'pkg' / 'testing.py')
+    _write(site / 'botocore-1.0.dist-info' / 'METADATA', 'Name: botocore\n')
+    _write(site / 'botocore-1.0.dist-info' / 'RECORD', 'botocore/__init__.py,,\n')
+    _write(site / 'botocore-1.0.dist-info' / 'LICENSE.txt', 'license')
+    return site
+
+
+def _slim(tmp_path: Path, config: Slim = None):
+    return slim_artifacts(tmp_path / 'layers', tmp_path / 'lambdas', config or Slim())
+
+
+def test_default_slim_keeps_importable_docs_packages(tmp_path):
+    site = _layer(tmp_path)
+
+    _slim(tmp_path)
+
+    result = subprocess.run([sys.executable, '-c', 'import botocore.client'], cwd=site,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert (site / 'botocore' / 'docs' / 'docstring.py').exists()
+    assert not (site / 'botocore' / 'docs' / 'README.md').exists()
+
+
+def test_default_slim_removes_non_package_docs_and_tests(tmp_path):
+    site = _layer(tmp_path)
+
+    [report] = _slim(tmp_path)
+
+    assert not (site / 'botocore' / 'tests').exists()
+    assert not (site / 'pkg' / 'docs').exists()
+    assert not (site / 'pkg' / 'examples').exists()
+    assert (site / 'pkg' / 'testing.py').exists()
+    assert set(report.removed) == {'docs', 'tests', 'dist-info'}
+    assert report.after < report.before
+
+
+def test_dist_info_keeps_metadata_and_licenses(tmp_path):
+    site = _layer(tmp_path)
+
+    _slim(tmp_path)
+
+    assert sorted(p.name for p in (site / 'botocore-1.0.dist-info').iterdir()) == ['LICENSE.txt', 'METADATA']
+
+
+def test_runtime_packages_are_opt_in(tmp_path):
+    site = _layer(tmp_path)
+
+    [report] = _slim(tmp_path)
+    assert (site / 'botocore' / '__init__.py').exists()
+    assert report.runtime_removed == []
+
+    [report] = _slim(tmp_path, Slim(runtime_packages=['botocore']))
+    assert not (site / 'botocore').exists()
+    assert report.runtime_removed == ['botocore 1.0']
+
+
+def test_keep_patterns_are_never_removed(tmp_path):
+    site = _layer(tmp_path)
+
+    _slim(tmp_path, Slim(keep=['python/pkg/docs/*']))
+
+    assert (site / 'pkg' / 'docs' / 'index.rst').exists()
+
+
+def test_disabled_only_measures(tmp_path):
+    site = _layer(tmp_path)
+
+    [report] = _slim(tmp_path, Slim(enabled=False))
+
+    assert (site / 'pkg' / 'examples' / 'img.png').exists()
+    assert report.removed == {} and report.before == report.after
+
+
+def test_lambda_tests_are_removed(tmp_path):
+    lambda_dir = tmp_path / 'lambdas' / 'get_items'
+    _write(lambda_dir / 'lambda_function.py', 'def lambda_handler(event, context):\n    return {}\n')
+    _write(lambda_dir / 'test_lambda_function.py')
+
+    [report] = _slim(tmp_path)
+
+    assert report.kind == 'lambda'
+    assert sorted(p.name for p in lambda_dir.iterdir()) == ['lambda_function.py']
+
+
+def test_config_change_reinstalls_layers(tmp_path):
+    manifest = BuildManifest(tmp_path / 'build')
+    manifest.set_step('layers/core/requirements', 'abc')
+
+    assert invalidate_on_config_change(manifest, Slim()) is False
+    assert invalidate_on_config_change(manifest, Slim()) is False
+    assert manifest.step('layers/core/requirements') == 'abc'
+
+    assert invalidate_on_config_change(manifest, Slim(docs=False)) is True
+    assert manifest.step('layers/core/requirements') is None